@@ -0,0 +1,616 @@
+"""
+Benchmark performa tanpa GUI dengan data rumah sakit sintetis.
+
+Contoh:
+    python -m benchmark --out hasil_benchmark.json
+    python -m benchmark --sizes 10k 100k --baseline hasil_lama.json
+
+Data mapping sintetis (seed tetap) dibuat untuk setiap ukuran (default
+10k / 100k / 1M baris) dengan distribusi kode ICD, usia, jenis kelamin,
+angkatan, dan alasan pulang yang mirip data asli. Template SIRS dan
+PUSKESAD dibuat dengan bentuk yang sama seperti excel/sirsclean.xlsx dan
+excel/puskesad.xlsx.
+
+Setiap ukuran dijalankan di proses terpisah (database, folder kerja, dan
+puncak RSS sendiri). Tahap yang diukur: upload mapping
+(save_mapping_to_db), engine SIRS (pandas, sql, incremental), ekspansi
+kode ICD, engine PUSKESAD, serta export Excel dan PDF. Hasil ditulis
+sebagai JSON; dengan --baseline, tahap yang lebih lambat dari hasil lama
+melebihi --tolerance dilaporkan dan kode keluar 1.
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SIZES = ["10k", "100k", "1m"]
+DEFAULT_SEED = 20250901
+
+# Bentuk template sama seperti excel/sirsclean.xlsx dan excel/puskesad.xlsx
+SIRS_TEMPLATE_ROWS = 26000
+PUSKESAD_TEMPLATE_ROWS = 522
+
+# Baris per potongan saat menulis CSV mapping
+CSV_CHUNK_ROWS = 100_000
+
+# Regresi: lebih lambat dari baseline > tolerance DAN > MIN_DELTA detik
+DEFAULT_TOLERANCE = 0.25
+MIN_DELTA = 0.05
+
+MB = 1024 * 1024
+
+STAGES = [
+    "upload_mapping",
+    "read_sirs_template", "sirs_load_pandas", "sirs_pandas", "sirs_sql",
+    "sirs_incremental", "sirs_incremental_warm",
+    "read_puskesad_template", "expand_icd", "puskesad_load", "puskesad",
+    "excel_sirs", "excel_puskesad", "pdf_sirs", "pdf_puskesad",
+]
+
+# ===================== DISTRIBUSI DATA SINTETIS =====================
+
+# Proporsi bab ICD (huruf pertama kode) mengikuti data mapping asli
+ICD_LETTERS = {
+    'C': 1206, 'N': 660, 'J': 634, 'K': 606, 'I': 420, 'D': 402, 'A': 354,
+    'M': 328, 'S': 280, 'H': 182, 'R': 136, 'P': 130, 'O': 108, 'E': 100,
+    'G': 78, 'F': 58, 'L': 54, 'Q': 52, 'B': 48, 'Z': 42, 'T': 14,
+}
+# Porsi kode tanpa sub kategori ("I10" alih-alih "I10.0")
+ICD_WITHOUT_SUB = 0.1
+
+KELAMIN = {'P': 0.567, 'L': 0.432, '': 0.001}
+ANGKATAN = {
+    'LAIN-LAIN': 3380, 'KEMENTERIAN': 664, 'AD': 482, 'TNI': 454, 'KEL AD': 450,
+    'PNS AD': 92, 'KEL AL': 88, 'AL': 84, 'BLU NON ASN': 64, 'POLRI': 30,
+    'PNS MABES DAN KEMHAN': 28, 'AU': 24,
+}
+ALASAN_PULANG = {'DAPAT BEROBAT JALAN': 0.959, 'MENINGGAL': 0.041}
+JENIS_PEMBAYARAN = {
+    'BPJS PBI': 1526, 'BPJS DINAS': 1268, 'BPJS MANDIRI': 1016, 'BPJS PEGAWAI SWASTA': 864,
+    'BPJS PURNAWIRAWAN': 532, 'BPJS KEMENTRIAN': 508, 'BPJS RSPAD': 76, 'BPJS POLRI': 40,
+    'UMUM - TUNAI': 32, 'ASABRI': 12,
+}
+HUB_KEL = {
+    'PESERTA / YANG BERSANGKUTAN': 1944, 'ORGANIK': 1266, 'ISTRI': 924, '--TIDAK ADA--': 542,
+    'ANAK': 436, 'LAIN-LAIN': 264, 'ANAK KE 1': 162, 'SUAMI': 148, 'ANAK KE 2': 118,
+}
+RJRI = {'RI': 0.9, 'RI/FLOWCAT': 0.07, 'RI F': 0.03}
+
+# Porsi neonatus (usia hari), bayi (usia bulan), dan anak; sisanya dewasa
+AGE_NEONATE = 0.02
+AGE_INFANT = 0.03
+AGE_CHILD = 0.10
+
+# Header file mapping asli (excel/DataMentah.xlsx)
+MAPPING_HEADERS = [
+    'NO', 'NO RM', 'NO REGISTRASI', 'NAMA PASIEN', 'USIA TAHUN', 'USIA BULAN', 'USIA HARI',
+    'NO BPJS', 'KELAMIN', 'ALAMAT', 'DOMISILI', 'HUB. KEL', 'JENIS PEMBAYARAN ', 'PANGKAT',
+    'ANGKATAN', 'NRP / NIP', 'KESATUAN', 'TANGGAL MASUK', 'TANGGAL KELUAR', 'DPJP',
+    'DIAGNOSA MASUK', 'ALASAN PULANG', 'WAKTU MENINGGAL', 'TANGGAL PULANG RM ',
+    'RUANG PERAWATAN', 'PEMULANGAN  >2x24 JAM', 'RJ/RI', 'DIAGNOSA UTAMA', 'KODE ICD',
+    'DIAGNOSA SEKUNDER', 'KODE ICD.1', 'TINDAKAN', 'KODE ICD 9 CM', 'TINDAKAN.1', 'KODE ICD 9 CM ',
+]
+
+# Header 3 tingkat template PUSKESAD (None = sel header kosong)
+PUSKESAD_STATUS = 'PASIEN MENURUT GOLONGAN / STATUS'
+PUSKESAD_UMUR = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR'
+PUSKESAD_SEX = 'PASIEN KELUAR (HIDUP & MATI) MENURUT SEX'
+PUSKESAD_HEADERS = [
+    ('NO URUT', None, None), ('NO DTD', None, None), ('NO DAFTAR TERINCI', None, None),
+    ('GOLONGAN SEBAB SEBAB SAKIT', None, None),
+    (PUSKESAD_STATUS, 'TNI AD', 'AD'), (PUSKESAD_STATUS, 'TNI AD', 'PNS AD'),
+    (PUSKESAD_STATUS, 'TNI AD', 'KEL AD'), (PUSKESAD_STATUS, 'ANGKATAN LAIN', 'AU / AL'),
+    (PUSKESAD_STATUS, 'ANGKATAN LAIN', 'PNS ( AL, AD MABES & KEMHAN)'),
+    (PUSKESAD_STATUS, 'ANGKATAN LAIN', 'KEL  ( AL, AD MABES & KEMHAN)'),
+    (PUSKESAD_STATUS, 'PURNAWIRAWAN / BPJS UMUM (MANDIRI, PPPK, PEGAWAI SWASTA, PBI)', None),
+    (PUSKESAD_STATUS, 'UMUM', None),
+    (PUSKESAD_UMUR, '28 HARI', None), (PUSKESAD_UMUR, '28 HR < 1 THN', None),
+    (PUSKESAD_UMUR, '1 - 4 THN', None), (PUSKESAD_UMUR, '5 - 14 THN', None),
+    (PUSKESAD_UMUR, '15 - 25 THN', None), (PUSKESAD_UMUR, '25 - 44 THN', None),
+    (PUSKESAD_UMUR, '45 - 64 THN', None), (PUSKESAD_UMUR, '>64 THN', None),
+    (PUSKESAD_SEX, 'LK', None), (PUSKESAD_SEX, 'PR', None),
+    ('JUMLAH PASIEN KELUAR (LK+PR)', None, None), ('JUMLAH PASIEN KELUAR MATI', None, None),
+]
+
+# Pola spesifikasi kode di kolom NO DAFTAR TERINCI dan porsinya
+PUSKESAD_PATTERNS = {
+    'single': 0.35,       # "A 09"
+    'sub': 0.15,          # "A 06.4"
+    'range': 0.30,        # "A 55-56"
+    'sub_range': 0.08,    # "A 16.3-.9"
+    'cross': 0.02,        # "A 15.1-16.2"
+    'list': 0.10,         # "N 25-29, 31-39"
+}
+
+
+def parse_size(text):
+    """'10k' / '100k' / '1m' atau angka biasa -> jumlah baris"""
+    key = text.strip().lower()
+    if key in SIZES:
+        return SIZES[key]
+    try:
+        rows = int(key.replace('_', ''))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ukuran tidak dikenal: {text} (pakai {', '.join(SIZES)} atau angka)")
+    if rows <= 0:
+        raise argparse.ArgumentTypeError(f"ukuran harus lebih dari 0: {text}")
+    return rows
+
+
+def _choice(rng, weights, size):
+    labels = list(weights)
+    p = np.array([weights[label] for label in labels], dtype='float64')
+    return np.array(labels, dtype=object)[rng.choice(len(labels), size=size, p=p / p.sum())]
+
+
+def synthetic_icd(rng, size, seed):
+    """
+    Kode ICD dengan proporsi bab seperti data asli; di dalam satu bab
+    beberapa kategori jauh lebih sering muncul (sebaran Zipf).
+    """
+    letters = _choice(rng, ICD_LETTERS, size)
+
+    # Urutan popularitas kategori 00-99 per bab hanya bergantung pada seed
+    # (sama untuk semua potongan CSV dan semua ukuran)
+    popularity = 1.0 / np.arange(1, 101) ** 1.1
+    popularity /= popularity.sum()
+    ranks = rng.choice(100, size=size, p=popularity)
+    order_rng = np.random.default_rng(seed)
+    orders = {letter: order_rng.permutation(100) for letter in ICD_LETTERS}
+    category = np.empty(size, dtype='int64')
+    for letter, order in orders.items():
+        mask = letters == letter
+        category[mask] = order[ranks[mask]]
+
+    sub = rng.integers(0, 10, size=size)
+    codes = pd.Series(letters).str.cat(pd.Series(category).map('{:02d}'.format))
+    with_sub = codes.str.cat(pd.Series(sub).astype(str), sep='.')
+    return with_sub.where(rng.random(size) >= ICD_WITHOUT_SUB, codes).to_numpy(dtype=object)
+
+
+def synthetic_ages(rng, size):
+    """(usia_tahun, usia_bulan, usia_hari) sebagai teks seperti di file upload"""
+    kind = rng.random(size)
+    neonate = kind < AGE_NEONATE
+    infant = (kind >= AGE_NEONATE) & (kind < AGE_NEONATE + AGE_INFANT)
+    child = (kind >= AGE_NEONATE + AGE_INFANT) & (kind < AGE_NEONATE + AGE_INFANT + AGE_CHILD)
+
+    tahun = np.clip(rng.normal(48, 18, size=size), 15, 100).astype('int64')
+    tahun[child] = rng.integers(1, 15, size=int(child.sum()))
+    tahun[neonate | infant] = 0
+
+    bulan = rng.integers(0, 12, size=size)
+    bulan[infant] = rng.integers(1, 12, size=int(infant.sum()))
+    bulan[neonate] = 0
+
+    hari = np.full(size, '', dtype=object)
+    hari[neonate] = rng.integers(0, 29, size=int(neonate.sum())).astype(str)
+    return tahun.astype(str), bulan.astype(str), hari
+
+
+def synthetic_mapping(rows, seed, start=0):
+    """DataFrame mapping sintetis (semua kolom teks) untuk baris start..start+rows"""
+    rng = np.random.default_rng([seed, start])
+    tahun, bulan, hari = synthetic_ages(rng, rows)
+    number = np.arange(start + 1, start + rows + 1)
+
+    masuk = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, size=rows), unit='s')
+    keluar = masuk.normalize() + pd.to_timedelta(rng.integers(1, 15, size=rows), unit='D')
+    alasan = _choice(rng, ALASAN_PULANG, rows)
+
+    df = pd.DataFrame({header: '' for header in MAPPING_HEADERS}, index=range(rows))
+    df['NO'] = number.astype(str)
+    df['NO RM'] = (1_000_000 + number).astype(str)
+    df['NO REGISTRASI'] = pd.Series(number).map('P{:09d}'.format).to_numpy()
+    df['NAMA PASIEN'] = pd.Series(number).map('PASIEN {:07d}'.format).to_numpy()
+    df['USIA TAHUN'] = tahun
+    df['USIA BULAN'] = bulan
+    df['USIA HARI'] = hari
+    df['KELAMIN'] = _choice(rng, KELAMIN, rows)
+    df['HUB. KEL'] = _choice(rng, HUB_KEL, rows)
+    df['JENIS PEMBAYARAN '] = _choice(rng, JENIS_PEMBAYARAN, rows)
+    df['ANGKATAN'] = _choice(rng, ANGKATAN, rows)
+    df['TANGGAL MASUK'] = masuk.strftime('%Y-%m-%d %H:%M:%S')
+    df['TANGGAL KELUAR'] = keluar.strftime('%Y-%m-%d')
+    df['ALASAN PULANG'] = alasan
+    df['WAKTU MENINGGAL'] = np.where(alasan == 'MENINGGAL', df['TANGGAL KELUAR'], '')
+    df['RJ/RI'] = _choice(rng, RJRI, rows)
+    df['KODE ICD'] = synthetic_icd(rng, rows, seed)
+    return df
+
+
+def write_mapping_csv(filepath, rows, seed):
+    """Tulis file upload mapping sintetis (.csv) per CSV_CHUNK_ROWS baris"""
+    for start in range(0, rows, CSV_CHUNK_ROWS):
+        chunk = synthetic_mapping(min(CSV_CHUNK_ROWS, rows - start), seed, start)
+        chunk.to_csv(filepath, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+
+
+def sirs_template_codes(rows):
+    """Kode ICD template SIRS: A00.0 ... Z99.9 berurutan, diulang jika perlu"""
+    codes = [
+        f"{letter}{category:02d}.{sub}"
+        for letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        for category in range(100)
+        for sub in range(10)
+    ]
+    return [codes[i % len(codes)] for i in range(rows)]
+
+
+def write_sirs_template(filepath, rows=SIRS_TEMPLATE_ROWS):
+    """Template SIRS seperti excel/sirsclean.xlsx: No, Kode ICD, kolom SIRS kosong"""
+    from excel_export import write_excel
+    from sirs_engine import JUMLAH_COLUMNS, SIRS_COLUMNS
+
+    df = pd.DataFrame({'No': np.arange(1, rows + 1), 'Kode ICD': sirs_template_codes(rows)})
+    empty = pd.DataFrame(np.nan, index=df.index, columns=SIRS_COLUMNS + JUMLAH_COLUMNS)
+    write_excel(pd.concat([df, empty], axis=1), filepath, 'SIRS')
+
+
+def puskesad_specs(rng, rows):
+    """Spesifikasi NO DAFTAR TERINCI berurutan per bab, dengan pola seperti template asli"""
+    letters = sorted(ICD_LETTERS)
+    patterns = _choice(rng, PUSKESAD_PATTERNS, rows)
+    specs = []
+    for i, pattern in enumerate(patterns):
+        letter = letters[i * len(letters) // rows]
+        low = int(rng.integers(0, 90))
+        high = low + int(rng.integers(1, 9))
+        sub = int(rng.integers(0, 8))
+        if pattern == 'single':
+            specs.append(f"{letter} {low:02d}")
+        elif pattern == 'sub':
+            specs.append(f"{letter} {low:02d}.{sub}")
+        elif pattern == 'range':
+            specs.append(f"{letter} {low:02d}-{high:02d}")
+        elif pattern == 'sub_range':
+            specs.append(f"{letter} {low:02d}.{sub}-.9")
+        elif pattern == 'cross':
+            specs.append(f"{letter} {low:02d}.{sub}-{high:02d}.{sub}")
+        else:
+            specs.append(f"{letter} {low:02d}, {high:02d}-{min(high + 3, 99):02d}")
+    return specs
+
+
+def write_puskesad_template(filepath, seed, rows=PUSKESAD_TEMPLATE_ROWS):
+    """Template PUSKESAD seperti excel/puskesad.xlsx: header 3 baris, kolom nilai kosong"""
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng([seed, rows])
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('PUSKESAD')
+    for level in range(3):
+        ws.append([header[level] for header in PUSKESAD_HEADERS])
+
+    blank = [None] * (len(PUSKESAD_HEADERS) - 4)
+    for i, spec in enumerate(puskesad_specs(rng, rows)):
+        ws.append([i + 1, f"{i + 1:03d}", spec, f"Golongan sebab sakit {i + 1}"] + blank)
+    wb.save(filepath)
+
+
+# ============================ PENGUKURAN ============================
+
+def peak_rss_mb():
+    """Puncak RSS proses ini (MB), None jika tidak bisa dibaca"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: pakai psutil jika terpasang
+        if importlib.util.find_spec("psutil") is None:
+            return None
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / MB, 1)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    return round(peak / (MB if sys.platform == 'darwin' else 1024), 1)
+
+
+def _row_count(value):
+    if value is None or isinstance(value, str):
+        # Tahap export mengembalikan path file
+        return None
+    if isinstance(value, dict):
+        return value.get('rows', value.get('total'))
+    if isinstance(value, tuple):
+        return _row_count(value[0])
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class Recorder:
+    """Catat waktu, CPU, jumlah baris, dan puncak RSS setiap tahap"""
+
+    def __init__(self, stages=None):
+        self.stages = stages
+        self.results = []
+
+    def wanted(self, name):
+        return self.stages is None or name in self.stages
+
+    def run(self, name, func, rows_in=None, required=False):
+        """
+        Jalankan func() sebagai satu tahap. Tahap yang tidak dipilih dilewati
+        (None), kecuali required (dibutuhkan tahap lain): tetap dijalankan
+        tanpa dicatat.
+        """
+        if not self.wanted(name):
+            return func() if required else None
+
+        started = time.perf_counter()
+        cpu = time.process_time()
+        value = func()
+        self.results.append({
+            'stage': name,
+            'seconds': round(time.perf_counter() - started, 4),
+            'cpu_seconds': round(time.process_time() - cpu, 4),
+            'rows_in': rows_in,
+            'rows_out': _row_count(value),
+            'peak_rss_mb': peak_rss_mb(),
+        })
+        print(f"  {name:<24} {self.results[-1]['seconds']:9.3f} detik", file=sys.stderr)
+        return value
+
+    def skip(self, name, reason):
+        if self.wanted(name):
+            self.results.append({'stage': name, 'skipped': reason})
+            print(f"  {name:<24} dilewati ({reason})", file=sys.stderr)
+
+
+def run_size(rows, workdir, templates, seed, workers, stages):
+    """Jalankan semua tahap untuk satu ukuran data (di proses sendiri)"""
+    # DB_PATH relatif ke folder kerja -> setiap ukuran punya database sendiri
+    os.makedirs(os.path.join(workdir, "database"), exist_ok=True)
+    os.makedirs(os.path.join(workdir, "out"), exist_ok=True)
+    os.chdir(workdir)
+
+    import puskesad_engine
+    import rspad
+    from db import DB_PATH, close_connections
+    from excel_export import write_excel
+    from icd_expand import _expand_normalized
+    from logic import save_mapping_to_db
+    from parallel import hitung_puskesad_parallel, shutdown_executors
+
+    recorder = Recorder(stages)
+    started = time.perf_counter()
+    mapping_file = os.path.abspath("mapping.csv")
+    write_mapping_csv(mapping_file, rows, seed)
+    generate_seconds = round(time.perf_counter() - started, 3)
+    print(f"[{rows} baris] data sintetis dibuat ({generate_seconds} detik)", file=sys.stderr)
+
+    try:
+        # Tahap lain membutuhkan database hasil upload
+        recorder.run("upload_mapping", lambda: save_mapping_to_db(mapping_file), rows, required=True)
+
+        # ---------------- SIRS ----------------
+        df_sirs = recorder.run("read_sirs_template", lambda: pd.read_excel(templates['sirs']), required=True)
+        icd_col = rspad.sirs_engine.find_icd_column(df_sirs)
+        template_rows = len(df_sirs)
+
+        def sirs(engine):
+            hitung = rspad.load_sirs_mapping(DB_PATH, engine)
+            return lambda: hitung(df_sirs.copy(), icd_col, workers, None)
+
+        result_sirs = None
+        hitung = recorder.run(
+            "sirs_load_pandas", lambda: rspad.load_sirs_mapping(DB_PATH, rspad.ENGINE_PANDAS),
+            required=recorder.wanted("sirs_pandas"),
+        )
+        if hitung is not None:
+            result_sirs = recorder.run("sirs_pandas", lambda: hitung(df_sirs.copy(), icd_col, workers, None), template_rows)
+        result = recorder.run("sirs_sql", sirs(rspad.ENGINE_SQL), template_rows)
+        result_sirs = result_sirs if result_sirs is not None else result
+        # Pertama kali: ringkasan dibangun dari awal; berikutnya hanya dibaca
+        result = recorder.run(
+            "sirs_incremental", sirs(rspad.ENGINE_INCREMENTAL), template_rows,
+            required=recorder.wanted("sirs_incremental_warm"),
+        )
+        result_sirs = result_sirs if result_sirs is not None else result
+        result = recorder.run("sirs_incremental_warm", sirs(rspad.ENGINE_INCREMENTAL), template_rows)
+        result_sirs = result_sirs if result_sirs is not None else result
+
+        # ---------------- PUSKESAD ----------------
+        df_p = recorder.run(
+            "read_puskesad_template", lambda: puskesad_engine.read_template(templates['puskesad']), required=True
+        )
+        clean_col = puskesad_engine.find_icd_column(df_p.columns, allow_kode=True)
+
+        # Cache ekspansi dikosongkan agar yang diukur ekspansi dari awal
+        _expand_normalized.cache_clear()
+        df_clean, _ = recorder.run(
+            "expand_icd", lambda: puskesad_engine.clean_template(df_p, clean_col), len(df_p), required=True
+        )
+        p_col = puskesad_engine.find_icd_column(df_clean.columns)
+
+        result_p = None
+        mapping_index = recorder.run(
+            "puskesad_load", lambda: rspad.load_puskesad_mapping(DB_PATH), required=recorder.wanted("puskesad")
+        )
+        if mapping_index is not None:
+            if workers > 1:
+                count = lambda: hitung_puskesad_parallel(df_clean, p_col, mapping_index, workers=workers)
+            else:
+                count = lambda: puskesad_engine.hitung_puskesad(df_clean, p_col, mapping_index)
+            result_p = recorder.run("puskesad", count, len(df_clean))
+
+        # ---------------- EXPORT ----------------
+        if result_sirs is not None:
+            recorder.run(
+                "excel_sirs", lambda: write_excel(result_sirs, os.path.join("out", "SIRS.xlsx"), 'SIRS'),
+                len(result_sirs)
+            )
+        if result_p is not None:
+            output = puskesad_engine.prepare_output(result_p)
+            recorder.run(
+                "excel_puskesad", lambda: write_excel(output, os.path.join("out", "PUSKESAD.xlsx"), 'PUSKESAD'),
+                len(output)
+            )
+
+        if importlib.util.find_spec("reportlab") is None:
+            recorder.skip("pdf_sirs", "reportlab tidak terpasang")
+            recorder.skip("pdf_puskesad", "reportlab tidak terpasang")
+        else:
+            import pdf_export
+            # Sama seperti default layar: kode ICD yang semua nilainya 0 dilewati
+            if result_sirs is not None:
+                basic_cols, sections = pdf_export.sirs_sections(result_sirs.columns)
+                recorder.run("pdf_sirs", lambda: pdf_export.export_pdf(
+                    result_sirs, os.path.join("out", "SIRS.pdf"), "BENCHMARK SIRS", basic_cols, sections, skip_zero=True
+                ), len(result_sirs))
+            if result_p is not None:
+                basic_cols, sections = pdf_export.puskesad_sections(result_p.columns)
+                recorder.run("pdf_puskesad", lambda: pdf_export.export_pdf(
+                    result_p, os.path.join("out", "PUSKESAD.pdf"), "BENCHMARK PUSKESAD", basic_cols, sections,
+                    skip_zero=True
+                ), len(result_p))
+    finally:
+        close_connections()
+        shutdown_executors()
+
+    return {
+        'rows': rows,
+        'generate_seconds': generate_seconds,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': recorder.results,
+    }
+
+
+# ============================ PERBANDINGAN ============================
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Bandingkan dengan hasil lama. Mengembalikan daftar regresi: tahap yang
+    lebih lambat dari baseline lebih dari tolerance (dan lebih dari MIN_DELTA
+    detik, agar noise tahap singkat tidak ikut terhitung).
+    """
+    def timings(data):
+        return {
+            (run['rows'], stage['stage']): stage['seconds']
+            for run in data['runs'] for stage in run['stages'] if 'seconds' in stage
+        }
+
+    old = timings(baseline)
+    regressions = []
+    for key, seconds in timings(results).items():
+        before = old.get(key)
+        if before is None:
+            continue
+        if seconds > before * (1 + tolerance) and seconds - before > MIN_DELTA:
+            rows, stage = key
+            regressions.append({
+                'rows': rows, 'stage': stage, 'baseline_seconds': before, 'seconds': seconds,
+                'ratio': round(seconds / before, 2) if before else None,
+            })
+    return regressions
+
+
+# ============================ CLI ============================
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark",
+        description="Benchmark SIRS / PUSKESAD dengan data mapping sintetis",
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=parse_size, default=[SIZES[size] for size in DEFAULT_SIZES],
+        help="jumlah baris mapping: 10k, 100k, 1m, atau angka (default: 10k 100k 1m)",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"seed data sintetis (default: {DEFAULT_SEED})")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="hanya jalankan tahap ini (upload selalu jalan)")
+    parser.add_argument("--workers", type=int, default=1, help="jumlah proses worker engine (default: 1)")
+    parser.add_argument("--sirs-rows", type=int, default=SIRS_TEMPLATE_ROWS, help="jumlah baris template SIRS")
+    parser.add_argument("--puskesad-rows", type=int, default=PUSKESAD_TEMPLATE_ROWS, help="jumlah baris template PUSKESAD")
+    parser.add_argument("--out", help="file hasil JSON (default: ditulis ke stdout)")
+    parser.add_argument("--workdir", help="folder kerja (default: folder sementara yang dihapus setelah selesai)")
+    parser.add_argument("--baseline", help="hasil JSON lama untuk deteksi regresi")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help=f"batas perlambatan relatif terhadap baseline (default: {DEFAULT_TOLERANCE})",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rspad-benchmark-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        started = time.perf_counter()
+        templates = {
+            'sirs': os.path.abspath(os.path.join(workdir, "sirs_template.xlsx")),
+            'puskesad': os.path.abspath(os.path.join(workdir, "puskesad_template.xlsx")),
+        }
+        write_sirs_template(templates['sirs'], args.sirs_rows)
+        write_puskesad_template(templates['puskesad'], args.seed, args.puskesad_rows)
+        print(f"Template dibuat ({time.perf_counter() - started:.2f} detik)", file=sys.stderr)
+
+        runs = []
+        for rows in args.sizes:
+            size_dir = os.path.abspath(os.path.join(workdir, f"mapping_{rows}"))
+            # Proses baru per ukuran: puncak RSS dan cache modul tidak terbawa
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                future = executor.submit(run_size, rows, size_dir, templates, args.seed, args.workers, args.stages)
+                runs.append(future.result())
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'seed': args.seed,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'templates': {'sirs_rows': args.sirs_rows, 'puskesad_rows': args.puskesad_rows},
+        'runs': runs,
+    }
+
+    regressions = []
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        results['regressions'] = regressions
+        for item in regressions:
+            print(
+                f"REGRESI {item['stage']} ({item['rows']} baris): "
+                f"{item['baseline_seconds']:.3f} -> {item['seconds']:.3f} detik",
+                file=sys.stderr,
+            )
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
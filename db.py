@@ -1,32 +1,454 @@
 import sqlite3
 import os
+import re
+import threading
+from hashlib import blake2b
+
+from diagnostics import instrument, stage
 
 DB_PATH = os.path.join("database", "mapping.db")
 
+# Pengaturan SQLite untuk koneksi bersama
+BUSY_TIMEOUT = 30          # detik menunggu lock sebelum error
+CACHE_SIZE_KB = 64 * 1024  # page cache per koneksi (64 MB)
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Satu koneksi per thread per database (sqlite3.Connection tidak boleh
+# dipakai lintas thread); koneksi ditutup otomatis saat thread selesai
+_local = threading.local()
+
+
+def _configure(conn):
+    """Terapkan PRAGMA: WAL agar pembaca tidak terblokir oleh upload"""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+
+def get_connection(db_path=None):
+    """
+    Koneksi bersama untuk thread saat ini.
+
+    Koneksi dipakai ulang antar pemanggilan, jadi pemanggil tidak perlu
+    (dan tidak boleh) menutupnya; cukup commit/rollback.
+    """
+    key = os.path.abspath(db_path or DB_PATH)
+
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get(key)
+    if conn is None:
+        conn = sqlite3.connect(key, timeout=BUSY_TIMEOUT)
+        _configure(conn)
+        conns[key] = conn
     return conn
 
+
+def close_connections():
+    """Tutup semua koneksi milik thread saat ini"""
+    conns = getattr(_local, "conns", None) or {}
+    for conn in conns.values():
+        conn.close()
+    conns.clear()
+
+# Tipe kolom hasil inferensi dari nama header (setelah normalize_column)
+INTEGER_PREFIXES = ("usia_",)
+
+# Kolom kategori: disimpan sebagai label pendek yang sudah dinormalisasi
+CATEGORICAL_COLUMNS = ("kelamin", "angkatan", "alasan_pulang")
+
+# Index sekunder: nama -> (kolom yang dibutuhkan, ekspresi index)
+SIRS_INDEX_COLUMNS = ["kode_icd", "kelamin", "usia_tahun", "usia_bulan", "usia_hari", "alasan_pulang"]
+INDEXES = {
+    "idx_mapping_sirs": (SIRS_INDEX_COLUMNS, ", ".join(SIRS_INDEX_COLUMNS)),
+    "idx_mapping_kelamin": (["kelamin"], "kelamin"),
+    "idx_mapping_angkatan": (["angkatan"], "angkatan"),
+    "idx_mapping_alasan_pulang": (["alasan_pulang"], "alasan_pulang"),
+}
+# Index versi lama yang tidak dipakai query mana pun (dibuang saat upload)
+OBSOLETE_INDEXES = ("idx_mapping_kode_icd",)
+
+
+# Tabel FTS5 (external content) untuk pencarian di Lihat Data Mapping
+FTS_TABLE = "mapping_fts"
+# Titik, strip, dan garis miring tetap bagian token (kode ICD "A09.9", tanggal)
+FTS_TOKENIZE = "unicode61 tokenchars '.-/'"
+FTS_TRIGGERS = ("mapping_fts_ai", "mapping_fts_ad", "mapping_fts_au")
+
+# Kunci unik setiap baris mapping untuk upsert saat upload ulang: natural
+# key (NO RM + tanggal masuk + tanggal keluar + ruang + kode ICD) jika
+# lengkap, selain itu hash isi seluruh kolom. Kolom teknis: tidak
+# ditampilkan dan tidak diindeks FTS.
+KEY_COLUMN = "row_key"
+KEY_INDEX = "idx_mapping_row_key"
+# Wajib terisi agar natural key dipakai
+NATURAL_KEY_COLUMNS = ("no_rm", "tanggal_masuk", "kode_icd")
+# Ikut masuk natural key jika kolomnya ada (boleh kosong): pasien yang
+# sama bisa keluar dua kali dengan tanggal masuk & kode ICD yang sama
+NATURAL_KEY_EXTRA_COLUMNS = ("tanggal_keluar", "ruang_perawatan")
+# Versi cara menghitung kunci (PRAGMA user_version); kunci lama dihitung ulang
+KEY_VERSION = 2
+HIDDEN_COLUMNS = ("id", KEY_COLUMN)
+
+
+def infer_column_type(col):
+    """
+    Tipe SQLite untuk satu kolom mapping berdasarkan namanya. Tanggal
+    (tanggal_*) disimpan sebagai TEXT ISO: tipe DATE berafinitas NUMERIC
+    dan mengubah tanggal berbentuk angka menjadi bilangan.
+    """
+    if col.startswith(INTEGER_PREFIXES):
+        return "INTEGER"
+    return "TEXT"
+
+
+def _table_columns(cursor):
+    cursor.execute("PRAGMA table_info(mapping)")
+    return {row[1]: row[2].upper() for row in cursor.fetchall()}
+
+
+def data_columns(cursor):
+    """Kolom data tabel mapping (tanpa id dan kolom kunci)"""
+    return [col for col in _table_columns(cursor) if col not in HIDDEN_COLUMNS]
+
+
+def _key_text(value, integer=False):
+    """
+    Teks nilai untuk kunci baris. Kolom INTEGER dinormalisasi seperti
+    afinitas SQLite ("43.0" -> "43") agar hasil upload dan isi database sama.
+    """
+    if value is None:
+        return ""
+    if integer and isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return str(int(number)) if number.is_integer() else value
+    return str(value)
+
+
+def _digest(text):
+    return blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def row_key_builder(columns):
+    """
+    Fungsi row -> kunci baris (hex) untuk urutan kolom columns. Satu builder
+    dipakai untuk satu upload (baris diberikan sesuai urutan file).
+
+    Natural key dipakai jika kolom wajibnya ada dan terisi; selain itu hash
+    isi semua kolom (diurutkan menurut nama kolom). Baris yang kuncinya
+    sudah dipakai baris lain di upload yang sama (isi berbeda dengan natural
+    key sama, atau baris kembar persis) memakai hash isi + nomor kemunculan,
+    sehingga tidak ada baris file yang hilang atau saling menimpa, dan upload
+    ulang file yang sama menghasilkan kunci yang sama.
+    """
+    natural = None
+    if all(col in columns for col in NATURAL_KEY_COLUMNS):
+        natural = [columns.index(col) for col in NATURAL_KEY_COLUMNS + NATURAL_KEY_EXTRA_COLUMNS if col in columns]
+    order = sorted(range(len(columns)), key=lambda i: columns[i])
+    integer = [infer_column_type(columns[i]) == "INTEGER" for i in order]
+    header = "\x1f".join(columns[i] for i in order)
+    required = len(NATURAL_KEY_COLUMNS)
+    # 64 bit pertama setiap kunci yang sudah dipakai (hemat memori)
+    used = set()
+
+    def take(key):
+        short = int(key[:16], 16)
+        if short in used:
+            return False
+        used.add(short)
+        return True
+
+    def build(row):
+        if natural:
+            # Angka dinormalisasi ("251597.0" == "00251597") agar kunci tidak
+            # berubah jika format kolom di file berubah
+            parts = [_key_text(row[i], integer=True).strip().upper() for i in natural]
+            if all(parts[:required]):
+                key = _digest("\x1e".join(["nk"] + parts))
+                if take(key):
+                    return key
+
+        values = [_key_text(row[i], is_int) for i, is_int in zip(order, integer)]
+        content = _digest("\x1e".join([header] + values))
+        key = content
+        occurrence = 1
+        while not take(key):
+            occurrence += 1
+            key = _digest(f"{content}\x1e{occurrence}")
+        return key
+
+    return build
+
+
+def ensure_row_key(conn):
+    """
+    Pastikan kolom kunci + unique index ada. Tabel lama (belum ada kunci,
+    atau kunci dari KEY_VERSION sebelumnya) dihitung ulang kuncinya sekali,
+    urut id, dengan aturan yang sama seperti upload.
+    """
+    cursor = conn.cursor()
+    existing = _table_columns(cursor)
+    if not existing:
+        return
+
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if KEY_COLUMN not in existing or version < KEY_VERSION:
+        cursor.execute("BEGIN")
+        try:
+            if KEY_COLUMN not in existing:
+                cursor.execute(f"ALTER TABLE mapping ADD COLUMN {KEY_COLUMN} TEXT")
+            cursor.execute(f"DROP INDEX IF EXISTS {KEY_INDEX}")
+
+            columns = data_columns(cursor)
+            build = row_key_builder(columns)
+            cursor.execute(f"SELECT id, {', '.join(columns)} FROM mapping ORDER BY id")
+            updates = [(build(row[1:]), row[0]) for row in cursor.fetchall()]
+
+            # Isi FTS tidak berubah; trigger update FTS tidak perlu jalan
+            cursor.execute("DROP TRIGGER IF EXISTS mapping_fts_au")
+            cursor.executemany(f"UPDATE mapping SET {KEY_COLUMN} = ? WHERE id = ?", updates)
+            cursor.execute(f"PRAGMA user_version = {KEY_VERSION}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        create_fts(conn)
+
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {KEY_INDEX} ON mapping ({KEY_COLUMN})")
+    conn.commit()
+
+
+def _migrate_table(conn, existing):
+    """Bangun ulang tabel lama (tipe kolom berbeda) dengan tipe hasil inferensi"""
+    columns = [col for col in existing if col != "id"]
+    cols = ", ".join([f"{col} {infer_column_type(col)}" for col in columns])
+    names = ", ".join(["id"] + columns)
+    selects = ", ".join(
+        ["id"] + [f"UPPER(TRIM({col}))" if col in CATEGORICAL_COLUMNS else col for col in columns]
+    )
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute(f"""
+            CREATE TABLE mapping_baru (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {cols}
+            )
+        """)
+        # Afinitas kolom mengubah "43.0" -> 43 saat disalin
+        cursor.execute(f"INSERT INTO mapping_baru ({names}) SELECT {selects} FROM mapping")
+        cursor.execute("DROP TABLE mapping")
+        cursor.execute("ALTER TABLE mapping_baru RENAME TO mapping")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def create_indexes(conn=None):
+    """Buat index sekunder untuk kolom yang ada di tabel mapping"""
+    conn = conn or get_connection()
+    cursor = conn.cursor()
+    existing = _table_columns(cursor)
+
+    for name in OBSOLETE_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, (required, expr) in INDEXES.items():
+        if all(col in existing for col in required):
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON mapping ({expr})")
+    conn.commit()
+
+
+def fts_available(conn=None):
+    """True jika SQLite yang dipakai mendukung FTS5"""
+    conn = conn or get_connection()
+    options = {row[0] for row in conn.execute("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def _fts_statements(columns):
+    """Statement trigger FTS: (hapus nilai lama, masukkan nilai baru)"""
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {FTS_TABLE} (rowid, {names}) VALUES (new.id, {new_values});"
+    return delete_old, insert_new
+
+
+def _create_fts_triggers(cursor, columns):
+    """Trigger insert/update/delete yang menjaga tabel FTS tetap sinkron"""
+    delete_old, insert_new = _fts_statements(columns)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS mapping_fts_ai AFTER INSERT ON mapping BEGIN
+            {insert_new}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS mapping_fts_ad AFTER DELETE ON mapping BEGIN
+            {delete_old}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS mapping_fts_au AFTER UPDATE ON mapping BEGIN
+            {delete_old}
+            {insert_new}
+        END
+    """)
+
+
+def create_fts(conn=None, rebuild=False):
+    """
+    Pastikan tabel FTS5 dan trigger sinkronisasinya ada.
+
+    Tabel FTS memakai external content (content='mapping') sehingga teks
+    tidak disimpan dua kali; trigger insert/update/delete menjaga index tetap
+    sinkron. Index dibangun ulang jika kolom mapping berubah atau rebuild=True.
+    Mengembalikan False jika FTS5 tidak tersedia.
+    """
+    conn = conn or get_connection()
+    if not fts_available(conn):
+        return False
+
+    cursor = conn.cursor()
+    columns = data_columns(cursor)
+    if not columns:
+        return False
+
+    cursor.execute(f"PRAGMA table_info({FTS_TABLE})")
+    fts_columns = [row[1] for row in cursor.fetchall()]
+
+    if fts_columns != columns:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        for trigger in FTS_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+                {", ".join(columns)},
+                content='mapping', content_rowid='id',
+                tokenize="{FTS_TOKENIZE}", prefix='2 3'
+            )
+        """)
+        rebuild = True
+
+    _create_fts_triggers(cursor, columns)
+
+    if rebuild:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+    conn.commit()
+    return True
+
+
+def fts_ready(cursor):
+    """
+    True jika tabel FTS sudah ada dan kolomnya sama dengan mapping. Hanya
+    membaca; tabel FTS dibuat / dibangun ulang di jalur tulis (create_fts).
+    """
+    columns = data_columns(cursor)
+    if not columns:
+        return False
+    cursor.execute(f"PRAGMA table_info({FTS_TABLE})")
+    return [row[1] for row in cursor.fetchall()] == columns
+
+
+def fts_query(keyword):
+    """
+    Ubah kata kunci bebas menjadi query FTS5: setiap kata dicari sebagai
+    awalan (prefix) dan semua kata harus ada. None jika tidak ada kata.
+    """
+    tokens = re.findall(r"[\w.\-/]+", keyword.lower())
+    if not tokens:
+        return None
+    return " ".join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+
+@instrument("db.search_mapping", rows_out=len)
+def search_mapping(keyword, limit, conn=None):
+    """
+    Cari baris mapping (id + semua kolom) yang cocok dengan kata kunci.
+
+    Memakai FTS5 (hasil diurutkan menurut relevansi bm25, maksimal limit
+    baris); jika index FTS belum ada (atau FTS5 tidak tersedia), kembali ke
+    LIKE per kolom. Tidak pernah membuat index: pemanggilnya thread UI.
+    """
+    conn = conn or get_connection()
+    cursor = conn.cursor()
+
+    if fts_ready(cursor):
+        query = fts_query(keyword)
+        if query is None:
+            return []
+        columns = ", ".join(f"mapping.{col}" for col in data_columns(cursor))
+        cursor.execute(f"""
+            SELECT mapping.id, {columns}
+            FROM {FTS_TABLE}
+            JOIN mapping ON mapping.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (query, limit))
+        return cursor.fetchall()
+
+    columns = ["id"] + data_columns(cursor)
+    query_parts = [f"{col} LIKE ?" for col in columns]
+    params = [f"%{keyword}%"] * len(columns)
+    cursor.execute(
+        f"SELECT {', '.join(columns)} FROM mapping WHERE {' OR '.join(query_parts)} LIMIT ?",
+        params + [limit]
+    )
+    return cursor.fetchall()
+
+
+@instrument("db.create_table_dynamic")
 def create_table_dynamic(columns):
     """
     columns = ["NO", "NO RM", "NAMA PASIEN", ...]
     membuat tabel mapping otomatis berdasarkan header Excel
+
+    Tipe kolom diinferensi dari nama (usia_* INTEGER, lainnya termasuk
+    tanggal_* TEXT). Tabel lama dengan tipe berbeda dimigrasi sekali.
     """
     conn = get_connection()
     cursor = conn.cursor()
 
-    cols = ", ".join([f"{col} TEXT" for col in columns])
-
-    sql = f"""
-        CREATE TABLE IF NOT EXISTS mapping (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            {cols}
+    existing = _table_columns(cursor)
+    if existing:
+        outdated = any(
+            existing[col] != infer_column_type(col)
+            for col in existing if col != "id"
         )
-    """
-    cursor.execute(sql)
-    conn.commit()
-    conn.close()
+        if outdated:
+            _migrate_table(conn, existing)
+            # DROP TABLE ikut membuang trigger FTS; isi index perlu dibangun ulang
+            create_fts(conn, rebuild=True)
+    else:
+        cols = ", ".join([f"{col} {infer_column_type(col)}" for col in columns])
+
+        sql = f"""
+            CREATE TABLE IF NOT EXISTS mapping (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {cols},
+                {KEY_COLUMN} TEXT
+            )
+        """
+        cursor.execute(sql)
+        conn.commit()
+
+    ensure_row_key(conn)
+    create_indexes(conn)
+    create_fts(conn)
 
 def insert_dynamic(row_dict):
     conn = get_connection()
@@ -40,4 +462,101 @@ def insert_dynamic(row_dict):
 
     cursor.execute(sql, values)
     conn.commit()
-    conn.close()
+
+@instrument("db.insert_bulk", rows_out=lambda result: result["total"])
+def insert_bulk(columns, rows, batch_size=5000, progress=None):
+    """
+    Upsert banyak baris sekaligus dengan satu koneksi dan satu transaksi.
+
+    rows adalah iterable of tuple (urutan sesuai columns). Setiap baris
+    diberi kunci (row_key_builder); baris dengan kunci yang sudah ada hanya
+    ditulis ulang jika isinya berubah, sehingga upload ulang file yang sama
+    tidak menggandakan data. Baris dikirim ke executemany per batch_size;
+    progress(jumlah_baris_diproses) dipanggil setelah tiap batch. Jika gagal
+    di tengah jalan, semua batch di-rollback.
+
+    Mengembalikan dict: total, inserted, updated, unchanged.
+    """
+    keys = ", ".join(list(columns) + [KEY_COLUMN])
+    values_qm = ", ".join(["?"] * (len(columns) + 1))
+    updates = ", ".join(f"{col} = excluded.{col}" for col in columns)
+    changed = " OR ".join(f"mapping.{col} IS NOT excluded.{col}" for col in columns)
+    sql = (
+        f"INSERT INTO mapping ({keys}) VALUES ({values_qm}) "
+        f"ON CONFLICT ({KEY_COLUMN}) DO UPDATE SET {updates} WHERE {changed}"
+    )
+    build_key = row_key_builder(list(columns))
+
+    conn = get_connection()
+    fts = create_fts(conn)
+    total = 0
+    written = 0
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        start_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM mapping").fetchone()[0]
+
+        # Trigger FTS per baris jauh lebih lambat; index FTS untuk baris
+        # baru diisi sekali di akhir dengan INSERT ... SELECT. Baris lama
+        # yang berubah tetap disinkronkan lewat trigger sementara.
+        if fts:
+            fts_columns = data_columns(cursor)
+            delete_old, insert_new = _fts_statements(fts_columns)
+            cursor.execute("DROP TRIGGER IF EXISTS mapping_fts_ai")
+            cursor.execute("DROP TRIGGER IF EXISTS mapping_fts_au")
+            cursor.execute(f"""
+                CREATE TEMP TRIGGER mapping_fts_bulk_au AFTER UPDATE ON main.mapping
+                WHEN old.id <= {int(start_id)}
+                BEGIN
+                    {delete_old}
+                    {insert_new}
+                END
+            """)
+
+        # Kunci -> baris dalam satu batch (kunci selalu unik dalam satu upload,
+        # lihat row_key_builder)
+        batch = {}
+        count = 0
+        for row in rows:
+            batch[build_key(row)] = tuple(row)
+            count += 1
+            if count >= batch_size:
+                cursor.executemany(sql, [row + (key,) for key, row in batch.items()])
+                written += cursor.rowcount
+                total += count
+                batch = {}
+                count = 0
+                if progress:
+                    progress(total)
+
+        if count:
+            cursor.executemany(sql, [row + (key,) for key, row in batch.items()])
+            written += cursor.rowcount
+            total += count
+            if progress:
+                progress(total)
+
+        inserted = cursor.execute("SELECT COUNT(*) FROM mapping WHERE id > ?", (start_id,)).fetchone()[0]
+
+        if fts:
+            with stage("db.insert_bulk: index FTS", rows_in=inserted):
+                cursor.execute("DROP TRIGGER temp.mapping_fts_bulk_au")
+                fts_names = ", ".join(fts_columns)
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, {fts_names}) "
+                    f"SELECT id, {fts_names} FROM mapping WHERE id > ?",
+                    (start_id,)
+                )
+                _create_fts_triggers(cursor, fts_columns)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        "total": total,
+        "inserted": inserted,
+        "updated": written - inserted,
+        "unchanged": total - written,
+    }
@@ -0,0 +1,260 @@
+"""
+Instrumentasi per tahap (upload, baca database, hitung, tampilan, export)
+untuk mencari bagian proses yang lambat.
+
+    with stage("SIRS: hitung", rows_in=len(df)) as st:
+        hasil = hitung(...)
+        st.rows_out = len(hasil)
+
+Setiap tahap mencatat waktu, waktu CPU thread-nya, jumlah baris masuk /
+keluar, puncak memori (tracemalloc, jika diaktifkan), dan opsional profil
+cProfile. Tahap boleh bersarang; catatan disimpan di memori (MAX_RECORDS
+terakhir), ditampilkan panel Diagnostics di layar, dan bisa diexport ke
+JSON.
+
+Pengukuran memori mati secara default: tracemalloc memperlambat proses
+pandas beberapa kali lipat. Jika diaktifkan, puncak memori diukur untuk
+seluruh proses selama tahap berjalan (termasuk thread lain yang sedang
+jalan). Waktu CPU hanya untuk thread pemanggil;
+proses worker (parallel.py) tidak ikut terhitung.
+"""
+import cProfile
+import functools
+import io
+import itertools
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Jumlah catatan tahap yang disimpan (yang lama dibuang)
+MAX_RECORDS = 500
+# Jumlah baris fungsi di ringkasan cProfile per tahap
+PROFILE_LINES = 30
+
+MB = 1024 * 1024
+
+_records = deque(maxlen=MAX_RECORDS)
+_lock = threading.Lock()
+_local = threading.local()
+_ids = itertools.count(1)
+
+# Catatan yang sedang mengukur memori (lihat _fold_peak)
+_active_memory = []
+_settings = {'memory': False, 'profile': False, 'started_tracemalloc': False}
+# Naik setiap ada catatan baru / dibersihkan (untuk refresh tampilan)
+_version = 0
+
+
+class StageRecord:
+    """Hasil pengukuran satu tahap"""
+
+    def __init__(self, name, rows_in=None, depth=0):
+        self.id = next(_ids)
+        self.name = name
+        self.thread = threading.current_thread().name
+        self.depth = depth
+        self.started = time.time()
+        self.wall = None
+        self.cpu = None
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.peak_bytes = None
+        self.error = None
+        self.profile = None
+        self._memory_base = 0
+
+    @property
+    def peak_mb(self):
+        return None if self.peak_bytes is None else self.peak_bytes / MB
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'thread': self.thread,
+            'depth': self.depth,
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='milliseconds'),
+            'wall_seconds': self.wall,
+            'cpu_seconds': self.cpu,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_memory_mb': None if self.peak_bytes is None else round(self.peak_mb, 3),
+            'error': self.error,
+            'profile': self.profile,
+        }
+
+
+# ============================ PENGATURAN ============================
+
+def memory_tracing():
+    return _settings['memory']
+
+
+def set_memory_tracing(enabled):
+    """Aktif / nonaktifkan pengukuran puncak memori (tracemalloc)"""
+    with _lock:
+        _settings['memory'] = bool(enabled)
+        _stop_tracemalloc()
+
+
+def _stop_tracemalloc():
+    """Hentikan tracemalloc yang kita mulai jika tidak dipakai lagi (dengan _lock)"""
+    if not _settings['memory'] and _settings['started_tracemalloc'] and not _active_memory:
+        tracemalloc.stop()
+        _settings['started_tracemalloc'] = False
+
+
+def profiling():
+    return _settings['profile']
+
+
+def set_profiling(enabled):
+    """Aktif / nonaktifkan profil cProfile untuk tahap berikutnya"""
+    _settings['profile'] = bool(enabled)
+
+
+# ============================ PENGUKURAN ============================
+
+def _fold_peak():
+    """
+    Simpan puncak tracemalloc saat ini ke semua catatan yang masih berjalan.
+    Dipanggil (dengan _lock) sebelum reset_peak, agar tahap yang bersarang /
+    bersamaan tidak kehilangan puncak milik tahap lain.
+    """
+    _, peak = tracemalloc.get_traced_memory()
+    for record in _active_memory:
+        record.peak_bytes = max(record.peak_bytes, peak - record._memory_base)
+
+
+def _start_memory(record):
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _settings['started_tracemalloc'] = True
+        _fold_peak()
+        tracemalloc.reset_peak()
+        record._memory_base = tracemalloc.get_traced_memory()[0]
+        record.peak_bytes = 0
+        _active_memory.append(record)
+
+
+def _stop_memory(record):
+    with _lock:
+        _fold_peak()
+        _active_memory.remove(record)
+        _stop_tracemalloc()
+
+
+def _start_profile():
+    """cProfile untuk thread ini; None jika sudah ada profil yang aktif"""
+    if getattr(_local, 'profiling', False):
+        # Tahap bersarang ikut masuk profil tahap luarnya
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+: hanya satu profiler aktif di seluruh proses
+        return None
+    _local.profiling = True
+    return profiler
+
+
+def _profile_text(profiler):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return stream.getvalue()
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Ukur satu tahap. Yield StageRecord; isi record.rows_out di dalam blok.
+    Exception tetap diteruskan (dicatat di record.error).
+    """
+    global _version
+
+    depth = getattr(_local, 'depth', 0)
+    record = StageRecord(name, rows_in, depth)
+    _local.depth = depth + 1
+
+    memory = _settings['memory']
+    if memory:
+        _start_memory(record)
+    profiler = _start_profile() if _settings['profile'] else None
+
+    started = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield record
+    except BaseException as e:
+        record.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record.wall = round(time.perf_counter() - started, 6)
+        record.cpu = round(time.thread_time() - cpu, 6)
+        if profiler is not None:
+            profiler.disable()
+            _local.profiling = False
+            record.profile = _profile_text(profiler)
+        if memory:
+            _stop_memory(record)
+        _local.depth = depth
+
+        with _lock:
+            _records.append(record)
+            _version += 1
+
+
+def instrument(name, rows_in=None, rows_out=None):
+    """
+    Dekorator: jalankan fungsi sebagai satu tahap. rows_in(*args, **kwargs)
+    dan rows_out(hasil) opsional untuk mengisi jumlah baris.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, rows_in(*args, **kwargs) if rows_in else None) as record:
+                result = func(*args, **kwargs)
+                if rows_out:
+                    record.rows_out = rows_out(result)
+                return result
+        return wrapper
+    return decorator
+
+
+# ============================ HASIL ============================
+
+def records():
+    """Catatan tahap yang sudah selesai (urut waktu selesai)"""
+    with _lock:
+        return list(_records)
+
+
+def version():
+    return _version
+
+
+def clear():
+    global _version
+    with _lock:
+        _records.clear()
+        _version += 1
+
+
+def export_json(filepath):
+    """Tulis semua catatan ke file JSON; mengembalikan jumlah tahap"""
+    items = records()
+    data = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'memory_tracing': memory_tracing(),
+        'profiling': profiling(),
+        'stages': [record.to_dict() for record in items],
+    }
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return len(items)
@@ -0,0 +1,166 @@
+"""
+Cache hasil parse file Excel template (SIRS / PUSKESAD).
+
+DataFrame hasil parse disimpan di folder cache milik user (di Windows
+%LOCALAPPDATA%\\rspad\\excel_cache), dengan nama file dari hash isi workbook
+(content-addressed). Cache tidak pernah ditulis di sebelah workbook: file
+pickle dari folder bersama (share) bisa menjalankan kode saat dibaca, jadi
+hanya file yang ditulis user itu sendiri yang dibaca. Hash tiap workbook
+dicatat bersama path, ukuran + mtime-nya, sehingga workbook yang tidak
+berubah langsung dibaca dari cache tanpa di-hash ulang. Format Parquet
+dipakai jika pyarrow tersedia (dan DataFrame bisa disimpan sebagai
+Parquet); selain itu pickle pandas.
+
+Cache hanya mempercepat: jika folder cache tidak bisa ditulis atau file
+cache rusak, workbook dibaca ulang seperti biasa.
+"""
+import json
+import os
+import threading
+from hashlib import blake2b
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+CACHE_APP_DIR = os.path.join("rspad", "excel_cache")
+INDEX_FILENAME = "index.json"
+# Naikkan jika format DataFrame hasil reader berubah
+CACHE_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+
+_lock = threading.Lock()
+
+
+def file_digest(filepath):
+    """Hash isi file (hex)"""
+    digest = blake2b(digest_size=20)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_dir():
+    """Folder cache milik user yang sedang login"""
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(base, CACHE_APP_DIR)
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILENAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    path = os.path.join(cache_dir, INDEX_FILENAME)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, path)
+
+
+def _entry_paths(cache_dir, digest, kind):
+    base = os.path.join(cache_dir, f"{digest}-{kind}-v{CACHE_VERSION}")
+    return base + ".parquet", base + ".pkl"
+
+
+def _read_entry(cache_dir, digest, kind):
+    parquet_path, pickle_path = _entry_paths(cache_dir, digest, kind)
+    try:
+        if HAS_PYARROW and os.path.exists(parquet_path):
+            return pd.read_parquet(parquet_path)
+        if os.path.exists(pickle_path):
+            return pd.read_pickle(pickle_path)
+    except Exception:
+        # File cache rusak / tidak lengkap: parse ulang
+        pass
+    return None
+
+
+def _write_entry(cache_dir, digest, kind, df):
+    parquet_path, pickle_path = _entry_paths(cache_dir, digest, kind)
+    if HAS_PYARROW:
+        try:
+            df.to_parquet(parquet_path + ".tmp")
+            os.replace(parquet_path + ".tmp", parquet_path)
+            return
+        except Exception:
+            # Kolom campuran / nama kolom bukan string: pakai pickle
+            if os.path.exists(parquet_path + ".tmp"):
+                os.remove(parquet_path + ".tmp")
+
+    df.to_pickle(pickle_path + ".tmp")
+    os.replace(pickle_path + ".tmp", pickle_path)
+
+
+def _remove_entries(cache_dir, digest):
+    """Hapus cache semua jenis baca untuk satu isi workbook"""
+    for entry in os.listdir(cache_dir):
+        if entry.startswith(digest + "-"):
+            os.remove(os.path.join(cache_dir, entry))
+
+
+def read_cached(filepath, reader, kind):
+    """
+    Baca workbook lewat cache. reader(filepath) -> DataFrame dipanggil hanya
+    jika belum ada cache untuk isi workbook ini; kind membedakan cara baca
+    (misal "sirs" / "puskesad") untuk workbook yang sama.
+    """
+    folder = cache_dir()
+    name = os.path.normcase(os.path.abspath(filepath))
+    stat = os.stat(filepath)
+
+    with _lock:
+        index = _load_index(folder)
+    known = index.get(name, {})
+    fresh = known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns
+    digest = known["digest"] if fresh else file_digest(filepath)
+
+    df = _read_entry(folder, digest, kind)
+    if df is not None and fresh:
+        return df
+
+    if df is None:
+        df = reader(filepath)
+
+    try:
+        with _lock:
+            os.makedirs(folder, mode=0o700, exist_ok=True)
+            _write_entry(folder, digest, kind, df)
+
+            index = _load_index(folder)
+            old = index.get(name, {}).get("digest")
+            index[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+            _save_index(folder, index)
+
+            # Buang cache versi lama workbook ini jika tidak dipakai workbook lain
+            if old and old != digest and all(entry.get("digest") != old for entry in index.values()):
+                _remove_entries(folder, old)
+    except OSError:
+        # Folder cache tidak bisa ditulis: tanpa cache
+        pass
+
+    return df
+
+
+def clear_cache():
+    """Hapus seluruh cache workbook milik user"""
+    folder = cache_dir()
+    with _lock:
+        if not os.path.isdir(folder):
+            return
+        for entry in os.listdir(folder):
+            os.remove(os.path.join(folder, entry))
+        os.rmdir(folder)
@@ -0,0 +1,158 @@
+"""
+Penulisan hasil SIRS / PUSKESAD ke Excel, dipakai bersama oleh kedua layar
+dan CLI.
+
+Baris ditulis bertahap per blok (CHUNK_ROWS) langsung dari kolom DataFrame,
+tanpa menyalin seluruh tabel: nilai inf / NaN dikosongkan per blok. Dengan
+xlsxwriter dipakai mode constant_memory; tanpa xlsxwriter dipakai workbook
+write-only openpyxl. Lebar kolom dihitung dari sampel baris.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_integer_dtype
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+# Jumlah baris per blok tulis (juga interval progress)
+CHUNK_ROWS = 5000
+# Jumlah baris sampel untuk menghitung lebar kolom
+WIDTH_SAMPLE_ROWS = 2000
+MAX_COLUMN_WIDTH = 50
+
+HEADER_STYLE = {'bold': True, 'bg_color': '#D3D3D3', 'border': 1}
+DATE_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+
+def column_widths(df, sample_rows=WIDTH_SAMPLE_ROWS, max_width=MAX_COLUMN_WIDTH):
+    """Lebar tiap kolom dari panjang teks terpanjang di sampel baris + header"""
+    if len(df) > sample_rows:
+        # Sampel tersebar merata (termasuk baris pertama & terakhir)
+        positions = np.linspace(0, len(df) - 1, sample_rows).astype('int64')
+        sample = df.iloc[positions]
+    else:
+        sample = df
+
+    widths = []
+    for idx, col in enumerate(df.columns):
+        lengths = sample.iloc[:, idx].astype(str).str.len().fillna(0)
+        longest = max(int(lengths.max()) if len(lengths) else 0, len(str(col)))
+        widths.append(min(longest + 2, max_width))
+    return widths
+
+
+def _cell_values(series):
+    """Nilai satu kolom sebagai list Python; inf / NaN / NaT menjadi None"""
+    if is_integer_dtype(series.dtype) and not series.hasnans:
+        return series.to_numpy(dtype='int64').tolist()
+    if is_float_dtype(series.dtype) and not is_bool_dtype(series.dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        missing = ~np.isfinite(values)
+        if not missing.any():
+            return values.tolist()
+        result = values.astype(object)
+        result[missing] = None
+        return result.tolist()
+
+    values = series.to_numpy(dtype=object)
+    missing = pd.isna(values) | series.isin([np.inf, -np.inf]).to_numpy()
+    if missing.any():
+        values = values.copy()
+        values[missing] = None
+    return values.tolist()
+
+
+def iter_rows(df, progress=None, chunk_rows=CHUNK_ROWS):
+    """Baris data (list nilai) per blok; progress(value, text) per blok"""
+    total = len(df)
+    for start in range(0, total, chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        columns = [_cell_values(chunk.iloc[:, idx]) for idx in range(chunk.shape[1])]
+        yield from (list(row) for row in zip(*columns))
+
+        if progress:
+            done = min(start + chunk_rows, total)
+            progress(done / total, f"Menulis baris {done}/{total}...")
+
+
+def _write_xlsxwriter(df, filepath, sheet_name, widths, progress):
+    workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True, 'default_date_format': DATE_FORMAT})
+    try:
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format(HEADER_STYLE)
+
+        # Mode constant_memory: lebar kolom diatur sebelum baris ditulis
+        for idx, width in enumerate(widths):
+            worksheet.set_column(idx, idx, width)
+        worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+
+        for row_no, values in enumerate(iter_rows(df, progress), start=1):
+            worksheet.write_row(row_no, 0, values)
+    finally:
+        workbook.close()
+
+
+def _write_openpyxl(df, filepath, sheet_name, widths, progress):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Border, Font, PatternFill, Side
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+
+    for idx, width in enumerate(widths, start=1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = width
+
+    side = Side(style='thin')
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(worksheet, value=str(col))
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill('solid', fgColor=HEADER_STYLE['bg_color'][1:])
+        cell.border = Border(left=side, right=side, top=side, bottom=side)
+        header.append(cell)
+    worksheet.append(header)
+
+    try:
+        for values in iter_rows(df, progress):
+            worksheet.append(values)
+    except Exception:
+        # Tutup stream sheet (file sementara openpyxl) sebelum diteruskan
+        worksheet.close()
+        raise
+    workbook.save(filepath)
+
+
+def write_excel(df, filepath, sheet_name, progress=None):
+    """
+    Simpan DataFrame ke satu sheet Excel (tanpa index). inf dan NaN ditulis
+    sebagai sel kosong; DataFrame tidak diubah. progress(value, text)
+    dipanggil per blok; exception dari progress menghentikan penulisan.
+
+    File ditulis ke file sementara di folder yang sama lalu menggantikan
+    filepath hanya jika berhasil, sehingga file lama tetap utuh saat
+    penulisan gagal / dibatalkan.
+    """
+    widths = column_widths(df)
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if HAS_XLSXWRITER:
+            _write_xlsxwriter(df, tmp_path, sheet_name, widths, progress)
+        else:
+            _write_openpyxl(df, tmp_path, sheet_name, widths, progress)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        # Gagal / dibatalkan di tengah jalan: buang file sementara saja
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return filepath
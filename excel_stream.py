@@ -0,0 +1,237 @@
+"""
+Pembaca Excel/CSV bertahap (streaming) untuk upload mapping.
+
+File dibaca baris demi baris (openpyxl read_only) dan dikirim dalam batch
+berukuran tetap, sehingga pemakaian memori tidak bergantung pada ukuran file.
+Format teks setiap sel dibuat sama dengan pd.read_excel + fix_value.
+"""
+import csv
+import os
+from datetime import datetime
+
+import pandas as pd
+
+# Nilai yang dianggap kosong oleh pd.read_excel (default na_values pandas)
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+}
+
+# Sel error Excel (read_only + values_only mengembalikannya sebagai string)
+EXCEL_ERRORS = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'}
+
+
+def _convert_cell(value):
+    """Konversi nilai sel seperti pandas: angka bulat -> int, kosong -> None"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        as_int = int(value) if value == value and abs(value) != float('inf') else None
+        if as_int is not None and as_int == value:
+            return as_int
+        return float(value)
+    if isinstance(value, str) and (value in NA_STRINGS or value in EXCEL_ERRORS):
+        return None
+    return value
+
+
+def _to_number(value):
+    """Angka dari sel/string numerik, atau None jika bukan angka"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        if '.' in value or 'e' in value.lower() or number != int(number):
+            return number
+        return int(number)
+    return None
+
+
+class ColumnProfile:
+    """Ringkasan tipe satu kolom, untuk menentukan format teks seperti pandas"""
+
+    def __init__(self):
+        self.has_na = False
+        self.all_bool = True
+        self.all_datetime = True
+        self.all_numeric = True
+        self.all_int = True
+
+    def add(self, value):
+        if value is None:
+            self.has_na = True
+            return
+        if not isinstance(value, bool):
+            self.all_bool = False
+        if not isinstance(value, datetime):
+            self.all_datetime = False
+        if self.all_numeric:
+            number = _to_number(value)
+            if number is None:
+                self.all_numeric = False
+            elif not isinstance(number, int):
+                self.all_int = False
+
+    def formatter(self):
+        """Fungsi sel -> teks sesuai dtype yang akan dipilih pandas"""
+        if self.all_bool or self.all_datetime or self.all_numeric:
+            if self.all_bool:
+                return lambda v: "" if v is None else str(v)
+            if self.all_datetime:
+                return lambda v: "" if v is None else v.strftime("%Y-%m-%d")
+            if self.all_int and not self.has_na:
+                return lambda v: str(int(_to_number(v)))
+            return lambda v: "" if v is None else str(float(_to_number(v)))
+        return lambda v: "" if v is None else str(v)
+
+
+def _mangle_headers(headers):
+    """Nama kolom seperti pandas: kosong -> 'Unnamed: i', duplikat -> 'X.1'"""
+    result = []
+    counts = {}
+    for i, col in enumerate(headers):
+        name = f"Unnamed: {i}" if col is None else col
+        if name in counts:
+            counts[name] += 1
+            new_name = f"{name}.{counts[name]}"
+            while new_name in counts:
+                counts[name] += 1
+                new_name = f"{name}.{counts[name]}"
+            counts[new_name] = 0
+            name = new_name
+        else:
+            counts[name] = 0
+        result.append(name)
+    return result
+
+
+def _iter_xlsx_rows(file_path):
+    """Iterasi baris sheet pertama (nilai sudah dikonversi, ekor kosong dibuang)"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        ws.reset_dimensions()
+        for row in ws.iter_rows(values_only=True):
+            converted = [_convert_cell(v) for v in row]
+            while converted and converted[-1] is None:
+                converted.pop()
+            yield converted
+    finally:
+        wb.close()
+
+
+class ExcelStream:
+    """
+    Sumber baris mapping dari file .xlsx secara bertahap.
+
+    Pembacaan pertama (profil) menghitung jumlah baris, lebar tabel, dan
+    tipe setiap kolom; pembacaan kedua menghasilkan batch tuple string.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.columns = []
+        self.total_rows = 0
+        self._formatters = []
+        self._profile()
+
+    def _profile(self):
+        header = None
+        profiles = []
+        width = 0
+        n_rows = 0
+        last_with_data = 0
+
+        for row in _iter_xlsx_rows(self.file_path):
+            if header is None:
+                header = row
+                width = len(row)
+                continue
+
+            n_rows += 1
+            if not row:
+                # Baris kosong baru dihitung jika ada baris berisi sesudahnya
+                # (baris kosong di akhir file dibuang, sama seperti pandas)
+                continue
+
+            if last_with_data < n_rows - 1:
+                for profile in profiles:
+                    profile.has_na = True
+            last_with_data = n_rows
+
+            width = max(width, len(row))
+            while len(profiles) < width:
+                # Kolom baru di tengah jalan: baris sebelumnya kosong
+                profile = ColumnProfile()
+                profile.has_na = n_rows > 1
+                profiles.append(profile)
+            for pos, profile in enumerate(profiles):
+                profile.add(row[pos] if pos < len(row) else None)
+
+        header = header or []
+        header = header + [None] * (width - len(header))
+        while len(profiles) < width:
+            profiles.append(ColumnProfile())
+
+        self.total_rows = last_with_data
+        self.columns = _mangle_headers([None if h is None else str(h) for h in header])
+        self._formatters = [p.formatter() for p in profiles]
+
+    def iter_batches(self, batch_size):
+        """Hasilkan list tuple string, masing-masing maksimal batch_size baris"""
+        width = len(self.columns)
+        formatters = self._formatters
+        batch = []
+        rows = _iter_xlsx_rows(self.file_path)
+        next(rows, None)  # lewati header
+
+        try:
+            for n, row in enumerate(rows, start=1):
+                if n > self.total_rows:
+                    break
+                row = row + [None] * (width - len(row))
+                batch.append(tuple(fmt(v) for fmt, v in zip(formatters, row)))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        finally:
+            rows.close()
+
+        if batch:
+            yield batch
+
+
+class CsvStream:
+    """Sumber baris mapping dari file .csv (jalur cepat, semua nilai teks)"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.columns = list(pd.read_csv(file_path, nrows=0).columns)
+
+        # Hitung baris data sekali untuk progress (csv.reader, tanpa DataFrame)
+        with open(file_path, newline='', encoding='utf-8') as f:
+            self.total_rows = max(sum(1 for row in csv.reader(f) if row) - 1, 0)
+
+    def iter_batches(self, batch_size):
+        for chunk in pd.read_csv(self.file_path, dtype=str, chunksize=batch_size):
+            yield list(chunk.fillna("").itertuples(index=False, name=None))
+
+
+def open_stream(file_path):
+    """Pilih pembaca bertahap sesuai ekstensi; None jika tidak didukung (.xls)"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return ExcelStream(file_path)
+    if ext == '.csv':
+        return CsvStream(file_path)
+    return None
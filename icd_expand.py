@@ -0,0 +1,239 @@
+"""
+Ekspansi kode ICD PUSKESAD yang tidak standar menjadi kode ICD standar.
+
+Pola regex dikompilasi sekali dan hasil ekspansi di-cache per spesifikasi
+(setelah strip + upper), karena banyak baris PUSKESAD memakai spesifikasi
+range yang sama.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Prefix huruf di awal string ("A 06.0-.3" -> "A")
+MAIN_PREFIX = re.compile(r'^([A-Z])\s+')
+RANGE_PREFIX = re.compile(r'([A-Z])\s*')
+HAS_LETTER = re.compile(r'[A-Z]')
+WHITESPACE = re.compile(r'\s+')
+LETTER_NUMBER = re.compile(r'([A-Z])(\d+)')
+
+# Pola range (setelah prefix huruf dibuang)
+SUB_ONLY = re.compile(r'^\.(\d+)-\.(\d+)$')                # ".5-.9"
+SAME_MAIN = re.compile(r'^(\d+)\.(\d+)-\.(\d+)$')          # "06.0-.3"
+CROSS_MAIN = re.compile(r'^(\d+)\.(\d+)-(\d+)\.(\d+)$')    # "15.1-16.2"
+THREE_LEVEL = re.compile(r'^(\d+)\.(\d+)\.(\d+)-\.(\d+)$')  # "18.1.3-.8"
+MAIN_ONLY = re.compile(r'^(\d+)-(\d+)$')                   # "04-05"
+
+CACHE_SIZE = 4096
+
+
+def _add_run(runs, stem, start, end):
+    """Tambahkan run kode stem+start .. stem+end (run kosong dilewati)"""
+    if start <= end:
+        runs.append((stem, start, end))
+
+
+def _last_code(runs):
+    """Kode terakhir hasil expand sejauh ini (None jika belum ada)"""
+    if not runs:
+        return None
+    stem, start, end = runs[-1]
+    return stem if start is None else f"{stem}{end}"
+
+
+def _expand_single(code_str, runs, main_prefix=None):
+    """Expand single code (tanpa range)"""
+    clean = WHITESPACE.sub('', code_str)
+
+    # Jika tidak ada huruf tapi ada main_prefix, tambahkan prefix
+    if not HAS_LETTER.search(clean) and main_prefix:
+        clean = main_prefix + clean
+
+    if '.' not in clean:
+        # Cari pattern A00 atau A000 atau A00000
+        match = LETTER_NUMBER.match(clean)
+        if match:
+            letter = match.group(1)
+            number = int(match.group(2))
+            runs.append((f"{letter}{number:02d}.0", None, None))
+        else:
+            runs.append((clean, None, None))
+    else:
+        runs.append((clean, None, None))
+
+
+def _expand_range(range_str, runs, main_prefix=None):
+    """
+    Expand range codes dengan berbagai format:
+    - "A 04-05" -> A04.0, A04.1, ..., A04.9, A05.0
+    - "04-05" (dengan main_prefix A) -> A04.0, A04.1, ..., A04.9, A05.0
+    - "A 06.0-.3" -> A06.0, A06.1, A06.2, A06.3
+    - ".5-.9" (dengan main_prefix A dan context A06) -> A06.5, A06.6, A06.7, A06.8, A06.9
+    - "A 15.1-16.2" -> A15.1, A15.2, ..., A16.2
+    - "A 18.1.3-.8" -> A18.1.3, A18.1.4, ..., A18.1.8
+    """
+    # Cari prefix huruf di awal
+    prefix_match = RANGE_PREFIX.match(range_str)
+    if prefix_match:
+        prefix = prefix_match.group(1)
+        rest = range_str[len(prefix_match.group(0)):]
+    elif main_prefix:
+        # Gunakan main_prefix jika tidak ada prefix di range ini
+        prefix = main_prefix
+        rest = range_str
+    else:
+        runs.append((range_str, None, None))
+        return
+
+    # Spasi di dalam range diabaikan ("02.0 -.7" sama dengan "02.0-.7")
+    rest = WHITESPACE.sub('', rest)
+
+    # ".5-.9" (hanya sub-code range, butuh context dari result sebelumnya)
+    match = SUB_ONLY.match(rest)
+    if match:
+        start_sub = int(match.group(1))
+        end_sub = int(match.group(2))
+
+        # Ambil main code dari result terakhir
+        last = _last_code(runs)
+        if last is not None:
+            last_match = LETTER_NUMBER.match(last)
+            if last_match:
+                main_code = int(last_match.group(2))
+                _add_run(runs, f"{prefix}{main_code:02d}.", start_sub, end_sub)
+                return
+
+        # Fallback jika tidak ada context
+        runs.append((range_str, None, None))
+        return
+
+    # "06.0-.3" (same main, range sub)
+    match = SAME_MAIN.match(rest)
+    if match:
+        main_code = int(match.group(1))
+        start_sub = int(match.group(2))
+        end_sub = int(match.group(3))
+        _add_run(runs, f"{prefix}{main_code:02d}.", start_sub, end_sub)
+        return
+
+    # "15.1-16.2" (cross main code range)
+    match = CROSS_MAIN.match(rest)
+    if match:
+        start_main = int(match.group(1))
+        start_sub = int(match.group(2))
+        end_main = int(match.group(3))
+        end_sub = int(match.group(4))
+
+        for main in range(start_main, end_main + 1):
+            if main == start_main:
+                # Mulai dari start_sub sampai 9
+                first, last = start_sub, 9
+            elif main == end_main:
+                # Dari 0 sampai end_sub
+                first, last = 0, end_sub
+            else:
+                # Lengkap 0-9
+                first, last = 0, 9
+            _add_run(runs, f"{prefix}{main:02d}.", first, last)
+        return
+
+    # "18.1.3-.8" (three-level range)
+    match = THREE_LEVEL.match(rest)
+    if match:
+        main_code = int(match.group(1))
+        sub_code = int(match.group(2))
+        start_third = int(match.group(3))
+        end_third = int(match.group(4))
+        _add_run(runs, f"{prefix}{main_code:02d}.{sub_code}.", start_third, end_third)
+        return
+
+    # "04-05" (main code only range, expand semua sub 0-9)
+    match = MAIN_ONLY.match(rest)
+    if match:
+        start_main = int(match.group(1))
+        end_main = int(match.group(2))
+        for main in range(start_main, end_main + 1):
+            _add_run(runs, f"{prefix}{main:02d}.", 0, 9)
+        return
+
+    # Fallback
+    _expand_single(prefix + rest, runs)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_normalized(code_str):
+    """
+    Uraikan spesifikasi (sudah strip + upper) menjadi tuple run
+    (stem, start, end): kode stem+start sampai stem+end, atau satu kode
+    stem apa adanya jika start None. Urutan run = urutan hasil expand.
+    """
+    runs = []
+
+    # Cari prefix huruf di awal string (untuk digunakan di part tanpa huruf)
+    main_prefix_match = MAIN_PREFIX.match(code_str)
+    main_prefix = main_prefix_match.group(1) if main_prefix_match else None
+
+    for part in code_str.split(','):
+        part = part.strip()
+        if '-' in part:
+            _expand_range(part, runs, main_prefix)
+        else:
+            _expand_single(part, runs, main_prefix)
+
+    return tuple(runs)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _expand_normalized(code_str):
+    expanded_codes = []
+    for stem, start, end in parse_normalized(code_str):
+        if start is None:
+            expanded_codes.append(stem)
+        else:
+            expanded_codes.extend(f"{stem}{value}" for value in range(start, end + 1))
+    return tuple(expanded_codes)
+
+
+def expand_icd_code(code_str):
+    """
+    Expand kode ICD yang tidak standar menjadi tuple kode ICD standar
+
+    Contoh:
+    - "A 00" -> ("A00.0",)
+    - "A 06.0-.3,.5-.9" -> ("A06.0", "A06.1", "A06.2", "A06.3", "A06.5", ..., "A06.9")
+    - "A 15.1-16.2" -> ("A15.1", "A15.2", ..., "A15.9", "A16.0", "A16.1", "A16.2")
+    - "A 18.1.3-.8" -> ("A18.1.3", "A18.1.4", ..., "A18.1.8")
+    - "A 02, 04-05, A 07-08" -> ("A02.0", "A04.0", "A04.1", ..., "A05.9", "A07.0", ..., "A08.9")
+    """
+    if pd.isna(code_str) or str(code_str).strip() == "":
+        return ()
+    return _expand_normalized(str(code_str).strip().upper())
+
+
+def expand_icd_column(series):
+    """
+    Expand satu kolom spesifikasi kode ICD; setiap spesifikasi unik hanya
+    di-expand sekali.
+
+    Mengembalikan (Series teks kode dipisah ", ", total kode hasil expand).
+    Nilai yang tidak bisa di-expand tetap ditulis apa adanya ('' untuk NaN).
+    """
+    # Hasil hanya bergantung pada str(nilai), jadi kunci unik = teksnya
+    # (agar 1 dan 1.0 tidak digabung oleh factorize)
+    keys = series.astype(object).map(str).where(series.notna())
+    codes, uniques = pd.factorize(keys)
+
+    texts = []
+    lengths = []
+    for spec in uniques:
+        expanded = expand_icd_code(spec)
+        texts.append(', '.join(expanded) if expanded else str(spec))
+        lengths.append(len(expanded))
+
+    # Tambahan satu slot di akhir untuk NaN (kode -1 dari factorize)
+    texts = np.array(texts + [''], dtype=object)
+    lengths = np.array(lengths + [0], dtype='int64')
+
+    result = pd.Series(texts[codes], index=series.index, dtype=object)
+    return result, int(lengths[codes].sum())
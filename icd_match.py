@@ -0,0 +1,196 @@
+"""
+Pencocokan kode ICD baris PUSKESAD dengan tabel mapping tanpa ekspansi
+per kode.
+
+Daftar kode setiap baris PUSKESAD dikompilasi menjadi interval di atas
+ordinal kanonik kode ICD (huruf, kode utama, sub, sub-sub), lalu seluruh
+kode unik di mapping diklasifikasi sekaligus dengan searchsorted.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from icd_expand import parse_normalized
+from mapping_index import concat_ranges
+
+# Bentuk kanonik hasil expand: "A06.3" atau "A18.1.3" (kode utama minimal 2
+# digit, tanpa nol di depan selain padding 2 digit)
+CANONICAL = re.compile(r'^([A-Z])([0-9]{2,})\.([0-9]+)(?:\.([0-9]+))?$')
+
+# Setiap bagian kode harus < PART_MAX; kode tiga tingkat diletakkan setelah
+# semua kode dua tingkat agar rentang sub tidak saling menyisip
+PART_MAX = 10_000
+THREE_LEVEL_OFFSET = 26 * PART_MAX ** 2
+
+
+@lru_cache(maxsize=65536)
+def icd_ordinal(code):
+    """
+    Ordinal kanonik kode ICD (sudah upper), atau -1 jika kode tidak dalam
+    bentuk kanonik. Kode berurutan dalam satu range expand (A06.0, A06.1, ...)
+    selalu mendapat ordinal berurutan.
+    """
+    match = CANONICAL.match(code)
+    if not match:
+        return -1
+
+    letter, main, sub, third = match.groups()
+    if main != f"{int(main):02d}" or sub != str(int(sub)):
+        return -1
+    if third is not None and third != str(int(third)):
+        return -1
+
+    parts = [int(main), int(sub)] + ([int(third)] if third is not None else [])
+    if any(part >= PART_MAX for part in parts):
+        return -1
+
+    value = ord(letter) - ord('A')
+    for part in parts:
+        value = value * PART_MAX + part
+    return value + (THREE_LEVEL_OFFSET if third is not None else 0)
+
+
+def _run_intervals(stem, start, end, intervals, extras):
+    """Interval ordinal untuk satu run expand (kode stem+start .. stem+end)"""
+    lo = icd_ordinal(f"{stem}{start}")
+    hi = icd_ordinal(f"{stem}{end}")
+    if lo >= 0 and hi >= 0:
+        # Semua kode di antaranya kanonik dengan ordinal berurutan
+        intervals.append((lo, hi))
+        return
+
+    for value in range(start, end + 1):
+        code = f"{stem}{value}"
+        ordinal = icd_ordinal(code)
+        if ordinal >= 0:
+            intervals.append((ordinal, ordinal))
+        else:
+            extras.append(code)
+
+
+def _merge_adjacent(intervals):
+    """
+    Gabungkan interval yang bersambung (hi + 1 == lo berikutnya). Interval
+    yang tumpang tindih dibiarkan terpisah agar kode yang muncul lebih dari
+    sekali tetap dihitung berulang.
+    """
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and merged[-1][1] + 1 == lo:
+            merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+@lru_cache(maxsize=4096)
+def compile_spec(cell_text):
+    """
+    Kompilasi isi satu sel menjadi (intervals, extras).
+
+    Sel boleh berisi spesifikasi mentah ("A 15.1-16.2", "A 06.0-.3,.5-.9")
+    maupun hasil expand (kode dipisah koma); keduanya diurai dengan tata
+    bahasa icd_expand langsung menjadi interval tanpa membuat daftar kode.
+
+    intervals adalah tuple (lo, hi) ordinal inklusif; kode yang muncul lebih
+    dari sekali menghasilkan interval tambahan sehingga tetap dihitung
+    berulang. extras adalah kode yang tidak kanonik (dicocokkan apa adanya).
+    """
+    if cell_text.strip() == '' or cell_text == 'nan':
+        return (), ()
+
+    intervals = []
+    extras = []
+    for stem, start, end in parse_normalized(cell_text.strip().upper()):
+        if start is not None:
+            _run_intervals(stem, start, end, intervals, extras)
+        elif stem:
+            value = icd_ordinal(stem)
+            if value >= 0:
+                intervals.append((value, value))
+            else:
+                extras.append(stem)
+
+    return tuple(_merge_adjacent(intervals)), tuple(extras)
+
+
+class IcdMatcher:
+    """
+    Pencocok kode ICD atas kode unik mapping (MappingIndex.uniques).
+
+    Kode kanonik disimpan terurut menurut ordinal; kode lain disimpan di
+    dict untuk pencocokan persis.
+    """
+
+    def __init__(self, kode_uniques):
+        ordinals = np.array([icd_ordinal(kode) for kode in kode_uniques], dtype='int64')
+        kanonik = np.flatnonzero(ordinals >= 0)
+        order = np.argsort(ordinals[kanonik], kind='stable')
+
+        self.sorted_ordinals = ordinals[kanonik][order]
+        self.sorted_ids = kanonik[order]
+        self.extra_ids = {
+            kode: pos for pos, kode in enumerate(kode_uniques) if ordinals[pos] < 0
+        }
+
+    def match_specs(self, specs):
+        """
+        Cocokkan daftar teks sel unik. Mengembalikan (spec_pos, kode_id)
+        untuk setiap pasangan yang cocok, terurut menurut spec_pos.
+        """
+        lo, hi, owner = [], [], []
+        extra_owner, extra_ids = [], []
+        for pos, spec in enumerate(specs):
+            intervals, extras = compile_spec(spec)
+            for start, end in intervals:
+                lo.append(start)
+                hi.append(end)
+                owner.append(pos)
+            for kode in extras:
+                if kode in self.extra_ids:
+                    extra_owner.append(pos)
+                    extra_ids.append(self.extra_ids[kode])
+
+        starts = np.searchsorted(self.sorted_ordinals, np.array(lo, dtype='int64'), side='left')
+        ends = np.searchsorted(self.sorted_ordinals, np.array(hi, dtype='int64'), side='right')
+        interval_pos, flat = concat_ranges(starts, ends)
+
+        spec_pos = np.concatenate([
+            np.array(owner, dtype='int64')[interval_pos],
+            np.array(extra_owner, dtype='int64'),
+        ])
+        kode_ids = np.concatenate([
+            self.sorted_ids[flat],
+            np.array(extra_ids, dtype='int64'),
+        ])
+        order = np.argsort(spec_pos, kind='stable')
+        return spec_pos[order], kode_ids[order]
+
+
+def match_mapping_rows(cells, index, matcher=None):
+    """
+    Cocokkan setiap sel kode PUSKESAD dengan baris mapping.
+
+    cells adalah kolom kode (spesifikasi mentah atau hasil expand, dipisah
+    koma); index adalah MappingIndex. Mengembalikan (row_pos, map_pos)
+    terurut menurut row_pos: baris mapping map_pos cocok dengan baris
+    PUSKESAD ke-row_pos. Pasangan muncul sekali untuk setiap kemunculan kode
+    hasil expand di sel, sama seperti lookup per kode. matcher (opsional)
+    adalah IcdMatcher atas index.uniques yang dipakai ulang antar blok.
+    """
+    texts = pd.Series(cells, dtype=object).map(str)
+    spec_codes, specs = pd.factorize(texts)
+
+    if matcher is None:
+        matcher = IcdMatcher(index.uniques)
+    spec_pos, kode_ids = matcher.match_specs(list(specs))
+
+    # Pasangan (spec, kode) -> (baris PUSKESAD, kode)
+    spec_bounds = np.searchsorted(spec_pos, np.arange(len(specs) + 1))
+    row_owner, pair_pos = concat_ranges(spec_bounds[spec_codes], spec_bounds[spec_codes + 1])
+
+    # (baris PUSKESAD, kode) -> (baris PUSKESAD, baris mapping)
+    pair_owner, map_pos = index.positions_many(kode_ids[pair_pos])
+    return row_owner[pair_owner], map_pos
@@ -0,0 +1,167 @@
+"""
+Manajer job latar belakang untuk upload, optimasi, dan export.
+
+- Job baca (optimasi, simpan Excel/PDF) dijalankan di pool thread terbatas
+  (MAX_WORKERS); sisanya menunggu di antrian.
+- Job yang mengubah database (upload, hapus data, ringkasan SIRS
+  inkremental) masuk satu antrian penulis dan dijalankan satu per satu,
+  sehingga tidak pernah ada dua penulis SQLite sekaligus. Pembaca tetap
+  jalan bersamaan berkat mode WAL.
+- Pembatalan kooperatif: job.report dipakai sebagai callback progress
+  engine dan melempar Cancelled jika job dibatalkan. Engine melapor di
+  setiap tahap / batch / blok, jadi job berhenti di batas blok berikutnya
+  dan transaksi yang sedang berjalan di-rollback. Job yang masih antri
+  langsung dibuang.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Jumlah job baca yang boleh berjalan bersamaan
+MAX_WORKERS = 2
+
+STATUS_QUEUED = "Antri"
+STATUS_RUNNING = "Berjalan"
+STATUS_DONE = "Selesai"
+STATUS_FAILED = "Gagal"
+STATUS_CANCELLED = "Dibatalkan"
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+
+class Cancelled(Exception):
+    """Job dihentikan karena dibatalkan pengguna"""
+
+    def __init__(self):
+        super().__init__("Job dibatalkan")
+
+
+class Job:
+    """
+    Satu pekerjaan di JobManager. func(job) memakai job.report sebagai
+    callback progress(value, text) dan boleh memanggil job.check() di loop
+    yang tidak melapor progress.
+    """
+
+    def __init__(self, job_id, name, writer, progress=None):
+        self.id = job_id
+        self.name = name
+        self.writer = writer
+        self.status = STATUS_QUEUED
+        self.value = 0.0
+        self.text = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._progress = progress
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATUSES
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        """Lempar Cancelled jika job sudah dibatalkan"""
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def report(self, value, text):
+        """Callback progress untuk engine: cek pembatalan lalu teruskan progress"""
+        self.check()
+        self.value = value
+        self.text = text
+        if self._progress:
+            self._progress(value, text)
+
+
+class JobManager:
+    def __init__(self, workers=MAX_WORKERS):
+        self._readers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-writer")
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, name, func, writer=False, progress=None):
+        """
+        Antrikan func(job). writer=True untuk job yang menulis ke database
+        (dijalankan berurutan di antrian penulis). progress(value, text)
+        menerima setiap job.report. Mengembalikan Job.
+        """
+        with self._lock:
+            job = Job(next(self._ids), name, writer, progress)
+            self._jobs[job.id] = job
+        executor = self._writer if writer else self._readers
+        job.future = executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job, func):
+        if job.cancelled:
+            # Dibatalkan selagi antri
+            self._finish(job, STATUS_CANCELLED)
+            return None
+
+        job.status = STATUS_RUNNING
+        job.started = time.time()
+        try:
+            job.result = func(job)
+        except Cancelled:
+            self._finish(job, STATUS_CANCELLED)
+        except Exception as e:
+            # Layar sudah menampilkan error-nya sendiri; di sini hanya dicatat
+            job.error = e
+            self._finish(job, STATUS_FAILED)
+        else:
+            self._finish(job, STATUS_DONE)
+        return job.result
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+
+    def cancel(self, job):
+        """Batalkan job: yang antri dibuang, yang berjalan berhenti di cek berikutnya"""
+        job.cancel()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, STATUS_CANCELLED)
+
+    def jobs(self):
+        """Semua job (urut waktu dibuat)"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def clear_finished(self):
+        """Buang job yang sudah selesai / gagal / dibatalkan dari daftar"""
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.done]:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        """Batalkan semua job (dipanggil saat aplikasi ditutup)"""
+        for job in self.jobs():
+            self.cancel(job)
+        self._readers.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=False, cancel_futures=True)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """JobManager bersama untuk seluruh aplikasi"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -1,6 +1,13 @@
 import pandas as pd
 import re
-from db import create_table_dynamic, insert_dynamic
+import time
+from db import DB_PATH, CATEGORICAL_COLUMNS, create_table_dynamic, insert_bulk
+from diagnostics import instrument, stage
+from excel_stream import open_stream
+from mapping_index import invalidate_mapping_index
+
+# Jumlah baris per executemany saat upload mapping
+BULK_BATCH_SIZE = 5000
 
 def normalize_column(col):
     col = col.lower()
@@ -15,19 +22,97 @@ def fix_value(val):
         return val.strftime("%Y-%m-%d")
     return str(val)
 
-def save_mapping_to_db(file_path):
-    # baca excel
-    df = pd.read_excel(file_path)
+def fix_values(df):
+    """
+    Versi per kolom dari fix_value: kosong -> "", Timestamp -> YYYY-MM-DD,
+    selain itu str(val). Hasilnya DataFrame berisi string saja.
+    """
+    # iterrows menyamakan tipe jika semua kolom numerik (int -> float),
+    # ikuti perilaku itu agar hasil tetap sama dengan versi per baris
+    common = df.iloc[:1].to_numpy().dtype
+    if common != object:
+        df = df.astype(common)
+
+    result = {}
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            result[col] = s.dt.strftime("%Y-%m-%d").fillna("")
+            continue
+
+        s = s.astype(object)
+        text = s.astype(str)
+
+        # Kolom campuran bisa berisi Timestamp, format ulang yang itu saja
+        if pd.api.types.infer_dtype(s, skipna=True) not in ("string", "floating", "integer", "boolean", "empty"):
+            is_ts = s.map(lambda v: isinstance(v, pd.Timestamp))
+            if is_ts.any():
+                text[is_ts] = s[is_ts].map(lambda v: v.strftime("%Y-%m-%d"))
+
+        text[s.isna()] = ""
+        result[col] = text
+
+    return pd.DataFrame(result, index=df.index, columns=df.columns)
+
+def normalize_categories(columns, rows):
+    """Normalisasi kolom kategori (kelamin, angkatan, alasan_pulang): strip + upper"""
+    positions = [i for i, col in enumerate(columns) if col in CATEGORICAL_COLUMNS]
+    for row in rows:
+        if positions:
+            row = list(row)
+            for i in positions:
+                row[i] = row[i].strip().upper()
+            row = tuple(row)
+        yield row
 
-    # normalisasi nama header
-    df.columns = [normalize_column(c) for c in df.columns]
+@instrument("logic.save_mapping_to_db", rows_out=lambda result: result['total'])
+def save_mapping_to_db(file_path, batch_size=BULK_BATCH_SIZE, progress=None):
+    """
+    Upload file mapping (.xlsx / .csv / .xls) ke database.
+
+    File .xlsx dan .csv dibaca bertahap per batch_size baris sehingga memori
+    tetap kecil berapa pun ukuran file; .xls masih dibaca penuh dengan pandas.
+    progress (opsional) dipanggil sebagai progress(baris_selesai, total_baris,
+    baris_per_detik) setelah setiap batch insert.
+
+    Baris yang sudah ada (kunci sama, lihat db.row_key_builder) tidak
+    ditambahkan lagi; hanya baris yang isinya berubah yang ditulis ulang.
+    Mengembalikan dict hasil insert_bulk (total, inserted, updated, unchanged).
+    """
+    # File stream hanya dipindai di sini; isinya dibaca selama insert_bulk
+    with stage("logic.save_mapping_to_db: buka file") as st:
+        stream = open_stream(file_path)
+
+        if stream is not None:
+            columns = [normalize_column(c) for c in stream.columns]
+            total_rows = stream.total_rows
+            rows = (row for batch in stream.iter_batches(batch_size) for row in batch)
+        else:
+            # baca excel
+            df = pd.read_excel(file_path)
+
+            # normalisasi nama header
+            df.columns = [normalize_column(c) for c in df.columns]
+            columns = list(df.columns)
+            total_rows = len(df)
+            rows = fix_values(df).itertuples(index=False, name=None)
+        st.rows_out = total_rows
 
     # buat tabel berdasarkan header excel
-    create_table_dynamic(df.columns)
+    create_table_dynamic(columns)
+
+    # upsert semua row dalam satu transaksi (executemany per batch)
+    start = time.perf_counter()
+
+    def report(done):
+        if progress:
+            elapsed = time.perf_counter() - start
+            progress(done, total_rows, done / elapsed if elapsed > 0 else 0.0)
+
+    rows = normalize_categories(columns, rows)
+    result = insert_bulk(columns, rows, batch_size=batch_size, progress=report)
 
-    # insert setiap row secara dinamis
-    for _, row in df.iterrows():
-        row_dict = {col: fix_value(row[col]) for col in df.columns}
-        insert_dynamic(row_dict)
+    # Data mapping berubah, index kode ICD harus dibangun ulang
+    invalidate_mapping_index(DB_PATH)
 
-    return len(df)
+    return result
@@ -1,9 +1,12 @@
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk
 from screens.upload_mapping_screen import UploadMappingScreen
 from screens.view_mapping_screen import ViewMappingScreen
 from screens.screen_sirs import SirsScreen
 from screens.screen_puskesad import PuskesadScreen
+from screens.jobs_screen import JobsScreen
+from jobs import get_job_manager
 
 
 def main():
@@ -30,8 +33,20 @@ def main():
     tab_puskesad = PuskesadScreen(notebook)
     notebook.add(tab_puskesad, text="Optimasi Puskesad")
 
+    # TAB 5: Antrian Job (upload / optimasi / export yang berjalan)
+    tab_jobs = JobsScreen(notebook)
+    notebook.add(tab_jobs, text="Antrian Job")
+
+    def on_close():
+        # Job yang masih berjalan dibatalkan (transaksi di-rollback)
+        get_job_manager().shutdown()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
 
 
 if __name__ == "__main__":
+    # Diperlukan agar proses worker (parallel.py) bisa berjalan di build .exe
+    multiprocessing.freeze_support()
     main()
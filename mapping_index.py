@@ -0,0 +1,110 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from db import get_connection
+from diagnostics import stage
+
+
+class MappingIndex:
+    """
+    Index kode ICD atas tabel mapping.
+
+    kode_icd dinormalisasi (strip + upper) sekali saja, lalu posisi baris
+    dikelompokkan per kode sehingga pencarian per kode cukup O(1).
+    """
+
+    def __init__(self, df_mapping, kode_col='kode_icd'):
+        self.df = df_mapping
+        self.kode = df_mapping[kode_col].str.strip().str.upper()
+
+        # factorize: kode_idx[i] = nomor kode baris ke-i (-1 jika kosong/NaN)
+        self.kode_idx, self.uniques = pd.factorize(self.kode)
+
+        # Kelompokkan posisi baris per kode (stable sort -> posisi tetap urut)
+        order = np.argsort(self.kode_idx, kind='stable')
+        sorted_idx = self.kode_idx[order]
+        bounds = np.searchsorted(sorted_idx, np.arange(len(self.uniques) + 1))
+        self._order = order
+        self._bounds = bounds
+        self._positions = {
+            kode: order[bounds[i]:bounds[i + 1]]
+            for i, kode in enumerate(self.uniques)
+        }
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, kode):
+        return kode in self._positions
+
+    def positions(self, kode):
+        """Posisi baris (urut) untuk kode ICD yang sudah dinormalisasi"""
+        return self._positions.get(kode, np.empty(0, dtype='int64'))
+
+    def lookup(self, kode):
+        """Baris mapping dengan kode ICD yang sudah dinormalisasi"""
+        return self.df.iloc[self.positions(kode)]
+
+    def positions_many(self, kode_ids):
+        """
+        Posisi baris untuk banyak nomor kode sekaligus (nomor = posisi di
+        uniques). Mengembalikan (owner, positions): positions[i] adalah baris
+        milik kode_ids[owner[i]].
+        """
+        kode_ids = np.asarray(kode_ids, dtype='int64')
+        owner, flat = concat_ranges(self._bounds[kode_ids], self._bounds[kode_ids + 1])
+        return owner, self._order[flat]
+
+
+def concat_ranges(starts, ends):
+    """
+    Gabungan np.arange(starts[i], ends[i]) untuk semua i tanpa loop Python.
+    Mengembalikan (owner, values): values[j] berasal dari range ke-owner[j].
+    """
+    starts = np.asarray(starts, dtype='int64')
+    lengths = np.asarray(ends, dtype='int64') - starts
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, starts[owner] + offsets
+
+
+# Cache index per (database, query); dibuang setiap kali tabel mapping berubah
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_mapping_index(db_path, query, columns=None):
+    """Baca tabel mapping lalu bangun MappingIndex, memakai cache jika ada"""
+    key = (os.path.abspath(db_path), query, tuple(columns) if columns else None)
+
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+
+    with stage("mapping_index: pd.read_sql_query") as st:
+        df_mapping = pd.read_sql_query(query, get_connection(db_path))
+        st.rows_out = len(df_mapping)
+
+    if columns:
+        df_mapping.columns = columns
+
+    with stage("mapping_index: bangun index", rows_in=len(df_mapping)):
+        index = MappingIndex(df_mapping)
+    with _lock:
+        _cache[key] = index
+    return index
+
+
+def invalidate_mapping_index(db_path=None):
+    """Buang cache index (semua, atau hanya untuk database tertentu)"""
+    with _lock:
+        if db_path is None:
+            _cache.clear()
+            return
+
+        db_path = os.path.abspath(db_path)
+        for key in [k for k in _cache if k[0] == db_path]:
+            del _cache[key]
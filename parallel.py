@@ -0,0 +1,215 @@
+"""
+Backend multi-proses untuk perhitungan SIRS dan PUSKESAD.
+
+Baris mapping dibagi per bab ICD (huruf pertama kode) ke beberapa proses
+ProcessPoolExecutor. Setiap proses menghasilkan matriks hitungan parsial,
+lalu semua parsial dijumlahkan di proses utama dengan urutan bagian yang
+tetap, sehingga hasil selalu sama dengan perhitungan satu proses. Pesan
+progress dari worker dikirim lewat queue (multiprocessing.Manager).
+"""
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+from mapping_index import MappingIndex
+import puskesad_engine
+import sirs_engine
+
+# Jumlah worker default (bisa diganti dari layar atau argumen)
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Interval cek pesan progress dari worker (detik)
+POLL_INTERVAL = 0.1
+
+# Pool proses dipakai ulang antar perhitungan (membuat proses baru mahal
+# karena setiap proses harus mengimpor pandas)
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_executor(workers):
+    """ProcessPoolExecutor bersama untuk jumlah worker tertentu"""
+    with _lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            context = multiprocessing.get_context("spawn")
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _executors[workers] = executor
+        return executor
+
+
+def shutdown_executors():
+    """Hentikan semua pool proses (dipanggil otomatis saat program keluar)"""
+    with _lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
+atexit.register(shutdown_executors)
+
+
+def _report(progress_queue, part_no, text):
+    if progress_queue is not None:
+        progress_queue.put((part_no, text))
+
+
+def chapter_partitions(kode, workers):
+    """
+    Bagi posisi baris menjadi maksimal `workers` bagian menurut bab ICD.
+
+    Bab (huruf pertama kode) tidak pernah dipecah; bab terbesar dimasukkan
+    lebih dulu ke bagian dengan baris paling sedikit. Urutan bab dan bagian
+    deterministik. Bagian kosong dibuang.
+    """
+    bab = pd.Series(kode, dtype=object).str[:1].fillna('').to_numpy(dtype=object)
+    chapters, codes = np.unique(bab.astype(str), return_inverse=True)
+    sizes = np.bincount(codes, minlength=len(chapters))
+
+    loads = [0] * max(workers, 1)
+    assignment = np.zeros(len(chapters), dtype='int64')
+    for chapter in sorted(range(len(chapters)), key=lambda c: (-sizes[c], chapters[c])):
+        target = min(range(len(loads)), key=lambda i: (loads[i], i))
+        assignment[chapter] = target
+        loads[target] += sizes[chapter]
+
+    part_of_row = assignment[codes]
+    parts = [np.flatnonzero(part_of_row == part) for part in range(len(loads))]
+    return [part for part in parts if len(part)]
+
+
+def _run_parts(func, tasks, workers, progress=None, start=0.0, end=1.0):
+    """
+    Jalankan func(part_no, progress_queue, *task) untuk setiap task.
+
+    Dengan satu worker (atau satu task) semuanya dijalankan di proses ini.
+    Hasil dikembalikan sesuai urutan tasks (bukan urutan selesai).
+    progress(value, text) dipanggil di thread pemanggil untuk setiap pesan
+    worker dan setiap bagian yang selesai; exception dari progress
+    (misal pembatalan job) menghentikan sisa bagian.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        results = []
+        for part_no, task in enumerate(tasks):
+            if progress:
+                progress(start + (end - start) * part_no / len(tasks), f"Bagian {part_no + 1}/{len(tasks)}...")
+            results.append(func(part_no, None, *task))
+        return results
+
+    executor = get_executor(workers)
+    manager = multiprocessing.get_context("spawn").Manager()
+    try:
+        progress_queue = manager.Queue()
+        results = [None] * len(tasks)
+        done = 0
+
+        def drain():
+            while True:
+                try:
+                    part_no, text = progress_queue.get_nowait()
+                except queue.Empty:
+                    return
+                if progress:
+                    value = start + (end - start) * done / len(tasks)
+                    progress(value, f"[bagian {part_no + 1}/{len(tasks)}] {text}")
+
+        futures = {
+            executor.submit(func, part_no, progress_queue, *task): part_no
+            for part_no, task in enumerate(tasks)
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[futures[future]] = future.result()
+                    done += 1
+                drain()
+                if progress and finished:
+                    progress(start + (end - start) * done / len(tasks), f"{done}/{len(tasks)} bagian selesai")
+            drain()
+        except BaseException:
+            # Gagal / dibatalkan lewat progress: bagian yang belum mulai dibuang
+            for future in pending:
+                future.cancel()
+            raise
+    finally:
+        manager.shutdown()
+
+    return results
+
+
+# ============================ SIRS ============================
+
+def _sirs_part(part_no, progress_queue, df_part):
+    _report(progress_queue, part_no, f"Mengklasifikasi {len(df_part)} baris mapping...")
+    counts = sirs_engine.aggregate_counts(sirs_engine.classify_mapping(df_part))
+    _report(progress_queue, part_no, "Selesai")
+    return counts
+
+
+def hitung_sirs_parallel(df_template, df_mapping, icd_col, workers=DEFAULT_WORKERS, progress=None, index=None):
+    """
+    Sama dengan sirs_engine.hitung_sirs, tetapi klasifikasi & agregasi
+    mapping dijalankan paralel per bab ICD.
+    """
+    kode = index.kode if index is not None else sirs_engine.normalize_kode_icd(df_mapping['kode_icd'])
+    df_mapping = df_mapping.assign(kode_icd=kode.to_numpy())
+    parts = chapter_partitions(kode, workers)
+
+    if progress:
+        progress(0.3, f"Menghitung {len(parts)} bagian di {workers} proses...")
+    partials = _run_parts(
+        _sirs_part, [(df_mapping.iloc[part],) for part in parts],
+        workers, progress, start=0.3, end=0.85
+    )
+
+    # Bab ICD tidak tumpang tindih antar bagian; urutan tetap -> deterministik
+    value_cols = sirs_engine.SIRS_COLUMNS + sirs_engine.JUMLAH_COLUMNS
+    counts = pd.concat(partials) if partials else pd.DataFrame(columns=value_cols, dtype='int64')
+
+    if progress:
+        progress(0.9, f"Menggabungkan {len(df_template)} kode ICD...")
+    return sirs_engine.merge_to_template(df_template, icd_col, counts, progress=progress, start=0.9, end=1.0)
+
+
+# ========================== PUSKESAD ==========================
+
+def _puskesad_part(part_no, progress_queue, cells, columns, df_part):
+    _report(progress_queue, part_no, f"Mencocokkan {len(df_part)} baris mapping...")
+    index = MappingIndex(df_part.reset_index(drop=True))
+    counts = puskesad_engine.count_puskesad(cells, columns, index)
+    _report(progress_queue, part_no, "Selesai")
+    return counts
+
+
+def hitung_puskesad_parallel(df_template, icd_col, mapping_index, workers=DEFAULT_WORKERS, progress=None):
+    """
+    Sama dengan puskesad_engine.hitung_puskesad, tetapi mapping dibagi per
+    bab ICD ke beberapa proses; matriks parsial dijumlahkan di akhir.
+    """
+    cells = df_template[icd_col]
+    columns = list(df_template.columns)
+    parts = chapter_partitions(mapping_index.kode, workers)
+
+    if progress:
+        progress(0.3, f"Menghitung {len(parts)} bagian di {workers} proses...")
+    partials = _run_parts(
+        _puskesad_part, [(cells, columns, mapping_index.df.iloc[part]) for part in parts],
+        workers, progress, start=0.3, end=0.85
+    )
+
+    if progress:
+        progress(0.9, "Menjumlahkan hasil per baris...")
+    if partials:
+        counts = partials[0]
+        for partial in partials[1:]:
+            counts = counts + partial
+    else:
+        counts = pd.DataFrame(index=range(len(df_template)))
+    return puskesad_engine.apply_counts(df_template, counts)
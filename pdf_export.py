@@ -0,0 +1,228 @@
+"""
+Export hasil SIRS / PUSKESAD ke PDF (reportlab), dipakai bersama oleh
+kedua layar.
+
+Teks sel disiapkan per kolom (array NumPy), lalu baris dibagi menjadi tabel
+kecil (ROWS_PER_TABLE baris) agar reportlab tidak perlu memecah satu tabel
+raksasa di setiap halaman. Baris yang semua nilainya 0 bisa dilewati.
+progress(value, text) dipanggil setiap tabel selesai digambar, dengan nomor
+halaman yang sedang ditulis.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import puskesad_engine
+
+# Jumlah baris data per tabel (tabel panjang dipecah per halaman oleh reportlab)
+ROWS_PER_TABLE = 100
+# Jumlah kolom nilai per tabel (di luar kolom dasar)
+COLUMNS_PER_TABLE = 12
+# Lebar area tabel di A4 landscape (points)
+AVAILABLE_WIDTH = 750
+MAX_CELL_CHARS = 15
+MAX_HEADER_CHARS = 20
+
+# Singkatan nama kolom panjang di header tabel
+HEADER_ABBREVIATIONS = [
+    ('Jumlah Pasien Keluar', 'JPK'),
+    ('Hidup dan Mati', 'H&M'),
+    ('Menurut Jenis Kelamin', 'JK'),
+]
+
+
+def sirs_sections(columns):
+    """
+    Kolom dasar dan daftar section (judul, kolom, ukuran font, teks lanjutan)
+    untuk laporan SIRS: usia laki-laki, usia perempuan, ringkasan jumlah.
+    """
+    basic_cols, age_cols_L, age_cols_P, summary_cols = [], [], [], []
+    for col in columns:
+        col_lower = col.lower()
+        if 'kode icd' in col_lower or col_lower == 'no':
+            basic_cols.append(col)
+        elif col.endswith('_L') and 'jumlah' not in col_lower:
+            age_cols_L.append(col)
+        elif col.endswith('_P') and 'jumlah' not in col_lower:
+            age_cols_P.append(col)
+        elif 'jumlah' in col_lower:
+            summary_cols.append(col)
+
+    sections = [
+        ("TABEL 1: DISTRIBUSI USIA PASIEN LAKI-LAKI", age_cols_L, 6, "Lanjutan kolom usia Laki-Laki..."),
+        ("TABEL 2: DISTRIBUSI USIA PASIEN PEREMPUAN", age_cols_P, 6, "Lanjutan kolom usia Perempuan..."),
+        ("TABEL 3: RINGKASAN JUMLAH PASIEN", summary_cols, 7, None),
+    ]
+    return basic_cols, [section for section in sections if section[1]]
+
+
+def puskesad_sections(columns):
+    """
+    Kolom dasar dan daftar section untuk laporan PUSKESAD: golongan /
+    status, golongan umur, jenis kelamin & jumlah.
+    """
+    groups = [
+        ("TABEL 1: PASIEN MENURUT GOLONGAN / STATUS", puskesad_engine.NUMERIC_COLS[:8]),
+        ("TABEL 2: PASIEN KELUAR MENURUT GOLONGAN UMUR", puskesad_engine.NUMERIC_COLS[8:16]),
+        ("TABEL 3: PASIEN KELUAR MENURUT JENIS KELAMIN & JUMLAH", puskesad_engine.NUMERIC_COLS[16:]),
+    ]
+    basic_cols = [
+        col for col in columns
+        if col not in puskesad_engine.NUMERIC_COLS and col != puskesad_engine.COL_KODE_ASLI
+    ]
+    sections = [
+        (title, [col for col in group if col in columns], 6, None)
+        for title, group in groups
+    ]
+    return basic_cols, [section for section in sections if section[1]]
+
+
+def nonzero_rows(df, value_columns):
+    """Mask baris yang punya minimal satu nilai bukan 0 di value_columns"""
+    if not value_columns:
+        return np.ones(len(df), dtype=bool)
+    values = df[value_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+    return (values != 0).any(axis=1)
+
+
+def cell_texts(series):
+    """
+    Teks sel satu kolom (array NumPy). Kosong, inf, dan 0 ditampilkan '-';
+    teks dipotong MAX_CELL_CHARS karakter.
+    """
+    values = series.to_numpy(dtype=object)
+    texts = series.astype(str).to_numpy(dtype=object)
+    blank = pd.isna(values) | series.isin([np.inf, -np.inf]).to_numpy()
+    blank |= np.isin(texts, ['', '0', '0.0'])
+    texts[blank] = '-'
+    return pd.Series(texts, dtype=object).str[:MAX_CELL_CHARS].to_numpy(dtype=object)
+
+
+def _header(col):
+    text = str(col)
+    if len(text) > MAX_CELL_CHARS:
+        for long, short in HEADER_ABBREVIATIONS:
+            text = text.replace(long, short)
+    return text[:MAX_HEADER_CHARS]
+
+
+def _make_table(header, rows, fontsize):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    col_width = AVAILABLE_WIDTH / len(header)
+    table = Table([header] + rows, colWidths=[col_width] * len(header), repeatRows=1)
+    table.setStyle(TableStyle([
+        # Header styling
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), fontsize + 1),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 0), (-1, 0), 8),
+
+        # Body styling
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), fontsize),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#E7E6E6')]),
+        ('TOPPADDING', (0, 1), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+    ]))
+    return table
+
+
+def _section_tables(texts, basic_cols, value_cols, fontsize):
+    """Tabel-tabel kecil (ROWS_PER_TABLE baris) untuk satu kelompok kolom"""
+    cols = basic_cols + value_cols
+    header = [_header(col) for col in cols]
+    columns = [texts[col] for col in cols]
+    total = len(columns[0]) if columns else 0
+
+    for start in range(0, total, ROWS_PER_TABLE):
+        rows = [list(row) for row in zip(*(col[start:start + ROWS_PER_TABLE] for col in columns))]
+        yield _make_table(header, rows, fontsize)
+
+
+def export_pdf(df, filepath, title, basic_cols, sections, skip_zero=False, progress=None):
+    """
+    Tulis laporan PDF. sections dari sirs_sections / puskesad_sections.
+    Mengembalikan dict: pages, rows (baris yang ditampilkan), skipped.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+    from reportlab.platypus.tables import Table
+
+    value_cols = [col for _, cols, _, _ in sections for col in cols]
+    skipped = 0
+    if skip_zero:
+        mask = nonzero_rows(df, value_cols)
+        skipped = int((~mask).sum())
+        df = df[mask]
+
+    # Teks sel dihitung sekali per kolom yang dipakai
+    texts = {col: cell_texts(df[col]) for col in dict.fromkeys(basic_cols + value_cols)}
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle', parent=styles['Heading1'], fontSize=16,
+        textColor=colors.HexColor('#1f4788'), spaceAfter=20, alignment=1
+    )
+    subtitle_style = ParagraphStyle(
+        'Subtitle', parent=styles['Heading2'], fontSize=12,
+        textColor=colors.HexColor('#2e5090'), spaceAfter=10, spaceBefore=10
+    )
+
+    elements = [
+        Paragraph(title, title_style),
+        Paragraph(f"Tanggal Generate: {datetime.now().strftime('%d-%m-%Y %H:%M:%S')}", styles['Normal']),
+        Paragraph(f"Total Kode ICD: {len(df)} | Total Kolom: {len(basic_cols) + len(value_cols)}", styles['Normal']),
+    ]
+    if skipped:
+        elements.append(Paragraph(f"<i>{skipped} kode ICD dengan semua nilai 0 tidak ditampilkan.</i>", styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    total_rows = 0
+    for section_no, (heading, cols, fontsize, continuation) in enumerate(sections):
+        elements.append(Paragraph(heading, subtitle_style))
+        elements.append(Spacer(1, 10))
+
+        # Kolom nilai dibagi per COLUMNS_PER_TABLE (kecuali section tanpa teks lanjutan)
+        step = COLUMNS_PER_TABLE if continuation else len(cols)
+        for i in range(0, len(cols), step):
+            for table in _section_tables(texts, basic_cols, cols[i:i + step], fontsize):
+                elements.append(table)
+                total_rows += table._nrows - 1
+
+            if i + step < len(cols):
+                elements.append(Spacer(1, 15))
+                elements.append(Paragraph(f"<i>{continuation}</i>", styles['Italic']))
+                elements.append(Spacer(1, 10))
+
+        if section_no < len(sections) - 1:
+            elements.append(PageBreak())
+
+    doc = SimpleDocTemplate(
+        filepath, pagesize=landscape(A4),
+        rightMargin=20, leftMargin=20, topMargin=30, bottomMargin=30
+    )
+
+    drawn = [0]
+
+    def after_flowable(flowable):
+        # Potongan tabel hasil split juga Table (header diulang di tiap potongan)
+        if isinstance(flowable, Table) and total_rows:
+            drawn[0] += flowable._nrows - 1
+            if progress:
+                progress(min(drawn[0] / total_rows, 1.0), f"Halaman {doc.page}: {drawn[0]}/{total_rows} baris tabel")
+
+    doc.afterFlowable = after_flowable
+    doc.build(elements)
+
+    return {'pages': doc.page, 'rows': len(df), 'skipped': skipped}
@@ -0,0 +1,113 @@
+"""
+Pencarian cepat pada tabel preview (SIRS / PUSKESAD).
+
+Setiap baris diringkas sekali menjadi satu string huruf kecil ("haystack")
+per DataFrame, lalu dicari dengan str.contains secara vectorized. Pencarian
+ditunda (debounce) selama pengguna masih mengetik, dijalankan di thread
+terpisah, dan hasil pencarian lama yang sudah basi dibuang.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Jeda setelah ketikan terakhir sebelum pencarian dijalankan (ms)
+DEBOUNCE_MS = 250
+# Jumlah baris hasil yang dimasukkan ke Treeview
+PAGE_SIZE = 300
+# Haystack dicari per potongan agar pencarian basi bisa dihentikan di tengah
+CHUNK_ROWS = 50_000
+
+# Pemisah antar sel, agar kata kunci tidak cocok melewati batas dua sel
+SEPARATOR = "\x00"
+
+
+def build_haystack(df):
+    """Gabungkan semua sel setiap baris menjadi satu string huruf kecil"""
+    if df.shape[1] == 0:
+        return pd.Series("", index=range(len(df)), dtype=object)
+
+    cols = [df.iloc[:, pos].astype(str).str.lower().reset_index(drop=True) for pos in range(df.shape[1])]
+    return cols[0].str.cat(cols[1:], sep=SEPARATOR, na_rep="")
+
+
+def search_positions(haystack, keyword, is_cancelled=None):
+    """
+    Posisi baris (urut) yang mengandung keyword (pencocokan teks biasa,
+    bukan regex). None jika dibatalkan lewat is_cancelled().
+    """
+    keyword = keyword.lower()
+    if not keyword:
+        return np.arange(len(haystack))
+
+    found = []
+    for start in range(0, len(haystack), CHUNK_ROWS):
+        if is_cancelled and is_cancelled():
+            return None
+        chunk = haystack.iloc[start:start + CHUNK_ROWS]
+        mask = chunk.str.contains(keyword, regex=False, na=False).to_numpy(dtype=bool)
+        found.append(np.flatnonzero(mask) + start)
+
+    return np.concatenate(found) if found else np.empty(0, dtype='int64')
+
+
+class PreviewSearch:
+    """
+    Pengendali pencarian preview untuk satu layar.
+
+    schedule() dipanggil dari event <KeyRelease>; on_result(df_page)
+    dipanggil di thread Tk dengan maksimal PAGE_SIZE baris hasil.
+    """
+
+    def __init__(self, widget, on_result, delay_ms=DEBOUNCE_MS, page_size=PAGE_SIZE):
+        self.widget = widget
+        self.on_result = on_result
+        self.delay_ms = delay_ms
+        self.page_size = page_size
+
+        self._after_id = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._frame = None
+        self._haystack = None
+
+    def schedule(self, df, keyword):
+        """Jadwalkan pencarian; ketikan baru membatalkan jadwal sebelumnya"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._after_id = self.widget.after(self.delay_ms, lambda: self._start(df, keyword))
+
+    def _start(self, df, keyword):
+        self._after_id = None
+        self._generation += 1
+        generation = self._generation
+        thread = threading.Thread(target=self._run, args=(generation, df, keyword), daemon=True)
+        thread.start()
+
+    def _is_stale(self, generation):
+        return generation != self._generation
+
+    def _get_haystack(self, df):
+        """Haystack untuk df, dibangun sekali per DataFrame"""
+        with self._lock:
+            if self._frame is df:
+                return self._haystack
+
+        haystack = build_haystack(df)
+        with self._lock:
+            self._frame = df
+            self._haystack = haystack
+        return haystack
+
+    def _run(self, generation, df, keyword):
+        haystack = self._get_haystack(df)
+        positions = search_positions(haystack, keyword, lambda: self._is_stale(generation))
+        if positions is None or self._is_stale(generation):
+            return
+
+        page = df.iloc[positions[:self.page_size]]
+        self.widget.after(0, lambda: self._deliver(generation, page))
+
+    def _deliver(self, generation, page):
+        if not self._is_stale(generation):
+            self.on_result(page)
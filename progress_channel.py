@@ -0,0 +1,79 @@
+"""
+Kanal progress bersama untuk proses panjang (optimasi, simpan, upload).
+
+Worker hanya menulis nilai progress terakhir ke satu slot (thread-safe);
+layar membaca slot itu dari thread UI dengan interval tetap (FRAME_MS).
+Jumlah callback Tk per detik jadi konstan, berapa pun seringnya worker
+melapor: laporan yang datang di antara dua frame cukup ditimpa.
+"""
+import threading
+import time
+
+# Interval poll UI (ms)
+FRAME_MS = 100
+
+
+class ProgressChannel:
+    """Slot progress terakhir: value (0-1), text, rows/detik, perkiraan sisa waktu"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = None
+        self._started = None
+
+    def report(self, value, text, rows=None):
+        """
+        Tulis progress terbaru. Bisa dipakai langsung sebagai callback
+        progress(value, text). rows (opsional) = jumlah baris yang sudah
+        diproses, untuk kecepatan baris/detik. value 0 menandai awal job
+        baru (jam untuk kecepatan & ETA diulang).
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if self._started is None or value <= 0:
+                self._started = now
+            elapsed = now - self._started
+
+            rate = rows / elapsed if rows is not None and elapsed > 0 else None
+            if value >= 1:
+                eta = 0.0
+            elif value > 0 and elapsed > 0:
+                eta = elapsed * (1 - value) / value
+            else:
+                eta = None
+
+            self._latest = {'value': value, 'text': text, 'rate': rate, 'eta': eta}
+
+    __call__ = report
+
+    def take(self):
+        """Ambil progress terbaru sejak take sebelumnya (None jika belum ada)"""
+        with self._lock:
+            latest, self._latest = self._latest, None
+        return latest
+
+    def bind(self, widget, apply, interval_ms=FRAME_MS):
+        """
+        Poll slot dari thread UI setiap interval_ms lewat widget.after.
+        apply(update) hanya dipanggil jika ada progress baru. Berhenti
+        sendiri saat widget dihancurkan.
+        """
+        def poll():
+            if not widget.winfo_exists():
+                return
+            update = self.take()
+            if update is not None:
+                apply(update)
+            widget.after(interval_ms, poll)
+
+        widget.after(interval_ms, poll)
+
+
+def describe(update):
+    """Teks detail progress: persen, baris/detik, dan perkiraan sisa waktu"""
+    parts = [f"{int(update['value'] * 100)}% selesai"]
+    if update['rate']:
+        parts.append(f"{update['rate']:.0f} baris/detik")
+    if update['eta'] and update['value'] < 1:
+        parts.append(f"sisa ~{update['eta']:.0f} detik")
+    return " | ".join(parts)
@@ -0,0 +1,297 @@
+"""
+Engine perhitungan PUSKESAD secara kolom (tanpa loop per baris).
+
+Setiap baris mapping diklasifikasi sekali menjadi indikator 0/1 per kolom
+hasil (golongan, pembayaran, umur, jenis kelamin, mati). Relasi baris
+PUSKESAD -> baris mapping dari icd_match lalu dijumlahkan dengan satu
+groupby per baris PUSKESAD.
+"""
+import numpy as np
+import pandas as pd
+
+from icd_expand import expand_icd_column
+from icd_match import IcdMatcher, match_mapping_rows
+from sirs_engine import to_usia
+
+# Kolom hasil golongan / status
+COL_AD = 'PASIEN MENURUT GOLONGAN / STATUS TNI AD AD'
+COL_PNS_AD = 'PASIEN MENURUT GOLONGAN / STATUS TNI AD PNS AD'
+COL_KEL_AD = 'PASIEN MENURUT GOLONGAN / STATUS TNI AD KEL AD'
+COL_AU_AL = 'PASIEN MENURUT GOLONGAN / STATUS ANGKATAN LAIN AU / AL'
+COL_PNS_LAIN = 'PASIEN MENURUT GOLONGAN / STATUS ANGKATAN LAIN PNS ( AL, AD MABES & KEMHAN)'
+COL_KEL_LAIN = 'PASIEN MENURUT GOLONGAN / STATUS ANGKATAN LAIN KEL  ( AL, AD MABES & KEMHAN)'
+COL_BPJS = 'PASIEN MENURUT GOLONGAN / STATUS PURNAWIRAWAN / BPJS UMUM (MANDIRI, PPPK, PEGAWAI SWASTA, PBI)'
+COL_UMUM = 'PASIEN MENURUT GOLONGAN / STATUS UMUM'
+
+# Kolom hasil golongan umur
+COL_UMUR_28HR = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR 28 HARI'
+COL_UMUR_1THN = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR 28 HR < 1 THN'
+COL_UMUR_1_4 = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR 1 - 4 THN'
+COL_UMUR_5_14 = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR 5 - 14 THN'
+COL_UMUR_15_25 = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR 15 - 25 THN'
+COL_UMUR_25_44 = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR 25 - 44 THN'
+COL_UMUR_45_64 = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR 45 - 64 THN'
+COL_UMUR_64 = 'PASIEN KELUAR ( HIDUP & MATI ) MENURUT GOL.UMUR >64 THN'
+
+# Kolom hasil jenis kelamin & jumlah
+COL_LK = 'PASIEN KELUAR (HIDUP & MATI) MENURUT SEX LK'
+COL_PR = 'PASIEN KELUAR (HIDUP & MATI) MENURUT SEX PR'
+COL_TOTAL = 'JUMLAH PASIEN KELUAR (LK+PR)'
+COL_MATI = 'JUMLAH PASIEN KELUAR MATI'
+
+NUMERIC_COLS = [
+    COL_AD, COL_PNS_AD, COL_KEL_AD, COL_AU_AL, COL_PNS_LAIN, COL_KEL_LAIN, COL_BPJS, COL_UMUM,
+    COL_UMUR_28HR, COL_UMUR_1THN, COL_UMUR_1_4, COL_UMUR_5_14,
+    COL_UMUR_15_25, COL_UMUR_25_44, COL_UMUR_45_64, COL_UMUR_64,
+    COL_LK, COL_PR, COL_TOTAL, COL_MATI,
+]
+
+# Mapping kolom berdasarkan ANGKATAN
+ANGKATAN_MAPPING = {
+    'AD': COL_AD,
+    'PNS AD': COL_PNS_AD,
+    'KEL AD': COL_KEL_AD,
+    'AU': COL_AU_AL,
+    'AL': COL_AU_AL,
+    'TNI': COL_AU_AL,
+    'PNS AL': COL_PNS_LAIN,
+    'KEMENTERIAN': COL_PNS_LAIN,
+    'KEL AL': COL_KEL_LAIN,
+}
+
+KELAMIN_LK = ['L', 'LK', 'LAKI', 'LAKI-LAKI', 'M', 'MALE']
+KELAMIN_PR = ['P', 'PR', 'PEREMPUAN', 'F', 'FEMALE', 'WANITA']
+ALASAN_MATI = ['MATI', 'MENINGGAL DUNIA', 'DEATH', 'DIED']
+
+# Kolom salinan kode sebelum di-expand (tidak ikut disimpan ke hasil)
+COL_KODE_ASLI = 'KODE ASLI'
+
+# Jumlah baris PUSKESAD per blok pencocokan; progress (dan cek pembatalan
+# job) dipanggil di setiap blok
+MATCH_BLOCK_ROWS = 100
+
+
+def read_template(filepath):
+    """
+    Baca Excel PUSKESAD dengan multi-level header (3 baris header, data
+    mulai dari baris 3); nama kolom digabung menjadi satu level.
+    """
+    df = pd.read_excel(filepath, header=[0, 1, 2])
+
+    # Gabungkan nama kolom yang tidak kosong
+    new_columns = []
+    for col in df.columns:
+        # col adalah tuple (level0, level1, level2)
+        col_parts = [str(c).strip() for c in col if not str(c).startswith('Unnamed')]
+        col_name = ' '.join(col_parts) if col_parts else str(col[0])
+        new_columns.append(col_name)
+
+    df.columns = new_columns
+    return df
+
+
+def find_icd_column(columns, allow_kode=False):
+    """
+    Kolom NO DAFTAR TERINCI / Kode ICD pada template PUSKESAD (None jika
+    tidak ada). allow_kode juga menerima kolom bernama 'kode' saja.
+    """
+    for col in columns:
+        col_lower = col.lower().strip()
+        if 'no daftar terinci' in col_lower or 'kode icd' in col_lower or (allow_kode and col_lower == 'kode'):
+            return col
+    return None
+
+
+def clean_template(df_template, icd_col):
+    """
+    Expand kode ICD di kolom icd_col (tetap satu baris, kode dipisah koma)
+    dan sisipkan kolom KODE ASLI setelahnya.
+
+    Mengembalikan (DataFrame baru, total kode hasil expand).
+    """
+    df_cleaned = df_template.copy()
+
+    cols = list(df_cleaned.columns)
+    icd_col_idx = cols.index(icd_col)
+
+    # Simpan kode asli terlebih dahulu
+    kode_asli_series = df_cleaned[icd_col].copy()
+
+    # Setiap spesifikasi unik cukup di-expand sekali
+    df_cleaned[icd_col], total_expanded = expand_icd_column(df_cleaned[icd_col])
+
+    cols.insert(icd_col_idx + 1, COL_KODE_ASLI)
+    df_cleaned[COL_KODE_ASLI] = kode_asli_series
+    return df_cleaned[cols], total_expanded
+
+
+def prepare_output(df_result):
+    """
+    Hasil untuk disimpan: tanpa KODE ASLI. Nilai inf dikosongkan oleh
+    excel_export.write_excel saat ditulis (tanpa menyalin tabel di sini).
+    """
+    return df_result.drop(columns=[COL_KODE_ASLI], errors='ignore')
+
+
+def _text(df_mapping, col, default):
+    """Kolom mapping sebagai teks strip + upper (default jika kolom tidak ada)"""
+    if col not in df_mapping.columns:
+        return pd.Series(default, index=df_mapping.index, dtype=object)
+    return df_mapping[col].map(str).str.strip().str.upper()
+
+
+def _usia(df_mapping, col):
+    """Kolom usia sebagai bilangan bulat (0 jika kosong / tidak valid)"""
+    if col not in df_mapping.columns:
+        return np.zeros(len(df_mapping))
+    return to_usia(df_mapping[col].map(str).str.strip())
+
+
+def classify_mapping(df_mapping, columns):
+    """
+    Indikator 0/1 setiap baris mapping untuk kolom hasil yang ada di
+    columns (kolom template PUSKESAD). Aturannya sama dengan loop lama:
+    golongan dari ANGKATAN (LAIN/PPPK menurut jenis pembayaran), tambahan
+    BPJS/UMUM dari jenis pembayaran, golongan umur, jenis kelamin, dan
+    status mati.
+    """
+    columns = set(columns)
+    angkatan = _text(df_mapping, 'angkatan', '')
+    jenis_pembayaran = _text(df_mapping, 'jenis_pembayaran_', '')
+
+    # === GOLONGAN / STATUS ===
+    bayar_bpjs = (
+        jenis_pembayaran.str.contains('BPJS', regex=False)
+        | jenis_pembayaran.str.contains('DINAS', regex=False)
+    ).to_numpy()
+    bayar_umum = jenis_pembayaran.str.contains('UMUM', regex=False).to_numpy()
+    lain = (
+        angkatan.str.contains('LAIN', regex=False) | angkatan.str.contains('PPPK', regex=False)
+    ).to_numpy()
+
+    target = angkatan.map(ANGKATAN_MAPPING).to_numpy(dtype=object)
+    tanpa_target = pd.isna(target)
+    target[tanpa_target & lain & bayar_bpjs] = COL_BPJS
+    target[tanpa_target & lain & ~bayar_bpjs] = COL_UMUM
+
+    indikator = {}
+    for col in NUMERIC_COLS:
+        if col in columns:
+            indikator[col] = target == col
+
+    # Tambahan: kolom BPJS/UMUM dari jenis pembayaran (jika belum jadi target)
+    if COL_BPJS in columns:
+        indikator[COL_BPJS] = indikator[COL_BPJS] | (bayar_bpjs & (target != COL_BPJS))
+    if COL_UMUM in columns:
+        indikator[COL_UMUM] = indikator[COL_UMUM] | (~bayar_bpjs & bayar_umum & (target != COL_UMUM))
+
+    # === UMUR === (prioritas: tahun > bulan > hari)
+    tahun = _usia(df_mapping, 'usia_tahun')
+    bulan = _usia(df_mapping, 'usia_bulan')
+    hari = _usia(df_mapping, 'usia_hari')
+    bayi = tahun == 0
+    umur_cols = [
+        COL_UMUR_28HR, COL_UMUR_1THN, COL_UMUR_1_4, COL_UMUR_5_14,
+        COL_UMUR_15_25, COL_UMUR_25_44, COL_UMUR_45_64, COL_UMUR_64,
+    ]
+    conditions = [
+        bayi & (bulan == 0) & (hari > 0) & (hari <= 28),
+        bayi & (((bulan > 0) & (bulan < 12)) | ((bulan == 0) & (hari > 28))),
+        (tahun >= 1) & (tahun <= 4),
+        (tahun >= 5) & (tahun <= 14),
+        (tahun >= 15) & (tahun <= 25),
+        (tahun > 25) & (tahun <= 44),
+        (tahun >= 45) & (tahun <= 64),
+        tahun > 64,
+    ]
+    umur = np.select(conditions, range(len(umur_cols)), default=-1)
+    for pos, col in enumerate(umur_cols):
+        if col in columns:
+            indikator[col] = umur == pos
+
+    # === JENIS KELAMIN ===
+    kelamin = _text(df_mapping, 'kelamin', '')
+    if COL_LK in columns:
+        indikator[COL_LK] = kelamin.isin(KELAMIN_LK).to_numpy()
+    if COL_PR in columns:
+        indikator[COL_PR] = kelamin.isin(KELAMIN_PR).to_numpy()
+
+    # === ALASAN PULANG (MENINGGAL) ===
+    alasan_pulang = _text(df_mapping, 'alasan_pulang', '')
+    if COL_MATI in columns:
+        indikator[COL_MATI] = (
+            alasan_pulang.str.contains('MENINGGAL', regex=False) | alasan_pulang.isin(ALASAN_MATI)
+        ).to_numpy()
+
+    # Kolom jumlah (LK+PR) dihitung setelah agregasi, bukan per baris
+    indikator.pop(COL_TOTAL, None)
+
+    return pd.DataFrame(
+        {col: np.asarray(values, dtype='int64') for col, values in indikator.items()},
+        index=range(len(df_mapping)),
+    )
+
+
+def count_puskesad(cells, columns, mapping_index, progress=None, start=0.0, end=1.0):
+    """
+    Matriks hitungan (baris PUSKESAD x kolom hasil) untuk kolom kode cells.
+
+    Kolom jumlah (LK+PR) tidak termasuk; hasil beberapa bagian mapping
+    boleh dijumlahkan langsung sebelum diterapkan dengan apply_counts.
+    Baris PUSKESAD dicocokkan per blok MATCH_BLOCK_ROWS baris; progress
+    (opsional) dipanggil per blok dengan nilai antara start dan end.
+    """
+    cells = pd.Series(cells, dtype=object).reset_index(drop=True)
+    indikator = classify_mapping(mapping_index.df, columns)
+    matcher = IcdMatcher(mapping_index.uniques)
+
+    blocks = range(0, len(cells), MATCH_BLOCK_ROWS)
+    partials = []
+    for done, lo in enumerate(blocks):
+        hi = min(lo + MATCH_BLOCK_ROWS, len(cells))
+        if progress:
+            progress(start + (end - start) * done / len(blocks), f"Mencocokkan baris {lo + 1}-{hi} dari {len(cells)}...")
+        row_pos, map_pos = match_mapping_rows(cells.iloc[lo:hi], mapping_index, matcher=matcher)
+        partials.append(indikator.iloc[map_pos].groupby(row_pos + lo).sum())
+
+    counts = pd.concat(partials) if partials else indikator.iloc[:0]
+    return counts.reindex(range(len(cells)), fill_value=0).astype('int64')
+
+
+def apply_counts(df_template, counts):
+    """Tulis matriks hitungan ke salinan template dan hitung kolom LK+PR"""
+    df_result = df_template.copy()
+
+    # Inisialisasi kolom numerik dengan 0
+    for col in NUMERIC_COLS:
+        if col in df_result.columns:
+            df_result[col] = 0
+
+    for col in counts.columns:
+        df_result[col] = df_result[col].to_numpy() + counts[col].to_numpy(dtype='int64')
+
+    # === HITUNG JUMLAH PASIEN KELUAR (LK+PR) ===
+    if COL_LK in df_result.columns and COL_PR in df_result.columns and COL_TOTAL in df_result.columns:
+        df_result[COL_TOTAL] = df_result[COL_LK] + df_result[COL_PR]
+
+    return df_result
+
+
+def hitung_puskesad(df_template, icd_col, mapping_index, progress=None):
+    """
+    Hitung tabel PUSKESAD dari data mapping.
+
+    df_template adalah data PUSKESAD (kolom kode berisi kode dipisah koma,
+    biasanya hasil clean & expand); mapping_index adalah MappingIndex atas
+    seluruh tabel mapping. progress (opsional) dipanggil sebagai
+    progress(value, text).
+    """
+    if progress:
+        progress(0.5, "Mengklasifikasi & mencocokkan data mapping...")
+    counts = count_puskesad(
+        df_template[icd_col], df_template.columns, mapping_index, progress=progress, start=0.5, end=0.9
+    )
+
+    if progress:
+        progress(0.9, "Menjumlahkan hasil per baris...")
+    return apply_counts(df_template, counts)
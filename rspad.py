@@ -0,0 +1,274 @@
+"""
+Entry point baris perintah (tanpa GUI) untuk optimasi SIRS dan PUSKESAD.
+
+Contoh:
+    python -m rspad sirs --template excel/sirs.xlsx --db database/mapping.db --out hasil.xlsx
+    python -m rspad puskesad --template excel/templates/ --out excel/hasil/
+
+--template boleh berupa satu file atau folder. Semua file Excel di dalam
+folder diproses dalam satu pemanggilan dengan data mapping yang dimuat
+sekali. Modul ini sengaja tidak mengimpor tkinter / customtkinter agar
+cepat dijalankan di server.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+from db import DB_PATH, get_connection
+from excel_cache import read_cached
+from excel_export import write_excel
+from mapping_index import load_mapping_index
+from parallel import hitung_puskesad_parallel, hitung_sirs_parallel
+import puskesad_engine
+import sirs_engine
+from sirs_summary import hitung_sirs_incremental
+
+ENGINE_PANDAS = "pandas"
+ENGINE_SQL = "sql"
+ENGINE_INCREMENTAL = "incremental"
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+
+class CliError(Exception):
+    """Kesalahan input yang menghentikan seluruh proses (kode keluar 2)"""
+
+
+def list_templates(path):
+    """Daftar file template: file itu sendiri, atau semua file Excel di folder"""
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(EXCEL_EXTENSIONS) and not name.startswith('~$')
+        )
+        if not files:
+            raise CliError(f"Tidak ada file Excel di folder: {path}")
+        return files
+    if not os.path.isfile(path):
+        raise CliError(f"File template tidak ditemukan: {path}")
+    return [path]
+
+
+def output_path(template, out, prefix, many):
+    """
+    File hasil untuk satu template. out adalah file .xlsx (hanya untuk satu
+    template) atau folder; nama file di folder: <prefix>_Hasil_<nama>.xlsx.
+    """
+    if not many and out.lower().endswith('.xlsx'):
+        folder = os.path.dirname(out)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        return out
+
+    os.makedirs(out, exist_ok=True)
+    name = os.path.splitext(os.path.basename(template))[0]
+    return os.path.join(out, f"{prefix}_Hasil_{name}.xlsx")
+
+
+def read_template(template, reader, kind, args):
+    """Baca template lewat cache hasil parse (kecuali --no-cache)"""
+    if args.no_cache:
+        return reader(template)
+    return read_cached(template, reader, kind)
+
+
+def make_progress(verbose):
+    """Callback progress(value, text) yang mencetak ke stderr, atau None"""
+    if not verbose:
+        return None
+
+    def progress(value, text):
+        print(f"  [{int(value * 100):3d}%] {text}", file=sys.stderr)
+
+    return progress
+
+
+def check_mapping_table(db_path):
+    """Koneksi ke database dan daftar kolom tabel mapping"""
+    if not os.path.exists(db_path):
+        raise CliError(f"Database tidak ditemukan: {db_path}")
+
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='mapping'")
+    if not cursor.fetchone():
+        raise CliError(f"Tabel 'mapping' tidak ditemukan di database: {db_path}")
+
+    cursor.execute("PRAGMA table_info(mapping)")
+    return conn, [col[1] for col in cursor.fetchall()]
+
+
+# ============================ SIRS ============================
+
+def load_sirs_mapping(db_path, engine):
+    """
+    Siapkan data mapping SIRS sekali untuk semua template.
+
+    Mengembalikan fungsi hitung(df_template, icd_col, workers, progress).
+    """
+    conn, column_names = check_mapping_table(db_path)
+    columns = sirs_engine.find_mapping_columns(column_names)
+    missing_cols = sirs_engine.missing_mapping_columns(columns)
+    if missing_cols:
+        raise CliError(
+            f"Kolom berikut tidak ditemukan di database: {', '.join(missing_cols)} "
+            f"(kolom yang tersedia: {', '.join(column_names)})"
+        )
+
+    col_kode_icd = columns['kode_icd']
+    if engine in (ENGINE_SQL, ENGINE_INCREMENTAL):
+        cursor = conn.cursor()
+        cursor.execute(
+            f'SELECT EXISTS(SELECT 1 FROM mapping WHERE "{col_kode_icd}" IS NOT NULL AND "{col_kode_icd}" != \'\')'
+        )
+        if not cursor.fetchone()[0]:
+            raise CliError("Tidak ada data di tabel mapping!")
+
+        calculate = hitung_sirs_incremental if engine == ENGINE_INCREMENTAL else sirs_engine.hitung_sirs_sql
+
+        def hitung(df_template, icd_col, workers, progress):
+            return calculate(df_template, conn, icd_col, columns, progress=progress)
+
+        return hitung
+
+    mapping_index = load_mapping_index(
+        db_path, sirs_engine.sirs_mapping_query(columns), columns=sirs_engine.MAPPING_QUERY_COLUMNS
+    )
+    df_mapping = mapping_index.df
+    if df_mapping.empty:
+        raise CliError("Tidak ada data di tabel mapping!")
+
+    def hitung(df_template, icd_col, workers, progress):
+        if workers > 1:
+            return hitung_sirs_parallel(
+                df_template, df_mapping, icd_col, workers=workers, progress=progress, index=mapping_index
+            )
+        return sirs_engine.hitung_sirs(df_template, df_mapping, icd_col, progress=progress, index=mapping_index)
+
+    return hitung
+
+
+def process_sirs(template, hitung, args):
+    """Hitung satu template SIRS; mengembalikan (file hasil, jumlah baris)"""
+    df_sirs = read_template(template, pd.read_excel, "sirs", args)
+
+    icd_col = sirs_engine.find_icd_column(df_sirs)
+    if icd_col is None:
+        raise ValueError("Kolom 'Kode ICD' tidak ditemukan di file Excel!")
+
+    df_sirs = hitung(df_sirs, icd_col, args.workers, make_progress(args.verbose))
+    filepath = output_path(template, args.out, "SIRS", args.many)
+    write_excel(df_sirs, filepath, 'SIRS')
+    return filepath, len(df_sirs)
+
+
+# ========================== PUSKESAD ==========================
+
+def load_puskesad_mapping(db_path):
+    """Index mapping PUSKESAD, dimuat sekali untuk semua template"""
+    check_mapping_table(db_path)
+    return load_mapping_index(db_path, "SELECT * FROM mapping")
+
+
+def process_puskesad(template, mapping_index, args):
+    """Clean & hitung satu template PUSKESAD; mengembalikan (file hasil, jumlah baris)"""
+    df = read_template(template, puskesad_engine.read_template, "puskesad", args)
+
+    if not args.no_clean:
+        clean_col = puskesad_engine.find_icd_column(df.columns, allow_kode=True)
+        if clean_col is None:
+            raise ValueError("Kolom 'NO DAFTAR TERINCI' tidak ditemukan!")
+        df, _ = puskesad_engine.clean_template(df, clean_col)
+
+    icd_col = puskesad_engine.find_icd_column(df.columns)
+    if icd_col is None:
+        raise ValueError("Kolom 'NO DAFTAR TERINCI' tidak ditemukan!")
+
+    progress = make_progress(args.verbose)
+    if args.workers > 1:
+        df_result = hitung_puskesad_parallel(df, icd_col, mapping_index, workers=args.workers, progress=progress)
+    else:
+        df_result = puskesad_engine.hitung_puskesad(df, icd_col, mapping_index, progress=progress)
+
+    filepath = output_path(template, args.out, "PUSKESAD", args.many)
+    write_excel(puskesad_engine.prepare_output(df_result), filepath, 'PUSKESAD')
+    return filepath, len(df_result)
+
+
+# ============================ CLI ============================
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m rspad",
+        description="Optimasi SIRS / PUSKESAD tanpa GUI",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("--template", required=True, help="file template Excel atau folder berisi template")
+        sub.add_argument("--db", default=DB_PATH, help=f"database mapping (default: {DB_PATH})")
+        sub.add_argument("--out", required=True, help="file hasil .xlsx (satu template) atau folder hasil")
+        sub.add_argument("--workers", type=int, default=1, help="jumlah proses worker (default: 1)")
+        sub.add_argument("--no-cache", action="store_true", help="jangan pakai / buat cache hasil parse template")
+        sub.add_argument("-v", "--verbose", action="store_true", help="tampilkan progress per tahap")
+
+    sirs = subparsers.add_parser("sirs", help="hitung tabel SIRS")
+    add_common(sirs)
+    sirs.add_argument(
+        "--engine", choices=[ENGINE_PANDAS, ENGINE_SQL, ENGINE_INCREMENTAL], default=ENGINE_PANDAS,
+        help="engine perhitungan (default: pandas)",
+    )
+
+    puskesad = subparsers.add_parser("puskesad", help="hitung tabel PUSKESAD")
+    add_common(puskesad)
+    puskesad.add_argument(
+        "--no-clean", action="store_true",
+        help="jangan clean & expand kode ICD sebelum dihitung",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    try:
+        templates = list_templates(args.template)
+        args.many = len(templates) > 1 or os.path.isdir(args.template)
+        if args.many and args.out.lower().endswith('.xlsx'):
+            raise CliError("--out harus berupa folder jika --template berisi beberapa file")
+
+        started = time.perf_counter()
+        if args.command == "sirs":
+            hitung = load_sirs_mapping(args.db, args.engine)
+            process = lambda template: process_sirs(template, hitung, args)
+        else:
+            mapping_index = load_puskesad_mapping(args.db)
+            process = lambda template: process_puskesad(template, mapping_index, args)
+        print(f"Data mapping dimuat ({time.perf_counter() - started:.2f} detik)", file=sys.stderr)
+    except (CliError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    failed = 0
+    for template in templates:
+        started = time.perf_counter()
+        try:
+            filepath, rows = process(template)
+        except Exception as e:
+            failed += 1
+            print(f"GAGAL  {template}: {e}", file=sys.stderr)
+            continue
+        print(f"OK     {template} -> {filepath} ({rows} baris, {time.perf_counter() - started:.2f} detik)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    # Diperlukan agar proses worker (--workers) bisa berjalan di build .exe
+    multiprocessing.freeze_support()
+    sys.exit(main())
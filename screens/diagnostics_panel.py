@@ -0,0 +1,156 @@
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import diagnostics
+
+# Interval refresh tabel tahap (ms), hanya saat panel terbuka
+REFRESH_MS = 500
+
+
+class DiagnosticsPanel(ctk.CTkFrame):
+    """Panel lipat berisi catatan waktu per tahap (lihat diagnostics.py)"""
+
+    def __init__(self, master):
+        super().__init__(master)
+
+        self.expanded = False
+        self.shown_version = None
+        self.records = {}
+
+        self.btn_toggle = ctk.CTkButton(
+            self, text="▶ Diagnostics", command=self.toggle, fg_color="gray", width=140
+        )
+        self.btn_toggle.pack(anchor="w", padx=5, pady=5)
+
+        self.body = ctk.CTkFrame(self)
+
+        # ================= PENGATURAN & AKSI =================
+        option_bar = ctk.CTkFrame(self.body, fg_color="transparent")
+        option_bar.pack(fill="x", padx=5, pady=5)
+
+        self.memory_var = ctk.BooleanVar(value=diagnostics.memory_tracing())
+        ctk.CTkCheckBox(
+            option_bar, text="Ukur memori (tracemalloc, proses lebih lambat)",
+            variable=self.memory_var, command=lambda: diagnostics.set_memory_tracing(self.memory_var.get())
+        ).pack(side="left", padx=5)
+
+        self.profile_var = ctk.BooleanVar(value=diagnostics.profiling())
+        ctk.CTkCheckBox(
+            option_bar, text="Profil cProfile",
+            variable=self.profile_var, command=lambda: diagnostics.set_profiling(self.profile_var.get())
+        ).pack(side="left", padx=5)
+
+        ctk.CTkButton(option_bar, text="Bersihkan", command=diagnostics.clear, width=90).pack(side="right", padx=5)
+        ctk.CTkButton(option_bar, text="Export JSON", command=self.export_json, width=110).pack(side="right", padx=5)
+
+        # ================= TABEL TAHAP =================
+        columns = ("thread", "waktu", "cpu", "masuk", "keluar", "memori", "status")
+        self.tree = ttk.Treeview(self.body, columns=columns, height=8)
+        self.tree.heading("#0", text="Tahap")
+        self.tree.column("#0", width=320, anchor="w")
+        headings = {
+            "thread": ("Thread", 110), "waktu": ("Waktu (dtk)", 90), "cpu": ("CPU (dtk)", 80),
+            "masuk": ("Baris masuk", 90), "keluar": ("Baris keluar", 90),
+            "memori": ("Memori puncak (MB)", 120), "status": ("Status", 200),
+        }
+        for col, (text, width) in headings.items():
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="w")
+        self.tree.pack(fill="x", padx=5, pady=5)
+        self.tree.bind("<<TreeviewSelect>>", self.show_profile)
+
+        # Ringkasan cProfile tahap yang dipilih
+        self.profile_text = tk.Text(self.body, height=10, font=("Courier", 9), wrap="none")
+        self.profile_text.pack(fill="x", padx=5, pady=5)
+
+        self.after(REFRESH_MS, self.refresh)
+
+    def toggle(self):
+        self.expanded = not self.expanded
+        if self.expanded:
+            self.btn_toggle.configure(text="▼ Diagnostics")
+            self.body.pack(fill="x", padx=5, pady=5)
+            self.shown_version = None
+        else:
+            self.btn_toggle.configure(text="▶ Diagnostics")
+            self.body.pack_forget()
+
+    # ======================================================
+    # REFRESH (POLL CATATAN DI MAIN THREAD)
+    # ======================================================
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+
+        if self.expanded:
+            # Pengaturan bersifat global (bisa diubah dari panel layar lain)
+            self.memory_var.set(diagnostics.memory_tracing())
+            self.profile_var.set(diagnostics.profiling())
+
+            version = diagnostics.version()
+            if version != self.shown_version:
+                self.shown_version = version
+                self.show_records()
+
+        self.after(REFRESH_MS, self.refresh)
+
+    def show_records(self):
+        # Urut waktu mulai: tahap luar tampil sebelum tahap di dalamnya
+        records = sorted(diagnostics.records(), key=lambda record: (record.started, record.id))
+        self.records = {str(record.id): record for record in records}
+
+        self.tree.delete(*self.tree.get_children())
+        for record in records:
+            self.tree.insert(
+                "", "end", iid=str(record.id),
+                text="    " * record.depth + record.name,
+                values=self._row_values(record),
+            )
+        if records:
+            self.tree.see(str(records[-1].id))
+
+    def _row_values(self, record):
+        def number(value):
+            return "" if value is None else value
+
+        memory = "" if record.peak_bytes is None else f"{record.peak_mb:.1f}"
+        status = record.error or ("OK + profil" if record.profile else "OK")
+        return (
+            record.thread, f"{record.wall:.3f}", f"{record.cpu:.3f}",
+            number(record.rows_in), number(record.rows_out), memory, status,
+        )
+
+    def show_profile(self, event=None):
+        selected = self.tree.selection()
+        record = self.records.get(selected[0]) if selected else None
+
+        self.profile_text.delete("1.0", "end")
+        if record is None:
+            return
+        if record.profile:
+            self.profile_text.insert("1.0", record.profile)
+        elif record.depth:
+            # Profil hanya dibuat untuk tahap terluar di setiap thread
+            self.profile_text.insert("1.0", "Lihat profil tahap luarnya.")
+        else:
+            self.profile_text.insert("1.0", "Tidak ada profil. Aktifkan 'Profil cProfile' lalu jalankan ulang proses.")
+
+    # ======================================================
+    # EXPORT JSON
+    # ======================================================
+    def export_json(self):
+        filepath = filedialog.asksaveasfilename(
+            title="Export Diagnostics",
+            defaultextension=".json",
+            filetypes=[("JSON Files", "*.json")],
+            initialfile="diagnostics.json",
+        )
+        if not filepath:
+            return
+
+        try:
+            count = diagnostics.export_json(filepath)
+        except OSError as e:
+            messagebox.showerror("Error", f"Gagal menyimpan file:\n\n{e}")
+            return
+        messagebox.showinfo("Berhasil", f"{count} tahap diexport ke:\n{filepath}")
@@ -0,0 +1,99 @@
+import tkinter as tk
+import time
+from tkinter import ttk, messagebox
+from jobs import get_job_manager
+
+# Interval refresh daftar job (ms)
+REFRESH_MS = 500
+
+class JobsScreen(tk.Frame):
+    """Daftar job latar belakang (upload, optimasi, export) dengan tombol batal"""
+
+    def __init__(self, master):
+        super().__init__(master)
+
+        title = ttk.Label(self, text="Antrian Job", font=("Arial", 16))
+        title.pack(pady=10)
+
+        # ================= TOMBOL =================
+        btn_frame = tk.Frame(self)
+        btn_frame.pack(pady=5)
+
+        btn_cancel = ttk.Button(btn_frame, text="Batalkan Job Terpilih", command=self.cancel_selected)
+        btn_cancel.grid(row=0, column=0, padx=5)
+
+        btn_clear = ttk.Button(btn_frame, text="Bersihkan yang Selesai", command=self.clear_finished)
+        btn_clear.grid(row=0, column=1, padx=5)
+
+        # ================= TABEL JOB =================
+        columns = ("id", "nama", "jenis", "status", "durasi", "progress")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        headings = {
+            "id": ("#", 40), "nama": ("Job", 220), "jenis": ("Jenis", 70),
+            "status": ("Status", 90), "durasi": ("Durasi", 70), "progress": ("Progress", 360),
+        }
+        for col, (text, width) in headings.items():
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.after(REFRESH_MS, self.refresh)
+
+    # ======================================================
+    # REFRESH (POLL JOB MANAGER DI MAIN THREAD)
+    # ======================================================
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+
+        jobs = get_job_manager().jobs()
+        current = set(self.tree.get_children())
+        for job in jobs:
+            iid = str(job.id)
+            values = self._row_values(job)
+            if iid in current:
+                self.tree.item(iid, values=values)
+                current.discard(iid)
+            else:
+                self.tree.insert("", "end", iid=iid, values=values)
+
+        # Job yang sudah dibersihkan dari manager
+        for iid in current:
+            self.tree.delete(iid)
+
+        self.after(REFRESH_MS, self.refresh)
+
+    def _row_values(self, job):
+        if job.started is None:
+            duration = ""
+        else:
+            duration = f"{(job.finished or time.time()) - job.started:.1f} dtk"
+
+        if job.error is not None:
+            progress = str(job.error)
+        elif job.text:
+            progress = f"{int(job.value * 100)}% - {job.text}"
+        else:
+            progress = ""
+
+        kind = "Tulis DB" if job.writer else "Baca"
+        return (job.id, job.name, kind, job.status, duration, progress)
+
+    # ======================================================
+    # AKSI
+    # ======================================================
+    def cancel_selected(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showwarning("Perhatian", "Pilih job yang ingin dibatalkan!")
+            return
+
+        manager = get_job_manager()
+        jobs = {str(job.id): job for job in manager.jobs()}
+        for iid in selected:
+            job = jobs.get(iid)
+            if job is not None and not job.done:
+                manager.cancel(job)
+
+    def clear_finished(self):
+        get_job_manager().clear_finished()
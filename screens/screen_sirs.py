@@ -1,8 +1,29 @@
 import customtkinter as ctk
 from tkinter import messagebox, filedialog, ttk
 import pandas as pd
-import sqlite3
-import threading
+from db import get_connection
+from diagnostics import instrument, stage
+from excel_cache import read_cached
+from excel_export import write_excel
+from jobs import Cancelled, get_job_manager
+from progress_channel import ProgressChannel, describe
+from pdf_export import export_pdf, sirs_sections
+from sirs_engine import (
+    MAPPING_QUERY_COLUMNS, find_icd_column, find_mapping_columns, get_sirs_column,
+    hitung_sirs, hitung_sirs_sql, missing_mapping_columns, sirs_mapping_query,
+)
+from mapping_index import load_mapping_index
+from sirs_summary import hitung_sirs_incremental
+from preview_search import PreviewSearch, PAGE_SIZE
+from parallel import hitung_sirs_parallel
+from screens.diagnostics_panel import DiagnosticsPanel
+
+# Pilihan engine perhitungan SIRS
+ENGINE_PANDAS = "Pandas"
+ENGINE_SQL = "SQL (SQLite)"
+ENGINE_INCREMENTAL = "Inkremental"
+# Pilihan jumlah proses worker ("1" = dihitung di thread ini saja)
+WORKER_CHOICES = ["1", "2", "4", "8"]
 
 class SirsScreen(ctk.CTkFrame):
     def __init__(self, master, db_path="database/mapping.db"):
@@ -12,7 +33,7 @@ class SirsScreen(ctk.CTkFrame):
         self.file_path = None
         self.df_preview = None
         self.current_font_size = 11
-        self.is_processing = False  # Flag untuk mencegah double click
+        self.current_job = None  # Job terakhir layar ini (lihat jobs.py)
         
         # === TITLE ===
         title = ctk.CTkLabel(self, text="Optimasi SIRS", font=("Arial", 20))
@@ -30,6 +51,7 @@ class SirsScreen(ctk.CTkFrame):
         entry_search = ctk.CTkEntry(top_bar, placeholder_text="Cari...", textvariable=self.search_var, width=200)
         entry_search.pack(side="left", padx=10)
         entry_search.bind("<KeyRelease>", self.filter_preview)
+        self.preview_search = PreviewSearch(self, self.show_rows)
         # Zoom Buttons
         btn_zoom_in = ctk.CTkButton(top_bar, text="+", width=40, command=lambda: self.change_font_size(1))
         btn_zoom_in.pack(side="right", padx=5)
@@ -43,9 +65,29 @@ class SirsScreen(ctk.CTkFrame):
         self.preview_frame = ctk.CTkFrame(self)
         self.preview_frame.pack(pady=10, fill="both", expand=True)
 
-        # === RUN BUTTON ===
-        btn_run = ctk.CTkButton(self, text="Mulai Optimasi", command=self.run_process)
-        btn_run.pack(pady=15)
+        # === RUN BAR (Engine + Run) ===
+        run_bar = ctk.CTkFrame(self, fg_color="transparent")
+        run_bar.pack(pady=15)
+
+        ctk.CTkLabel(run_bar, text="Engine:").pack(side="left", padx=5)
+        self.engine_var = ctk.StringVar(value=ENGINE_PANDAS)
+        engine_menu = ctk.CTkOptionMenu(
+            run_bar, values=[ENGINE_PANDAS, ENGINE_SQL, ENGINE_INCREMENTAL], variable=self.engine_var, width=130
+        )
+        engine_menu.pack(side="left", padx=5)
+
+        ctk.CTkLabel(run_bar, text="Worker:").pack(side="left", padx=5)
+        self.workers_var = ctk.StringVar(value=WORKER_CHOICES[0])
+        workers_menu = ctk.CTkOptionMenu(
+            run_bar, values=WORKER_CHOICES, variable=self.workers_var, width=70
+        )
+        workers_menu.pack(side="left", padx=5)
+
+        btn_run = ctk.CTkButton(run_bar, text="Mulai Optimasi", command=self.run_process)
+        btn_run.pack(side="left", padx=5)
+
+        btn_cancel = ctk.CTkButton(run_bar, text="Batalkan", command=self.cancel_job, fg_color="gray", width=90)
+        btn_cancel.pack(side="left", padx=5)
         
         # === PROGRESS BAR & STATUS ===
         self.progress_frame = ctk.CTkFrame(self)
@@ -62,6 +104,10 @@ class SirsScreen(ctk.CTkFrame):
         self.progress_detail = ctk.CTkLabel(self.progress_frame, text="", font=("Arial", 9))
         self.progress_detail.pack(pady=2)
 
+        # Progress dari thread worker dibaca dengan interval tetap
+        self.progress_channel = ProgressChannel()
+        self.progress_channel.bind(self, self._apply_progress)
+
         # === SAVE BUTTON ===
         btn_save = ctk.CTkButton(self, text="Simpan Hasil", command=self.save_result)
         btn_save.pack(pady=5)
@@ -73,6 +119,12 @@ class SirsScreen(ctk.CTkFrame):
         # === EXPORT PDF BUTTON ===
         btn_export_pdf = ctk.CTkButton(self, text="Export ke PDF", command=self.export_to_pdf, fg_color="orange")
         btn_export_pdf.pack(pady=5)
+        self.pdf_skip_zero_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self, text="PDF: lewati kode ICD yang semua nilainya 0", variable=self.pdf_skip_zero_var).pack(pady=2)
+
+        # === DIAGNOSTICS (waktu per tahap) ===
+        self.diagnostics_panel = DiagnosticsPanel(self)
+        self.diagnostics_panel.pack(fill="x", padx=10, pady=5)
 
     def upload_excel(self):
         filetypes = [("Excel Files", "*.xlsx"), ("Excel Files", "*.xls")]
@@ -85,7 +137,9 @@ class SirsScreen(ctk.CTkFrame):
         self.label_file.configure(text=f"File dipilih: {filepath}")
 
         try:
-            self.df_preview = pd.read_excel(filepath)
+            with stage("SIRS: baca template") as st:
+                self.df_preview = read_cached(filepath, pd.read_excel, "sirs")
+                st.rows_out = len(self.df_preview)
             self.show_preview(self.df_preview)
         except Exception as e:
             messagebox.showerror("Error", f"Gagal membaca file Excel!\n\n{e}")
@@ -120,24 +174,21 @@ class SirsScreen(ctk.CTkFrame):
             self.table.heading(col, text=col)
             self.table.column(col, width=150, anchor="w")
 
-        for _, row in df.head(300).iterrows():
+        self.show_rows(df.head(PAGE_SIZE))
+
+    @instrument("SIRS: isi Treeview", rows_in=lambda self, df: len(df))
+    def show_rows(self, df: pd.DataFrame):
+        """Ganti isi Treeview dengan baris df (satu halaman hasil)"""
+        self.table.delete(*self.table.get_children())
+        for row in df.itertuples(index=False, name=None):
             self.table.insert("", "end", values=list(row))
 
     def filter_preview(self, event=None):
+        """Cari di preview (debounce, dijalankan di thread terpisah)"""
         if self.df_preview is None:
             return
 
-        keyword = self.search_var.get().lower()
-
-        for item in self.table.get_children():
-            self.table.delete(item)
-
-        df_filtered = self.df_preview[
-            self.df_preview.apply(lambda row: row.astype(str).str.lower().str.contains(keyword).any(), axis=1)
-        ]
-
-        for _, row in df_filtered.head(300).iterrows():
-            self.table.insert("", "end", values=list(row))
+        self.preview_search.schedule(self.df_preview, self.search_var.get())
 
     def change_font_size(self, delta):
         self.current_font_size += delta
@@ -149,109 +200,7 @@ class SirsScreen(ctk.CTkFrame):
 
     def get_sirs_column(self, usia_tahun, usia_bulan, usia_hari, gender):
         """Menentukan kolom SIRS berdasarkan usia dan jenis kelamin"""
-        gender = str(gender).upper().strip()
-        
-        # Konversi ke integer, default 0
-        try:
-            usia_tahun = int(float(usia_tahun)) if pd.notna(usia_tahun) and str(usia_tahun).strip() != "" else 0
-        except:
-            usia_tahun = 0
-            
-        try:
-            usia_bulan = int(float(usia_bulan)) if pd.notna(usia_bulan) and str(usia_bulan).strip() != "" else 0
-        except:
-            usia_bulan = 0
-            
-        try:
-            usia_hari = int(float(usia_hari)) if pd.notna(usia_hari) and str(usia_hari).strip() != "" else 0
-        except:
-            usia_hari = 0
-
-        # LOGIKA BERDASARKAN USIA TAHUN (prioritas tertinggi)
-        if usia_tahun >= 85:
-            return f"<85 thn_{gender}"
-        
-        if 80 <= usia_tahun <= 84:
-            return f"80-84 thn_{gender}"
-        
-        if 75 <= usia_tahun <= 79:
-            return f"75-79 thn_{gender}"
-        
-        if 70 <= usia_tahun <= 74:
-            return f"70-74 thn_{gender}"
-        
-        if 65 <= usia_tahun <= 69:
-            return f"65-69 thn_{gender}"
-        
-        if 60 <= usia_tahun <= 64:
-            return f"60-64 thn_{gender}"
-        
-        if 55 <= usia_tahun <= 59:
-            return f"55-59 thn_{gender}"
-        
-        if 50 <= usia_tahun <= 54:
-            return f"50-54 thn_{gender}"
-        
-        if 45 <= usia_tahun <= 49:
-            return f"45-49 thn_{gender}"
-        
-        if 40 <= usia_tahun <= 44:
-            return f"40-44 thn_{gender}"
-        
-        if 35 <= usia_tahun <= 39:
-            return f"35-39 thn_{gender}"
-        
-        if 30 <= usia_tahun <= 34:
-            return f"30-34 thn_{gender}"
-        
-        if 25 <= usia_tahun <= 29:
-            return f"25-29 thn_{gender}"
-        
-        if 20 <= usia_tahun <= 24:
-            return f"20-24 thn_{gender}"
-        
-        if 15 <= usia_tahun <= 19:
-            return f"15-19 thn_{gender}"
-        
-        if 10 <= usia_tahun <= 14:
-            return f"10-14 thn_{gender}"
-        
-        if 5 <= usia_tahun <= 9:
-            return f"5-9 thn_{gender}"
-        
-        if 1 <= usia_tahun <= 4:
-            return f"1-4 thn_{gender}"
-
-        # JIKA USIA TAHUN = 0, CEK USIA BULAN
-        if usia_tahun == 0:
-            # Kategori berdasarkan bulan (untuk bayi)
-            if usia_bulan >= 12:
-                # Kalau bulan >= 12, seharusnya masuk tahun, tapi jaga-jaga
-                return f"6-11 bln_{gender}"
-            
-            if 6 <= usia_bulan <= 11:
-                return f"6-11 bln_{gender}"
-            
-            if 3 <= usia_bulan <= 5:
-                return f"3- <6 bln_{gender}"
-            
-            # Jika bulan < 3, cek hari
-            if usia_bulan >= 1 or usia_hari >= 29:
-                return f"29 hr- <30 bln_{gender}"
-            
-            # Kategori berdasarkan hari (untuk neonatus)
-            if 8 <= usia_hari <= 28:
-                return f"8-28 hr_{gender}"
-            
-            if 1 <= usia_hari <= 7:
-                return f"1-7 hr_{gender}"
-            
-            if usia_hari == 0:
-                # Bisa jadi < 1 hari (dalam jam)
-                return f"<1 Jam_{gender}"
-
-        # Default jika tidak masuk kategori
-        return None
+        return get_sirs_column(usia_tahun, usia_bulan, usia_hari, gender)
 
     def run_process(self):
         """Proses optimasi SIRS dengan membaca data dari database mapping"""
@@ -260,26 +209,42 @@ class SirsScreen(ctk.CTkFrame):
             messagebox.showwarning("Belum ada file", "Silakan upload file Excel terlebih dahulu.")
             return
         
-        if self.is_processing:
+        if self.is_busy():
             messagebox.showwarning("Sedang Proses", "Optimasi sedang berjalan, mohon tunggu...")
             return
         
-        # Jalankan proses di thread terpisah agar UI tidak freeze
-        thread = threading.Thread(target=self._run_process_thread, daemon=True)
-        thread.start()
+        # Jalankan proses sebagai job latar belakang agar UI tidak freeze
+        # (engine & jumlah worker dibaca di thread UI sebelum job dimulai).
+        # Engine inkremental menulis ringkasan ke database -> antrian penulis.
+        engine = self.engine_var.get()
+        workers = int(self.workers_var.get())
+        self.current_job = get_job_manager().submit(
+            f"Optimasi SIRS ({engine})",
+            lambda job: self._run_process_thread(job, engine, workers),
+            writer=engine == ENGINE_INCREMENTAL,
+            progress=self.update_progress,
+        )
+
+    def is_busy(self):
+        """True jika job layar ini masih antri / berjalan"""
+        return self.current_job is not None and not self.current_job.done
+
+    def cancel_job(self):
+        """Batalkan job layar ini (optimasi / simpan / export)"""
+        if self.is_busy():
+            get_job_manager().cancel(self.current_job)
     
-    def _run_process_thread(self):
-        """Thread worker untuk proses optimasi"""
-        self.is_processing = True
-        
+    @instrument("SIRS: optimasi")
+    def _run_process_thread(self, job, engine=ENGINE_PANDAS, workers=1):
+        """Job worker untuk proses optimasi (progress lewat job.report)"""
         # Tampilkan progress bar
         self.progress_frame.pack(pady=5, fill="x", padx=10)
-        self.update_progress(0, "Memulai proses optimasi...")
+        job.report(0, "Memulai proses optimasi...")
 
         try:
             # Koneksi ke database
-            self.update_progress(0.05, "Menghubungkan ke database...")
-            conn = sqlite3.connect(self.db_path)
+            job.report(0.05, "Menghubungkan ke database...")
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
             # Cek apakah tabel mapping ada
@@ -287,7 +252,6 @@ class SirsScreen(ctk.CTkFrame):
             table_exists = cursor.fetchone()
             
             if not table_exists:
-                conn.close()
                 self.show_error(
                     "Database Error", 
                     "Tabel 'mapping' tidak ditemukan di database!\n\n"
@@ -299,37 +263,19 @@ class SirsScreen(ctk.CTkFrame):
                 return
             
             # Ambil semua kolom dari tabel mapping
-            self.update_progress(0.1, "Memeriksa struktur tabel...")
+            job.report(0.1, "Memeriksa struktur tabel...")
             cursor.execute("PRAGMA table_info(mapping)")
             columns_info = cursor.fetchall()
             column_names = [col[1] for col in columns_info]
             
             # Cari nama kolom yang sesuai
-            def find_column(possible_names):
-                for possible in possible_names:
-                    for col in column_names:
-                        if col.lower().replace(" ", "").replace("_", "") == possible.lower().replace(" ", "").replace("_", ""):
-                            return col
-                return None
-            
-            col_kode_icd = find_column(["kode_icd", "KODE ICD", "kode icd", "KODE_ICD"])
-            col_kelamin = find_column(["kelamin", "KELAMIN", "jenis_kelamin", "JENIS KELAMIN"])
-            col_usia_tahun = find_column(["usia_tahun", "USIA TAHUN", "usia_thn", "USIA_TAHUN"])
-            col_usia_bulan = find_column(["usia_bulan", "USIA BULAN", "usia_bln", "USIA_BULAN"])
-            col_usia_hari = find_column(["usia_hari", "USIA HARI", "usia_hr", "USIA_HARI"])
-            col_alasan_pulang = find_column(["alasan_pulang", "ALASAN PULANG", "alasan pulang", "ALASAN_PULANG", "status_pulang", "STATUS PULANG"])
+            columns = find_mapping_columns(column_names)
+            col_kode_icd = columns['kode_icd']
             
             # Validasi kolom yang dibutuhkan
-            missing_cols = []
-            if not col_kode_icd:
-                missing_cols.append("KODE ICD")
-            if not col_kelamin:
-                missing_cols.append("KELAMIN")
-            if not col_usia_tahun:
-                missing_cols.append("USIA TAHUN")
+            missing_cols = missing_mapping_columns(columns)
             
             if missing_cols:
-                conn.close()
                 self.show_error(
                     "Kolom Tidak Ditemukan",
                     f"Kolom berikut tidak ditemukan di database:\n{', '.join(missing_cols)}\n\n"
@@ -337,174 +283,95 @@ class SirsScreen(ctk.CTkFrame):
                 )
                 return
             
-            # Baca data dari database
-            self.update_progress(0.15, "Membaca data dari database...")
-            query = f"""
-            SELECT "{col_kode_icd}", "{col_kelamin}", "{col_usia_tahun}", 
-                   "{col_usia_bulan}", "{col_usia_hari}", "{col_alasan_pulang}"
-            FROM mapping
-            WHERE "{col_kode_icd}" IS NOT NULL AND "{col_kode_icd}" != ''
-            """
-            
-            df_mapping = pd.read_sql_query(query, conn)
-            conn.close()
-            
-            # Rename kolom
-            df_mapping.columns = ['kode_icd', 'kelamin', 'usia_tahun', 'usia_bulan', 'usia_hari', 'alasan_pulang']
+            if engine in (ENGINE_SQL, ENGINE_INCREMENTAL):
+                # Agregasi langsung di SQLite; cukup cek ada data atau tidak
+                job.report(0.15, "Memeriksa data di database...")
+                cursor.execute(
+                    f'SELECT EXISTS(SELECT 1 FROM mapping WHERE "{col_kode_icd}" IS NOT NULL AND "{col_kode_icd}" != \'\')'
+                )
+                if not cursor.fetchone()[0]:
+                    self.show_warning("Data Kosong", "Tidak ada data di tabel mapping!")
+                    return
+                job.report(0.2, "Agregasi dijalankan di SQLite")
+            else:
+                # Baca data dari database, dipre-agregasi per kombinasi
+                # (kode, kelamin, usia, alasan pulang) memakai index idx_mapping_sirs
+                job.report(0.15, "Membaca data dari database...")
+                # Index kode ICD di-cache sampai tabel mapping berubah
+                with stage("SIRS: baca mapping") as st:
+                    mapping_index = load_mapping_index(
+                        self.db_path, sirs_mapping_query(columns), columns=MAPPING_QUERY_COLUMNS
+                    )
+                    df_mapping = mapping_index.df
+                    st.rows_out = len(df_mapping)
 
-            if df_mapping.empty:
-                self.show_warning("Data Kosong", "Tidak ada data di tabel mapping!")
-                return
+                if df_mapping.empty:
+                    self.show_warning("Data Kosong", "Tidak ada data di tabel mapping!")
+                    return
 
-            total_rows_db = len(df_mapping)
-            self.update_progress(0.2, f"Data mapping dimuat: {total_rows_db} baris")
+                total_rows_db = int(df_mapping['jumlah'].sum())
+                job.report(0.2, f"Data mapping dimuat: {total_rows_db} baris")
 
             # Copy dataframe SIRS
             df_sirs = self.df_preview.copy()
 
             # Pastikan kolom 'Kode ICD' ada
-            icd_col = None
-            for col in df_sirs.columns:
-                if col.lower().strip() == 'kode icd':
-                    icd_col = col
-                    break
+            icd_col = find_icd_column(df_sirs)
             
             if icd_col is None:
                 self.show_error("Error", "Kolom 'Kode ICD' tidak ditemukan di file Excel!")
                 return
 
-            # Definisi kolom SIRS
-            SIRS_COLUMNS = [
-                "<1 Jam_L", "<1 Jam_P", "1-23 jam_L", "1-23 jam_P",
-                "1-7 hr_L", "1-7 hr_P", "8-28 hr_L", "8-28 hr_P",
-                "29 hr- <30 bln_L", "29 hr- <30 bln_P",
-                "3- <6 bln_L", "3- <6 bln_P", "6-11 bln_L", "6-11 bln_P",
-                "1-4 thn_L", "1-4 thn_P", "5-9 thn_L", "5-9 thn_P",
-                "10-14 thn_L", "10-14 thn_P", "15-19 thn_L", "15-19 thn_P",
-                "20-24 thn_L", "20-24 thn_P", "25-29 thn_L", "25-29 thn_P",
-                "30-34 thn_L", "30-34 thn_P", "35-39 thn_L", "35-39 thn_P",
-                "40-44 thn_L", "40-44 thn_P", "45-49 thn_L", "45-49 thn_P",
-                "50-54 thn_L", "50-54 thn_P", "55-59 thn_L", "55-59 thn_P",
-                "60-64 thn_L", "60-64 thn_P", "65-69 thn_L", "65-69 thn_P",
-                "70-74 thn_L", "70-74 thn_P", "75-79 thn_L", "75-79 thn_P",
-                "80-84 thn_L", "80-84 thn_P", "<85 thn_L", "<85 thn_P"
-            ]
-
-            self.update_progress(0.25, "Menyiapkan kolom SIRS...")
-            # Pastikan semua kolom SIRS ada, reset ke 0
-            for col in SIRS_COLUMNS:
-                if col not in df_sirs.columns:
-                    df_sirs[col] = 0
-                else:
-                    df_sirs[col] = 0
-
-            # Reset kolom jumlah jika ada
-            jumlah_cols = [
-                "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_L",
-                "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_P",
-                "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_TOTAL",
-                "Jumlah Pasien Keluar Mati_L",
-                "Jumlah Pasien Keluar Mati_P",
-                "Jumlah Pasien Keluar Mati_TOTAL"
-            ]
-            for col in jumlah_cols:
-                if col not in df_sirs.columns:
-                    df_sirs[col] = 0
+            # Hitung seluruh matriks SIRS sekaligus (group-by, tanpa loop per baris)
+            job.report(0.25, f"Memproses {len(df_sirs)} kode ICD...")
+            with stage(f"SIRS: hitung ({engine}, {workers} worker)", rows_in=len(df_sirs)) as st:
+                if engine == ENGINE_INCREMENTAL:
+                    # Hanya baris mapping baru / terhapus sejak perhitungan terakhir
+                    df_sirs = hitung_sirs_incremental(
+                        df_sirs, conn, icd_col, columns, progress=job.report
+                    )
+                elif engine == ENGINE_SQL:
+                    df_sirs = hitung_sirs_sql(
+                        df_sirs, conn, icd_col, columns, progress=job.report
+                    )
+                elif workers > 1:
+                    df_sirs = hitung_sirs_parallel(
+                        df_sirs, df_mapping, icd_col, workers=workers,
+                        progress=job.report, index=mapping_index
+                    )
                 else:
-                    df_sirs[col] = 0
-
-            # Proses setiap kode ICD di SIRS
-            total_sirs = len(df_sirs)
-            processed = 0
-            
-            self.update_progress(0.3, f"Memproses {total_sirs} kode ICD...")
-            
-            for idx, sirs_row in df_sirs.iterrows():
-                processed += 1
-                progress_pct = 0.3 + (0.6 * processed / total_sirs)  # 30% - 90%
-                
-                kode_icd_sirs = str(sirs_row[icd_col]).strip().upper()
-                
-                if kode_icd_sirs == "" or kode_icd_sirs == "NAN":
-                    continue
-
-                # Update progress setiap 10 baris
-                if processed % 10 == 0 or processed == total_sirs:
-                    self.update_progress(
-                        progress_pct, 
-                        f"Memproses kode ICD {processed}/{total_sirs}: {kode_icd_sirs}"
+                    df_sirs = hitung_sirs(
+                        df_sirs, df_mapping, icd_col, progress=job.report, index=mapping_index
                     )
-
-                # Filter data mapping berdasarkan kode ICD
-                df_filtered = df_mapping[
-                    df_mapping['kode_icd'].str.strip().str.upper() == kode_icd_sirs
-                ]
-
-                # Hitung untuk setiap pasien dengan kode ICD yang sama
-                for _, mapping_row in df_filtered.iterrows():
-                    gender = str(mapping_row['kelamin']).strip().upper()
-                    
-                    if gender not in ['L', 'P']:
-                        continue
-
-                    usia_tahun = mapping_row['usia_tahun']
-                    usia_bulan = mapping_row['usia_bulan']
-                    usia_hari = mapping_row['usia_hari']
-                    alasan_pulang = str(mapping_row.get('alasan_pulang', '')).strip().upper()
-
-                    # Tentukan kolom SIRS yang sesuai
-                    target_col = self.get_sirs_column(usia_tahun, usia_bulan, usia_hari, gender)
-
-                    if target_col and target_col in df_sirs.columns:
-                        df_sirs.at[idx, target_col] += 1
-
-                    # Hitung jumlah pasien keluar (hidup dan mati)
-                    total_col = f"Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_{gender}"
-                    if total_col in df_sirs.columns:
-                        df_sirs.at[idx, total_col] += 1
-
-                    # Hitung jumlah pasien meninggal
-                    if alasan_pulang in ['MENINGGAL', 'MATI', 'DEATH']:
-                        mati_col = f"Jumlah Pasien Keluar Mati_{gender}"
-                        if mati_col in df_sirs.columns:
-                            df_sirs.at[idx, mati_col] += 1
-
-                # Hitung total
-                if "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_TOTAL" in df_sirs.columns:
-                    total_l = df_sirs.at[idx, "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_L"]
-                    total_p = df_sirs.at[idx, "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_P"]
-                    df_sirs.at[idx, "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_TOTAL"] = total_l + total_p
-
-                if "Jumlah Pasien Keluar Mati_TOTAL" in df_sirs.columns:
-                    mati_l = df_sirs.at[idx, "Jumlah Pasien Keluar Mati_L"]
-                    mati_p = df_sirs.at[idx, "Jumlah Pasien Keluar Mati_P"]
-                    df_sirs.at[idx, "Jumlah Pasien Keluar Mati_TOTAL"] = mati_l + mati_p
+                st.rows_out = len(df_sirs)
 
             # Update preview
-            self.update_progress(0.95, "Memperbarui tampilan...")
+            job.report(0.95, "Memperbarui tampilan...")
             self.df_preview = df_sirs
             self.after(0, lambda: self.show_preview(df_sirs))
 
-            self.update_progress(1.0, "Selesai!")
+            job.report(1.0, "Selesai!")
             self.after(500, lambda: self.show_success("Selesai", "Optimasi SIRS berhasil!"))
             
             # Sembunyikan progress bar setelah 2 detik
             self.after(2000, self.progress_frame.pack_forget)
 
+        except Cancelled:
+            self.show_warning("Dibatalkan", "Optimasi SIRS dibatalkan.")
+            raise
         except Exception as e:
             self.show_error("Error", f"Terjadi kesalahan:\n\n{e}")
-        
-        finally:
-            self.is_processing = False
+            raise
     
     def update_progress(self, value, text):
-        """Update progress bar dan label"""
-        self.after(0, lambda: self.progress_bar.set(value))
-        self.after(0, lambda: self.progress_label.configure(text=text))
-        
-        # Update detail dengan persentase
-        pct = int(value * 100)
-        self.after(0, lambda: self.progress_detail.configure(text=f"{pct}% selesai"))
+        """Update progress bar dan label (boleh dari thread mana saja; ditampilkan oleh poll UI)"""
+        self.progress_channel.report(value, text)
+
+    def _apply_progress(self, update):
+        """Tampilkan progress terbaru dari kanal (di thread UI)"""
+        self.progress_bar.set(update['value'])
+        self.progress_label.configure(text=update['text'])
+        self.progress_detail.configure(text=describe(update))
     
     def show_error(self, title, message):
         """Tampilkan error message di main thread"""
@@ -551,66 +418,12 @@ class SirsScreen(ctk.CTkFrame):
         if not filepath:
             return
 
-        try:
-            # Pastikan filepath memiliki ekstensi .xlsx
-            if not filepath.endswith('.xlsx'):
-                filepath += '.xlsx'
-            
-            # Bersihkan data dari nilai yang bermasalah
-            df_clean = self.df_preview.copy()
-            
-            # Replace inf dan -inf dengan None
-            df_clean = df_clean.replace([float('inf'), float('-inf')], None)
-            
-            # Simpan dengan xlsxwriter untuk lebih stabil
-            try:
-                with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
-                    df_clean.to_excel(writer, index=False, sheet_name='SIRS')
-                    
-                    # Format worksheet
-                    workbook = writer.book
-                    worksheet = writer.sheets['SIRS']
-                    
-                    # Header format
-                    header_format = workbook.add_format({
-                        'bold': True,
-                        'bg_color': '#D3D3D3',
-                        'border': 1
-                    })
-                    
-                    # Auto-adjust column width
-                    for idx, col in enumerate(df_clean.columns):
-                        max_length = max(
-                            df_clean[col].astype(str).map(len).max(),
-                            len(str(col))
-                        )
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.set_column(idx, idx, adjusted_width)
-                        
-            except ImportError:
-                # Fallback ke openpyxl jika xlsxwriter tidak tersedia
-                with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                    df_clean.to_excel(writer, index=False, sheet_name='SIRS')
-            
-            messagebox.showinfo("Berhasil", f"File berhasil disimpan ke:\n{filepath}")
-            
-            # Tanya apakah ingin membuka file
-            if messagebox.askyesno("Buka File?", "File berhasil disimpan.\n\nApakah ingin membuka file sekarang?"):
-                try:
-                    os.startfile(filepath)  # Windows
-                except AttributeError:
-                    # Untuk Linux/Mac
-                    import platform
-                    if platform.system() == 'Darwin':  # Mac
-                        os.system(f'open "{filepath}"')
-                    else:  # Linux
-                        os.system(f'xdg-open "{filepath}"')
-                
-        except PermissionError:
-            messagebox.showerror("Error", f"File tidak dapat disimpan!\n\nKemungkinan file sedang dibuka di Excel.\nSilakan tutup file tersebut dan coba lagi.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal menyimpan file:\n\n{str(e)}\n\nCoba gunakan nama file yang berbeda.")
-    
+        # Pastikan filepath memiliki ekstensi .xlsx
+        if not filepath.endswith('.xlsx'):
+            filepath += '.xlsx'
+
+        self.save_excel(filepath, "File berhasil disimpan ke", "File berhasil disimpan.\n\nApakah ingin membuka file sekarang?")
+
     def quick_save(self):
         """Quick save tanpa dialog - simpan langsung ke folder excel"""
         if self.df_preview is None:
@@ -626,26 +439,65 @@ class SirsScreen(ctk.CTkFrame):
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filepath = os.path.join("excel", f"SIRS_Hasil_{timestamp}.xlsx")
-        
+
+        self.save_excel(filepath, "File tersimpan di", "Buka file sekarang?")
+
+    def save_excel(self, filepath, saved_text, open_question):
+        """Tulis df_preview ke Excel sebagai job latar belakang dengan progress bar"""
+        if self.is_busy():
+            messagebox.showwarning("Sedang Proses", "Proses lain sedang berjalan, mohon tunggu...")
+            return
+
+        import os
+
+        df = self.df_preview
+        self.current_job = get_job_manager().submit(
+            f"Simpan {os.path.basename(filepath)}",
+            lambda job: self._save_excel_thread(job, df, filepath, saved_text, open_question),
+            progress=self.update_progress,
+        )
+
+    def _save_excel_thread(self, job, df, filepath, saved_text, open_question):
+        """Job worker untuk simpan Excel"""
+        self.progress_frame.pack(pady=5, fill="x", padx=10)
+        job.report(0, "Menyimpan file Excel...")
+
         try:
-            # Bersihkan data
-            df_clean = self.df_preview.copy()
-            df_clean = df_clean.replace([float('inf'), float('-inf')], None)
-            
-            # Simpan dengan metode paling sederhana
-            df_clean.to_excel(filepath, index=False, sheet_name='SIRS', engine='openpyxl')
-            
-            messagebox.showinfo("Berhasil", f"File tersimpan di:\n{filepath}")
-            
-            # Auto-open
-            if messagebox.askyesno("Buka File?", "Buka file sekarang?"):
-                try:
-                    os.startfile(filepath)
-                except:
-                    messagebox.showinfo("Info", f"Silakan buka manual di:\n{filepath}")
-                    
+            with stage("SIRS: tulis Excel", rows_in=len(df)):
+                write_excel(df, filepath, 'SIRS', progress=job.report)
+        except Cancelled:
+            self.show_warning("Dibatalkan", "Penyimpanan file dibatalkan.")
+            raise
+        except PermissionError:
+            self.show_error("Error", "File tidak dapat disimpan!\n\nKemungkinan file sedang dibuka di Excel.\nSilakan tutup file tersebut dan coba lagi.")
+            raise
         except Exception as e:
-            messagebox.showerror("Error", f"Gagal menyimpan:\n\n{str(e)}")
+            self.show_error("Error", f"Gagal menyimpan file:\n\n{str(e)}\n\nCoba gunakan nama file yang berbeda.")
+            raise
+
+        job.report(1.0, "File tersimpan")
+        self.after(0, lambda: self._after_save(filepath, saved_text, open_question))
+        self.after(2000, self.progress_frame.pack_forget)
+
+    def _after_save(self, filepath, saved_text, open_question):
+        """Konfirmasi simpan & tawarkan membuka file (di thread UI)"""
+        import os
+
+        messagebox.showinfo("Berhasil", f"{saved_text}:\n{filepath}")
+        
+        # Tanya apakah ingin membuka file
+        if messagebox.askyesno("Buka File?", open_question):
+            try:
+                os.startfile(filepath)  # Windows
+            except AttributeError:
+                # Untuk Linux/Mac
+                import platform
+                if platform.system() == 'Darwin':  # Mac
+                    os.system(f'open "{filepath}"')
+                else:  # Linux
+                    os.system(f'xdg-open "{filepath}"')
+            except OSError:
+                messagebox.showinfo("Info", f"Silakan buka manual di:\n{filepath}")
     
     def export_to_pdf(self):
         """Export hasil optimasi ke PDF dengan format yang rapi"""
@@ -658,11 +510,7 @@ class SirsScreen(ctk.CTkFrame):
         
         # Cek apakah reportlab terinstall
         try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
+            import reportlab  # noqa: F401
         except ImportError:
             if messagebox.askyesno(
                 "Library Tidak Ditemukan",
@@ -700,290 +548,59 @@ class SirsScreen(ctk.CTkFrame):
         if not filepath:
             return
         
+        # Pastikan ekstensi .pdf
+        if not filepath.endswith('.pdf'):
+            filepath += '.pdf'
+
+        if self.is_busy():
+            messagebox.showwarning("Sedang Proses", "Proses lain sedang berjalan, mohon tunggu...")
+            return
+
+        # Export sebagai job latar belakang agar UI tidak freeze
+        df = self.df_preview
+        skip_zero = self.pdf_skip_zero_var.get()
+        self.current_job = get_job_manager().submit(
+            f"Export {os.path.basename(filepath)}",
+            lambda job: self._export_pdf_thread(job, df, filepath, skip_zero),
+            progress=self.update_progress,
+        )
+
+    def _export_pdf_thread(self, job, df, filepath, skip_zero):
+        """Job worker untuk export PDF"""
+        import os
+
+        self.progress_frame.pack(pady=5, fill="x", padx=10)
+        job.report(0, "Menyiapkan tabel PDF...")
+
         try:
-            # Pastikan ekstensi .pdf
-            if not filepath.endswith('.pdf'):
-                filepath += '.pdf'
-            
-            # Bersihkan data
-            df_clean = self.df_preview.copy()
-            df_clean = df_clean.replace([float('inf'), float('-inf')], None)
-            df_clean = df_clean.fillna('')
-            
-            # Buat PDF dengan landscape orientation
-            doc = SimpleDocTemplate(
-                filepath,
-                pagesize=landscape(A4),
-                rightMargin=20,
-                leftMargin=20,
-                topMargin=30,
-                bottomMargin=30
-            )
-            
-            # Container untuk elements
-            elements = []
-            
-            # Styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor=colors.HexColor('#1f4788'),
-                spaceAfter=20,
-                alignment=1
-            )
-            
-            subtitle_style = ParagraphStyle(
-                'Subtitle',
-                parent=styles['Heading2'],
-                fontSize=12,
-                textColor=colors.HexColor('#2e5090'),
-                spaceAfter=10,
-                spaceBefore=10
-            )
-            
-            # Judul utama
-            title = Paragraph("LAPORAN OPTIMASI SIRS", title_style)
-            elements.append(title)
-            
-            # Info
-            info_text = f"Tanggal Generate: {datetime.now().strftime('%d-%m-%Y %H:%M:%S')}"
-            info = Paragraph(info_text, styles['Normal'])
-            elements.append(info)
-            
-            total_text = f"Total Kode ICD: {len(df_clean)} | Total Kolom: {len(df_clean.columns)}"
-            total = Paragraph(total_text, styles['Normal'])
-            elements.append(total)
-            elements.append(Spacer(1, 20))
-            
-            # Pisahkan kolom berdasarkan kategori
-            basic_cols = []
-            age_cols_L = []
-            age_cols_P = []
-            summary_cols = []
-            
-            for col in df_clean.columns:
-                col_lower = col.lower()
-                if 'kode icd' in col_lower or col_lower == 'no':
-                    basic_cols.append(col)
-                elif col.endswith('_L') and 'jumlah' not in col_lower:
-                    age_cols_L.append(col)
-                elif col.endswith('_P') and 'jumlah' not in col_lower:
-                    age_cols_P.append(col)
-                elif 'jumlah' in col_lower:
-                    summary_cols.append(col)
-            
-            # TABEL 1: Data Kelompok Usia - LAKI-LAKI
-            if age_cols_L:
-                elements.append(Paragraph("TABEL 1: DISTRIBUSI USIA PASIEN LAKI-LAKI", subtitle_style))
-                elements.append(Spacer(1, 10))
-                
-                # Bagi kolom usia L menjadi beberapa grup (max 12 kolom per halaman)
-                chunk_size = 12
-                for i in range(0, len(age_cols_L), chunk_size):
-                    chunk_cols = basic_cols + age_cols_L[i:i+chunk_size]
-                    df_chunk = df_clean[chunk_cols]
-                    self._add_table_to_pdf(df_chunk, elements)
-                    
-                    if i + chunk_size < len(age_cols_L):
-                        elements.append(Spacer(1, 15))
-                        elements.append(Paragraph(f"<i>Lanjutan kolom usia Laki-Laki...</i>", styles['Italic']))
-                        elements.append(Spacer(1, 10))
-                
-                elements.append(PageBreak())
-            
-            # TABEL 2: Data Kelompok Usia - PEREMPUAN
-            if age_cols_P:
-                elements.append(Paragraph("TABEL 2: DISTRIBUSI USIA PASIEN PEREMPUAN", subtitle_style))
-                elements.append(Spacer(1, 10))
-                
-                # Bagi kolom usia P menjadi beberapa grup
-                for i in range(0, len(age_cols_P), chunk_size):
-                    chunk_cols = basic_cols + age_cols_P[i:i+chunk_size]
-                    df_chunk = df_clean[chunk_cols]
-                    self._add_table_to_pdf(df_chunk, elements)
-                    
-                    if i + chunk_size < len(age_cols_P):
-                        elements.append(Spacer(1, 15))
-                        elements.append(Paragraph(f"<i>Lanjutan kolom usia Perempuan...</i>", styles['Italic']))
-                        elements.append(Spacer(1, 10))
-                
-                elements.append(PageBreak())
-            
-            # TABEL 3: Ringkasan Jumlah Pasien
-            if summary_cols:
-                elements.append(Paragraph("TABEL 3: RINGKASAN JUMLAH PASIEN", subtitle_style))
-                elements.append(Spacer(1, 10))
-                
-                df_summary = df_clean[basic_cols + summary_cols]
-                self._add_table_to_pdf(df_summary, elements, fontsize=7)
-            
-            # Build PDF
-            doc.build(elements)
-            
-            messagebox.showinfo("Berhasil", f"PDF berhasil dibuat:\n{filepath}\n\nTotal halaman: {len(elements)//10 + 1}")
-            
-            # Tanya buka file
-            if messagebox.askyesno("Buka PDF?", "PDF berhasil dibuat.\n\nBuka file sekarang?"):
-                try:
-                    os.startfile(filepath)
-                except:
-                    messagebox.showinfo("Info", f"Silakan buka manual:\n{filepath}")
-        
+            basic_cols, sections = sirs_sections(df.columns)
+            with stage("SIRS: tulis PDF", rows_in=len(df)) as st:
+                result = export_pdf(
+                    df, filepath, "LAPORAN OPTIMASI SIRS", basic_cols, sections,
+                    skip_zero=skip_zero, progress=job.report
+                )
+                st.rows_out = result['rows']
+            job.report(1.0, "PDF selesai dibuat")
+            self.after(2000, self.progress_frame.pack_forget)
+
+            def finish():
+                messagebox.showinfo("Berhasil", f"PDF berhasil dibuat:\n{filepath}\n\nTotal halaman: {result['pages']}")
+
+                # Tanya buka file
+                if messagebox.askyesno("Buka PDF?", "PDF berhasil dibuat.\n\nBuka file sekarang?"):
+                    try:
+                        os.startfile(filepath)
+                    except:
+                        messagebox.showinfo("Info", f"Silakan buka manual:\n{filepath}")
+
+            self.after(0, finish)
+
+        except Cancelled:
+            self.show_warning("Dibatalkan", "Export PDF dibatalkan.")
+            raise
         except PermissionError:
-            messagebox.showerror("Error", "File sedang dibuka di aplikasi lain.\nSilakan tutup file tersebut.")
+            self.show_error("Error", "File sedang dibuka di aplikasi lain.\nSilakan tutup file tersebut.")
+            raise
         except Exception as e:
-            messagebox.showerror("Error", f"Gagal export PDF:\n\n{str(e)}")
-    
-    def _create_pdf_single_table(self, df, doc, elements, styles):
-        """Buat satu tabel PDF untuk data yang tidak terlalu lebar"""
-        from reportlab.lib import colors
-        from reportlab.platypus import Table, TableStyle, Paragraph
-        
-        # Limit kolom yang ditampilkan (max 20 kolom)
-        max_cols = 20
-        df_display = df.iloc[:, :max_cols] if len(df.columns) > max_cols else df
-        
-        # Prepare data untuk tabel
-        data = []
-        
-        # Header
-        headers = [str(col)[:20] for col in df_display.columns]  # Limit 20 char per header
-        data.append(headers)
-        
-        # Rows
-        for idx, row in df_display.iterrows():
-            row_data = [str(val)[:20] if val != '' else '-' for val in row]
-            data.append(row_data)
-        
-        # Buat tabel
-        table = Table(data, repeatRows=1)
-        
-        # Style tabel
-        table.setStyle(TableStyle([
-            # Header
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            
-            # Body
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 7),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#E7E6E6')]),
-        ]))
-        
-        elements.append(table)
-        
-        # Catatan jika ada kolom yang tidak ditampilkan
-        if len(df.columns) > max_cols:
-            from reportlab.platypus import Spacer
-            elements.append(Spacer(1, 10))
-            note = Paragraph(
-                f"<i>Catatan: Menampilkan {max_cols} dari {len(df.columns)} kolom. "
-                f"Untuk data lengkap, gunakan export Excel.</i>",
-                styles['Normal']
-            )
-            elements.append(note)
-    
-    def _create_pdf_multi_tables(self, df, doc, elements, styles):
-        """Buat beberapa tabel PDF untuk data yang sangat lebar"""
-        from reportlab.lib import colors
-        from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, PageBreak
-        
-        # Pisah kolom menjadi grup
-        basic_cols = ['No', 'Kode ICD']
-        age_cols = [col for col in df.columns if any(x in col for x in ['thn_', 'bln_', 'hr_', 'Jam_'])]
-        summary_cols = [col for col in df.columns if 'Jumlah' in col]
-        
-        # Tabel 1: Info Dasar + Kolom Usia (Laki-laki)
-        age_cols_L = [col for col in age_cols if col.endswith('_L')]
-        if age_cols_L:
-            df_part1 = df[basic_cols + age_cols_L[:15]]  # Max 15 kolom usia
-            elements.append(Paragraph("<b>TABEL 1: Data Usia Laki-Laki</b>", styles['Heading2']))
-            elements.append(Spacer(1, 10))
-            self._add_table_to_pdf(df_part1, elements)
-            elements.append(PageBreak())
-        
-        # Tabel 2: Info Dasar + Kolom Usia (Perempuan)
-        age_cols_P = [col for col in age_cols if col.endswith('_P')]
-        if age_cols_P:
-            df_part2 = df[basic_cols + age_cols_P[:15]]
-            elements.append(Paragraph("<b>TABEL 2: Data Usia Perempuan</b>", styles['Heading2']))
-            elements.append(Spacer(1, 10))
-            self._add_table_to_pdf(df_part2, elements)
-            elements.append(PageBreak())
-        
-        # Tabel 3: Summary (Jumlah Pasien)
-        if summary_cols:
-            df_part3 = df[basic_cols + summary_cols]
-            elements.append(Paragraph("<b>TABEL 3: Ringkasan Jumlah Pasien</b>", styles['Heading2']))
-            elements.append(Spacer(1, 10))
-            self._add_table_to_pdf(df_part3, elements)
-    
-    def _add_table_to_pdf(self, df, elements, fontsize=6):
-        """Helper untuk menambahkan tabel ke PDF"""
-        from reportlab.lib import colors
-        from reportlab.platypus import Table, TableStyle
-        
-        # Prepare data
-        data = []
-        
-        # Headers - potong jika terlalu panjang
-        headers = []
-        for col in df.columns:
-            col_str = str(col)
-            # Singkat nama kolom yang panjang
-            if len(col_str) > 15:
-                col_str = col_str.replace('Jumlah Pasien Keluar', 'JPK')
-                col_str = col_str.replace('Hidup dan Mati', 'H&M')
-                col_str = col_str.replace('Menurut Jenis Kelamin', 'JK')
-            headers.append(col_str[:20])
-        data.append(headers)
-        
-        # Rows
-        for idx, row in df.iterrows():
-            row_data = []
-            for val in row:
-                val_str = str(val) if val != '' else '-'
-                # Tampilkan 0 sebagai '-' untuk lebih clean
-                if val_str == '0' or val_str == '0.0':
-                    val_str = '-'
-                row_data.append(val_str[:15])
-            data.append(row_data)
-        
-        # Hitung lebar kolom dinamis
-        num_cols = len(df.columns)
-        available_width = 750  # Lebar landscape A4 dalam points
-        col_width = available_width / num_cols
-        col_widths = [col_width] * num_cols
-        
-        # Buat tabel dengan column widths
-        table = Table(data, colWidths=col_widths, repeatRows=1)
-        
-        # Style
-        table.setStyle(TableStyle([
-            # Header styling
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), fontsize + 1),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            
-            # Body styling
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), fontsize),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#E7E6E6')]),
-            ('TOPPADDING', (0, 1), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-        ]))
-        
-        elements.append(table)
\ No newline at end of file
+            self.show_error("Error", f"Gagal export PDF:\n\n{str(e)}")
+            raise
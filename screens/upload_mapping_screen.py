@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from logic import save_mapping_to_db
-import threading
+from progress_channel import ProgressChannel, describe
+from jobs import Cancelled, get_job_manager
+import os
 
 class UploadMappingScreen(tk.Frame):
     def __init__(self, master):
@@ -20,16 +22,20 @@ class UploadMappingScreen(tk.Frame):
         self.progress_label = ttk.Label(self, text="")
         self.progress_label.pack(pady=5)
 
-        self.progress = ttk.Progressbar(self, orient="horizontal", mode="indeterminate", length=300)
+        self.progress = ttk.Progressbar(self, orient="horizontal", mode="determinate", maximum=100, length=300)
         self.progress.pack(pady=10)
         self.progress.pack_forget()   # disembunyikan dulu
 
+        # Progress dari thread upload dibaca dengan interval tetap
+        self.progress_channel = ProgressChannel()
+        self.progress_channel.bind(self, self.update_progress)
+
     # ======================================================
     # BUKA FILE
     # ======================================================
     def open_file(self):
         file_path = filedialog.askopenfilename(
-            filetypes=[("Excel Files", "*.xlsx *.xls")]
+            filetypes=[("Excel Files", "*.xlsx *.xls"), ("CSV Files", "*.csv")]
         )
 
         if not file_path:
@@ -37,38 +43,70 @@ class UploadMappingScreen(tk.Frame):
 
         self.label_file.config(text=f"File: {file_path}")
 
-        # Jalankan upload di thread agar UI tidak freeze
-        t = threading.Thread(target=self.start_upload, args=(file_path,))
-        t.start()
+        # Upload menulis ke database -> antrian penulis job manager (upload
+        # berikutnya menunggu giliran, UI tidak freeze)
+        get_job_manager().submit(
+            f"Upload {os.path.basename(file_path)}",
+            lambda job: self.start_upload(job, file_path),
+            writer=True,
+        )
 
     # ======================================================
-    # MULAI UPLOAD (THREAD)
+    # MULAI UPLOAD (JOB PENULIS)
     # ======================================================
-    def start_upload(self, file_path):
+    def start_upload(self, job, file_path):
         # Munculkan progress bar
-        self.progress_label.config(text="Uploading, mohon tunggu...")
+        self.progress["value"] = 0
         self.progress.pack()
-        self.progress.start(10)  # animasi loading
-
-        # Disable tombol upload selama proses
-        self.btn_upload.config(state="disabled")
 
+        name = os.path.basename(file_path)
         try:
-            total = save_mapping_to_db(file_path)
-
-            # Setelah selesai
-            self.progress.stop()
+            # Catat kecepatan insert terakhir (baris/detik) dari bulk loader
+            stats = {"rate": 0.0}
+            self.progress_channel.report(0, f"Membaca {name}, mohon tunggu...")
+
+            def on_progress(done, total_rows, rate):
+                stats["rate"] = rate
+                value = min(done / total_rows, 1.0) if total_rows else 1.0
+                text = f"Uploading {name}: {done}/{total_rows} baris"
+                # job.report melempar Cancelled jika job dibatalkan (batch di-rollback)
+                job.report(value, text)
+                self.progress_channel.report(value, text, rows=done)
+
+            result = save_mapping_to_db(file_path, progress=on_progress)
+
+            # Setelah selesai (buang progress yang belum sempat ditampilkan)
+            self.progress_channel.take()
             self.progress.pack_forget()
             self.progress_label.config(text="")
 
-            self.btn_upload.config(state="normal")
+            messagebox.showinfo(
+                "Sukses",
+                f"Berhasil upload {result['total']} baris mapping!\n"
+                f"Baru: {result['inserted']}, diperbarui: {result['updated']}, "
+                f"sudah ada: {result['unchanged']}\n"
+                f"Kecepatan insert: {stats['rate']:.0f} baris/detik"
+            )
+
+        except Cancelled:
+            self.progress_channel.take()
+            self.progress.pack_forget()
+            self.progress_label.config(text="")
 
-            messagebox.showinfo("Sukses", f"Berhasil upload {total} baris mapping!")
+            messagebox.showwarning("Dibatalkan", f"Upload {name} dibatalkan, tidak ada data yang disimpan.")
+            raise
 
         except Exception as e:
-            self.progress.stop()
+            self.progress_channel.take()
             self.progress.pack_forget()
             self.progress_label.config(text="")
-            self.btn_upload.config(state="normal")
 
             messagebox.showerror("Error", str(e))
+            raise
+
+    # ======================================================
+    # UPDATE PROGRESS (POLL KANAL PROGRESS DI MAIN THREAD)
+    # ======================================================
+    def update_progress(self, update):
+        self.progress["value"] = update['value'] * 100
+        self.progress_label.config(text=f"{update['text']} ({describe(update)})")
@@ -1,10 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import os
+from db import create_fts, data_columns, get_connection, search_mapping
+from jobs import get_job_manager
+from mapping_index import invalidate_mapping_index
+from sirs_summary import reset_summary
 
 DB_PATH = os.path.join("database", "mapping.db")
 
+# Jumlah baris per halaman yang diambil dari database
+PAGE_SIZE = 500
+# Muat halaman berikutnya jika scroll sudah melewati posisi ini (0-1)
+LOAD_MORE_AT = 0.9
+# Maksimal hasil pencarian yang ditampilkan
+SEARCH_LIMIT = 500
+
 class ViewMappingScreen(tk.Frame):
     def __init__(self, master):
         super().__init__(master)
@@ -26,6 +36,9 @@ class ViewMappingScreen(tk.Frame):
         self.reset_button = ttk.Button(search_frame, text="Reset", command=self.load_table)
         self.reset_button.pack(side="left", padx=5)
 
+        self.label_count = ttk.Label(search_frame, text="")
+        self.label_count.pack(side="right", padx=10)
+
         # ================= BUTTON ROW =====================
         button_frame = tk.Frame(self)
         button_frame.pack(fill="x", pady=5)
@@ -46,7 +59,7 @@ class ViewMappingScreen(tk.Frame):
 
         self.tree = ttk.Treeview(
             table_frame,
-            yscrollcommand=self.scroll_y.set,
+            yscrollcommand=self.on_tree_scroll,
             xscrollcommand=self.scroll_x.set
         )
         self.tree.pack(fill="both", expand=True)
@@ -54,15 +67,31 @@ class ViewMappingScreen(tk.Frame):
         self.scroll_y.config(command=self.tree.yview)
         self.scroll_x.config(command=self.tree.xview)
 
+        # State paginasi (keyset pada kolom id)
+        self.db_columns = []
+        self.last_id = None
+        self.has_more = False
+        self.loading = False
+        self.total_rows = 0
+
         self.load_table()
 
+        # Index FTS (database lama / belum pernah dibuat) dibangun di antrian
+        # penulis; sampai selesai, pencarian memakai LIKE
+        get_job_manager().submit(
+            "Index pencarian mapping", lambda job: create_fts(get_connection(DB_PATH)), writer=True
+        )
+
     # =====================================================
-    # LOAD TABLE WITH AUTO NUMBERING
+    # LOAD TABLE (PAGED, KEYSET PADA id)
     # =====================================================
     def load_table(self):
+        """Tampilkan halaman pertama; halaman berikutnya dimuat saat scroll"""
         self.tree.delete(*self.tree.get_children())
+        self.last_id = None
+        self.has_more = False
 
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection(DB_PATH)
         cursor = conn.cursor()
 
         cursor.execute("PRAGMA table_info(mapping)")
@@ -71,37 +100,62 @@ class ViewMappingScreen(tk.Frame):
         if not columns_info:
             self.tree["columns"] = []
             self.tree.heading("#0", text="No data")
-            conn.close()
+            self.label_count.config(text="")
             return
 
-        db_columns = [col[1] for col in columns_info]
-        db_columns.remove("id")
-
-        # Add NO column for display only
-        columns = db_columns
+        db_columns = data_columns(cursor)
+        self.db_columns = db_columns
 
-        self.tree["columns"] = columns
+        self.tree["columns"] = db_columns
         self.tree.column("#0", width=0, stretch=tk.NO)
 
-        # Setup NO column
-        # self.tree.heading("no_urut", text="NO")
-        # self.tree.column("no_urut", width=50, anchor="center")
-
         # Setup DB columns
         for col in db_columns:
             self.tree.heading(col, text=col.upper())
             self.tree.column(col, width=130, anchor="w")
 
-        cursor.execute("SELECT * FROM mapping ORDER BY id ASC")
-        rows = cursor.fetchall()
+        cursor.execute("SELECT COUNT(*) FROM mapping")
+        self.total_rows = cursor.fetchone()[0]
 
-        no = 1
-        for row in rows:
-            row = row[1:]
-            self.tree.insert("", "end", values=row)
-            no += 1
+        self.has_more = True
+        self.load_more()
 
-        conn.close()
+    def load_more(self):
+        """Ambil PAGE_SIZE baris berikutnya (WHERE id > id terakhir)"""
+        if self.loading or not self.has_more:
+            return
+        self.loading = True
+
+        try:
+            cursor = get_connection(DB_PATH).cursor()
+            select = f"SELECT id, {', '.join(self.db_columns)} FROM mapping"
+            if self.last_id is None:
+                cursor.execute(f"{select} ORDER BY id ASC LIMIT ?", (PAGE_SIZE,))
+            else:
+                cursor.execute(
+                    f"{select} WHERE id > ? ORDER BY id ASC LIMIT ?",
+                    (self.last_id, PAGE_SIZE)
+                )
+            rows = cursor.fetchall()
+
+            # iid = id database, dipakai saat menghapus baris
+            for row in rows:
+                self.tree.insert("", "end", iid=str(row[0]), values=row[1:])
+
+            if rows:
+                self.last_id = rows[-1][0]
+            self.has_more = len(rows) == PAGE_SIZE
+            self.label_count.config(
+                text=f"Ditampilkan {len(self.tree.get_children())} dari {self.total_rows} baris"
+            )
+        finally:
+            self.loading = False
+
+    def on_tree_scroll(self, first, last):
+        """yscrollcommand: teruskan ke scrollbar, muat halaman baru di dekat akhir"""
+        self.scroll_y.set(first, last)
+        if self.has_more and not self.loading and float(last) >= LOAD_MORE_AT:
+            self.after_idle(self.load_more)
 
     # =====================================================
     # SEARCH FUNCTION
@@ -113,27 +167,18 @@ class ViewMappingScreen(tk.Frame):
             return
 
         self.tree.delete(*self.tree.get_children())
+        self.has_more = False
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        # Index FTS5, urut menurut relevansi, dibatasi SEARCH_LIMIT baris
+        rows = search_mapping(keyword, SEARCH_LIMIT, conn=get_connection(DB_PATH))
 
-        cursor.execute("PRAGMA table_info(mapping)")
-        columns_info = cursor.fetchall()
-        db_columns = [col[1] for col in columns_info]
-
-        query_parts = [f"{col} LIKE ?" for col in db_columns]
-        params = [f"%{keyword}%"] * len(db_columns)
-
-        sql = f"SELECT * FROM mapping WHERE {' OR '.join(query_parts)}"
-        cursor.execute(sql, params)
-        rows = cursor.fetchall()
-
-        no = 1
         for row in rows:
-            self.tree.insert("", "end", values=(no, *row))
-            no += 1
+            self.tree.insert("", "end", iid=str(row[0]), values=row[1:])
 
-        conn.close()
+        if len(rows) >= SEARCH_LIMIT:
+            self.label_count.config(text=f"Menampilkan {SEARCH_LIMIT} hasil teratas")
+        else:
+            self.label_count.config(text=f"Ditemukan {len(rows)} baris")
 
     # =====================================================
     # DELETE ONE ROW
@@ -144,21 +189,17 @@ class ViewMappingScreen(tk.Frame):
             messagebox.showwarning("Perhatian", "Pilih baris yang ingin dihapus!")
             return
 
-        row_values = self.tree.item(selected[0])["values"]
-        row_id = row_values[1]  # index 1 = id (karena 0 = NO urut)
+        row_id = int(selected[0])  # iid = id database
 
         confirm = messagebox.askyesno("Konfirmasi", "Yakin ingin menghapus baris ini?")
         if not confirm:
             return
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM mapping WHERE id = ?", (row_id,))
-        conn.commit()
-        conn.close()
-
-        self.load_table()
-        messagebox.showinfo("Sukses", "Baris berhasil dihapus.")
+        self._submit_delete(
+            f"Hapus baris {row_id}",
+            lambda conn: conn.execute("DELETE FROM mapping WHERE id = ?", (row_id,)),
+            "Baris berhasil dihapus.",
+        )
 
     # =====================================================
     # DELETE ALL
@@ -168,11 +209,34 @@ class ViewMappingScreen(tk.Frame):
         if not confirm:
             return
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM mapping")
-        conn.commit()
-        conn.close()
-
+        def delete(conn):
+            # Ringkasan SIRS dibuang dulu agar trigger tidak mencatat setiap baris
+            reset_summary(conn)
+            conn.execute("DELETE FROM mapping")
+
+        self._submit_delete("Hapus semua data mapping", delete, "Semua data berhasil dihapus.")
+
+    def _submit_delete(self, name, delete, message):
+        """
+        Jalankan delete(conn) lewat antrian penulis job manager, sehingga
+        tidak bentrok dengan upload yang sedang berjalan.
+        """
+        def run(job):
+            conn = get_connection(DB_PATH)
+            try:
+                delete(conn)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                error = str(e)
+                self.after(0, lambda: messagebox.showerror("Error", f"Gagal menghapus data:\n\n{error}"))
+                raise
+            invalidate_mapping_index(DB_PATH)
+            self.after(0, lambda: self._after_delete(message))
+
+        get_job_manager().submit(name, run, writer=True)
+
+    def _after_delete(self, message):
+        """Muat ulang tabel setelah job hapus selesai (di thread UI)"""
         self.load_table()
-        messagebox.showinfo("Sukses", "Semua data berhasil dihapus.")
+        messagebox.showinfo("Sukses", message)
@@ -0,0 +1,565 @@
+import numpy as np
+import pandas as pd
+
+# Definisi kolom SIRS (kelompok usia x jenis kelamin)
+SIRS_COLUMNS = [
+    "<1 Jam_L", "<1 Jam_P", "1-23 jam_L", "1-23 jam_P",
+    "1-7 hr_L", "1-7 hr_P", "8-28 hr_L", "8-28 hr_P",
+    "29 hr- <30 bln_L", "29 hr- <30 bln_P",
+    "3- <6 bln_L", "3- <6 bln_P", "6-11 bln_L", "6-11 bln_P",
+    "1-4 thn_L", "1-4 thn_P", "5-9 thn_L", "5-9 thn_P",
+    "10-14 thn_L", "10-14 thn_P", "15-19 thn_L", "15-19 thn_P",
+    "20-24 thn_L", "20-24 thn_P", "25-29 thn_L", "25-29 thn_P",
+    "30-34 thn_L", "30-34 thn_P", "35-39 thn_L", "35-39 thn_P",
+    "40-44 thn_L", "40-44 thn_P", "45-49 thn_L", "45-49 thn_P",
+    "50-54 thn_L", "50-54 thn_P", "55-59 thn_L", "55-59 thn_P",
+    "60-64 thn_L", "60-64 thn_P", "65-69 thn_L", "65-69 thn_P",
+    "70-74 thn_L", "70-74 thn_P", "75-79 thn_L", "75-79 thn_P",
+    "80-84 thn_L", "80-84 thn_P", "<85 thn_L", "<85 thn_P"
+]
+
+# Kolom jumlah pasien keluar
+JUMLAH_COLUMNS = [
+    "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_L",
+    "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_P",
+    "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_TOTAL",
+    "Jumlah Pasien Keluar Mati_L",
+    "Jumlah Pasien Keluar Mati_P",
+    "Jumlah Pasien Keluar Mati_TOTAL"
+]
+
+# Kolom jumlah yang _TOTAL-nya dihitung dari _L + _P
+TOTAL_PREFIXES = [
+    "Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_",
+    "Jumlah Pasien Keluar Mati_",
+]
+
+ALASAN_MATI = ['MENINGGAL', 'MATI', 'DEATH']
+
+
+# Kelompok usia SIRS sesuai urutan kolom (tanpa suffix jenis kelamin)
+AGE_BANDS = [col[:-2] for col in SIRS_COLUMNS[::2]]
+
+# Batas bawah kelompok usia tahun: 1-4, 5-9, ..., 80-84, <85 (>= 85)
+YEAR_EDGES = np.array([1, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80, 85])
+YEAR_BAND_OFFSET = AGE_BANDS.index("1-4 thn")
+
+# Jumlah baris per potongan; progress (dan cek pembatalan job) dipanggil
+# di setiap potongan
+CHUNK_ROWS = 100_000
+
+
+def _parse_usia(val):
+    """Konversi satu nilai usia ke integer, default 0 (perilaku lama)"""
+    try:
+        return int(float(val)) if pd.notna(val) and str(val).strip() != "" else 0
+    except:
+        return 0
+
+
+def to_usia(series):
+    """
+    Konversi kolom usia ke float64 bulat (dibulatkan ke arah 0).
+
+    Nilai kosong / tidak valid / tak hingga menjadi 0, sama seperti
+    int(float(...)) di dalam try/except.
+    """
+    series = pd.Series(series).reset_index(drop=True)
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan, copy=True)
+
+    # Nilai yang gagal dibaca pd.to_numeric (misal "1_000") dicek ulang
+    # dengan parser lama, cukup sekali per nilai unik
+    gagal = np.isnan(values) & series.notna().to_numpy()
+    if gagal.any():
+        sisa = series[gagal]
+        parsed = {val: _parse_usia(val) for val in sisa.unique()}
+        values[gagal] = sisa.map(parsed).to_numpy(dtype='float64')
+
+    values[~np.isfinite(values)] = 0
+    return np.trunc(values)
+
+
+def kelompok_usia(usia_tahun, usia_bulan, usia_hari):
+    """
+    Tentukan kelompok usia SIRS secara kolom (vectorized).
+
+    Mengembalikan pd.Categorical dengan kategori AGE_BANDS; NaN jika usia
+    tidak masuk kategori mana pun (misal usia tahun negatif).
+    """
+    tahun = to_usia(usia_tahun)
+    bulan = to_usia(usia_bulan)
+    hari = to_usia(usia_hari)
+
+    # Usia tahun >= 1: cari posisi pada batas kelompok
+    band_tahun = YEAR_BAND_OFFSET + np.searchsorted(YEAR_EDGES, tahun, side='right') - 1
+
+    # Usia tahun = 0: cek bulan lalu hari (urutan sama dengan versi skalar)
+    bayi = tahun == 0
+    conditions = [
+        tahun >= 1,
+        bayi & (bulan >= 6),
+        bayi & (bulan >= 3),
+        bayi & ((bulan >= 1) | (hari >= 29)),
+        bayi & (hari >= 8),
+        bayi & (hari >= 1),
+        bayi & (hari == 0),
+    ]
+    choices = [
+        band_tahun,
+        AGE_BANDS.index("6-11 bln"),
+        AGE_BANDS.index("3- <6 bln"),
+        AGE_BANDS.index("29 hr- <30 bln"),
+        AGE_BANDS.index("8-28 hr"),
+        AGE_BANDS.index("1-7 hr"),
+        AGE_BANDS.index("<1 Jam"),
+    ]
+    codes = np.select(conditions, choices, default=-1)
+    return pd.Categorical.from_codes(codes, categories=AGE_BANDS)
+
+
+def normalize_kelamin(series):
+    """Normalisasi jenis kelamin (str + strip + upper)"""
+    return pd.Series(series).map(str).str.strip().str.upper()
+
+
+def classify_sirs(usia_tahun, usia_bulan, usia_hari, kelamin):
+    """
+    Tentukan kolom SIRS untuk setiap pasien secara kolom.
+
+    Mengembalikan pd.Categorical dengan kategori SIRS_COLUMNS; NaN jika
+    kelamin bukan L/P atau usia tidak masuk kategori.
+    """
+    bands = kelompok_usia(usia_tahun, usia_bulan, usia_hari)
+    gender = normalize_kelamin(kelamin).to_numpy()
+
+    codes = bands.codes.astype('int64') * 2 + (gender == 'P')
+    codes[(bands.codes < 0) | ~np.isin(gender, ['L', 'P'])] = -1
+    return pd.Categorical.from_codes(codes, categories=SIRS_COLUMNS)
+
+
+def get_sirs_column(usia_tahun, usia_bulan, usia_hari, gender):
+    """Menentukan kolom SIRS berdasarkan usia dan jenis kelamin"""
+    band = kelompok_usia([usia_tahun], [usia_bulan], [usia_hari])[0]
+    if pd.isna(band):
+        return None
+    return f"{band}_{str(gender).upper().strip()}"
+
+
+def _chunks(n_rows):
+    """Batas (awal, akhir) potongan CHUNK_ROWS baris"""
+    return [(lo, min(lo + CHUNK_ROWS, n_rows)) for lo in range(0, n_rows, CHUNK_ROWS)]
+
+
+def _chunk_progress(progress, start, end, done, chunks, text):
+    """Laporkan progress potongan ke-done (hanya jika lebih dari satu potongan)"""
+    if progress and len(chunks) > 1:
+        lo, hi = chunks[done]
+        progress(start + (end - start) * done / len(chunks), f"{text} (baris {lo + 1}-{hi})...")
+
+
+def normalize_kode_icd(series):
+    """Normalisasi kode ICD (strip + upper); nilai non-string menjadi NaN"""
+    return series.str.strip().str.upper()
+
+
+def is_mati(alasan_pulang):
+    """True jika alasan pulang berarti pasien meninggal"""
+    return pd.Series(alasan_pulang).map(str).str.strip().str.upper().isin(ALASAN_MATI)
+
+
+def classify_mapping(df_mapping, kode=None, progress=None, start=0.0, end=1.0):
+    """
+    Klasifikasi setiap baris mapping, per potongan CHUNK_ROWS baris.
+
+    Mengembalikan DataFrame dengan kolom: kode, gender, kolom_usia
+    (categorical SIRS_COLUMNS), jumlah, jumlah_mati. Baris dengan kelamin selain
+    L/P dibuang (sama seperti loop lama). kode (opsional) adalah kode ICD
+    yang sudah dinormalisasi, misal dari MappingIndex. Jika df_mapping sudah
+    dipre-agregasi di SQLite, kolom 'jumlah' berisi banyaknya pasien per baris.
+    progress (opsional) dipanggil per potongan dengan nilai antara start
+    dan end.
+    """
+    chunks = _chunks(len(df_mapping))
+    if len(chunks) <= 1:
+        return _classify_chunk(df_mapping, kode)
+
+    parts = []
+    for done, (lo, hi) in enumerate(chunks):
+        _chunk_progress(progress, start, end, done, chunks, "Mengklasifikasi data mapping")
+        parts.append(_classify_chunk(df_mapping.iloc[lo:hi], None if kode is None else kode.iloc[lo:hi]))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _classify_chunk(df_mapping, kode=None):
+    if kode is None:
+        kode = normalize_kode_icd(df_mapping['kode_icd'])
+
+    gender = normalize_kelamin(df_mapping['kelamin'])
+    valid = gender.isin(['L', 'P']).to_numpy()
+
+    kolom_usia = classify_sirs(
+        df_mapping['usia_tahun'], df_mapping['usia_bulan'], df_mapping['usia_hari'], gender
+    )
+    if 'jumlah' in df_mapping.columns:
+        jumlah = df_mapping['jumlah'].to_numpy(dtype='int64')
+    else:
+        jumlah = np.ones(len(df_mapping), dtype='int64')
+    mati = is_mati(df_mapping['alasan_pulang']).to_numpy()
+
+    return pd.DataFrame({
+        'kode': kode.to_numpy()[valid],
+        'gender': gender.to_numpy()[valid],
+        'kolom_usia': kolom_usia[valid],
+        'jumlah': jumlah[valid],
+        'jumlah_mati': np.where(mati, jumlah, 0)[valid],
+    })
+
+
+def aggregate_counts(df_classified, progress=None, start=0.0, end=1.0):
+    """
+    Hasilkan matriks hitungan per kode ICD (index) x kolom SIRS/jumlah (kolom)
+    dengan bincount atas pasangan (kode, kolom), berbobot kolom jumlah (dan
+    jumlah_mati untuk kolom pasien mati). bincount dijalankan per potongan
+    CHUNK_ROWS baris; progress (opsional) dipanggil per potongan.
+    """
+    value_cols = SIRS_COLUMNS + JUMLAH_COLUMNS
+    n_cols = len(value_cols)
+    total_l = value_cols.index("Jumlah Pasien Keluar Hidup dan Mati Menurut Jenis Kelamin_L")
+    mati_l = value_cols.index("Jumlah Pasien Keluar Mati_L")
+
+    kode_idx, kode_uniques = pd.factorize(df_classified['kode'])
+    ada_kode = kode_idx >= 0
+    perempuan = (df_classified['gender'] == 'P').to_numpy()
+    usia_codes = df_classified['kolom_usia'].cat.codes.to_numpy()
+    jumlah = df_classified['jumlah'].to_numpy(dtype='int64')
+    jumlah_mati = df_classified['jumlah_mati'].to_numpy(dtype='int64')
+
+    base = kode_idx.astype('int64') * n_cols
+    parts = [
+        (base + usia_codes, ada_kode & (usia_codes >= 0), jumlah),
+        (base + total_l + perempuan, ada_kode, jumlah),
+        (base + mati_l + perempuan, ada_kode & (jumlah_mati > 0), jumlah_mati),
+    ]
+
+    chunks = _chunks(len(df_classified))
+    matrix = np.zeros(len(kode_uniques) * n_cols, dtype='float64')
+    for done, (lo, hi) in enumerate(chunks):
+        _chunk_progress(progress, start, end, done, chunks, "Menghitung matriks SIRS")
+        flat = np.concatenate([pos[lo:hi][mask[lo:hi]] for pos, mask, w in parts])
+        weights = np.concatenate([w[lo:hi][mask[lo:hi]] for pos, mask, w in parts])
+        matrix += np.bincount(flat, weights=weights, minlength=len(matrix))
+    matrix = matrix.reshape(len(kode_uniques), n_cols).astype('int64')
+
+    counts = pd.DataFrame(matrix, index=pd.Index(kode_uniques), columns=value_cols)
+    return add_totals(counts)
+
+
+def add_totals(counts):
+    """Isi kolom jumlah _TOTAL dari kolom _L + _P"""
+    for prefix in TOTAL_PREFIXES:
+        counts[prefix + "TOTAL"] = counts[prefix + "L"] + counts[prefix + "P"]
+    return counts
+
+
+def merge_to_template(df_template, icd_col, counts, progress=None, start=0.0, end=1.0):
+    """
+    Tempelkan matriks hitungan ke template SIRS berdasarkan kode ICD, per
+    potongan CHUNK_ROWS baris template (progress opsional per potongan).
+    """
+    df_sirs = df_template.copy()
+
+    # Pastikan semua kolom SIRS & jumlah ada (urutan sama dengan loop lama)
+    for col in SIRS_COLUMNS + JUMLAH_COLUMNS:
+        df_sirs[col] = 0
+
+    kode_template = df_sirs[icd_col].map(str).str.strip().str.upper()
+    skip = kode_template.isin(["", "NAN"]).to_numpy()
+
+    chunks = _chunks(len(df_sirs))
+    matrix = np.zeros((len(df_sirs), len(counts.columns)), dtype='int64')
+    for done, (lo, hi) in enumerate(chunks):
+        _chunk_progress(progress, start, end, done, chunks, "Menggabungkan kode ICD")
+        matrix[lo:hi] = counts.reindex(kode_template.to_numpy()[lo:hi], fill_value=0).to_numpy(dtype='int64')
+    matrix[skip] = 0
+
+    for pos, col in enumerate(counts.columns):
+        df_sirs[col] = matrix[:, pos]
+
+    return df_sirs
+
+
+def hitung_sirs(df_template, df_mapping, icd_col, progress=None, index=None):
+    """
+    Hitung tabel SIRS dari data mapping.
+
+    df_mapping harus memiliki kolom: kode_icd, kelamin, usia_tahun, usia_bulan,
+    usia_hari, alasan_pulang. index (opsional) adalah MappingIndex atas
+    df_mapping agar kode ICD tidak dinormalisasi ulang. progress (opsional)
+    dipanggil sebagai progress(value, text).
+    """
+    if progress:
+        progress(0.3, "Mengklasifikasi data mapping...")
+    kode = index.kode if index is not None else None
+    df_classified = classify_mapping(df_mapping, kode=kode, progress=progress, start=0.3, end=0.6)
+
+    if progress:
+        progress(0.6, "Menghitung matriks SIRS...")
+    counts = aggregate_counts(df_classified, progress=progress, start=0.6, end=0.9)
+
+    if progress:
+        progress(0.9, f"Menggabungkan {len(df_template)} kode ICD...")
+    return merge_to_template(df_template, icd_col, counts, progress=progress, start=0.9, end=1.0)
+
+
+# ===================== ENGINE SQL (push-down ke SQLite) =====================
+
+# Kolom usia dibatasi ke rentang ini sebelum masuk SQL; semua batas kelompok
+# usia berada di dalamnya sehingga hasil CASE tidak berubah
+USIA_MIN, USIA_MAX = -1, 1000
+
+
+def _sql_kelompok_usia(tahun, bulan, hari):
+    """
+    Ekspresi CASE SQL yang meniru kelompok_usia / get_sirs_column.
+
+    Menghasilkan nomor kelompok (posisi di AGE_BANDS) atau NULL.
+    """
+    whens = [
+        f"WHEN {tahun} >= {int(edge)} THEN {YEAR_BAND_OFFSET + pos}"
+        for pos, edge in reversed(list(enumerate(YEAR_EDGES)))
+    ]
+    bayi = [
+        (f"{bulan} >= 6", "6-11 bln"),
+        (f"{bulan} >= 3", "3- <6 bln"),
+        (f"({bulan} >= 1 OR {hari} >= 29)", "29 hr- <30 bln"),
+        (f"{hari} >= 8", "8-28 hr"),
+        (f"{hari} >= 1", "1-7 hr"),
+        (f"{hari} = 0", "<1 Jam"),
+    ]
+    whens += [
+        f"WHEN {tahun} = 0 AND {cond} THEN {AGE_BANDS.index(band)}"
+        for cond, band in bayi
+    ]
+    return "CASE " + " ".join(whens) + " END"
+
+
+def _load_usia_lookup(conn, table, col):
+    """
+    Isi tabel temp raw -> usia (int) dari nilai unik satu kolom usia.
+
+    Nilai mentah di-parse di Python dengan to_usia, sehingga aturan
+    konversi (teks kosong, desimal, teks tidak valid) sama persis dengan
+    jalur pandas. Pasangan (nilai, tipe) dipakai agar 2 dan '2' tidak tertukar.
+    """
+    conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {table} "
+        "(raw, tipe TEXT, nilai INTEGER, PRIMARY KEY (raw, tipe))"
+    )
+    conn.execute(f"DELETE FROM {table}")
+
+    distinct = conn.execute(
+        f'SELECT DISTINCT "{col}", typeof("{col}") FROM mapping'
+    ).fetchall()
+    if distinct:
+        raw = pd.Series([row[0] for row in distinct], dtype=object)
+        nilai = np.clip(to_usia(raw), USIA_MIN, USIA_MAX).astype('int64')
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {table} VALUES (?, ?, ?)",
+            [(row[0], row[1], int(n)) for row, n in zip(distinct, nilai)]
+        )
+
+
+def _distinct_values(conn, col):
+    """Nilai unik (mentah) satu kolom tabel mapping"""
+    return [row[0] for row in conn.execute(f'SELECT DISTINCT "{col}" FROM mapping')]
+
+
+def _sql_in(values):
+    """Placeholder '(?, ?, ...)' untuk klausa IN"""
+    return "(" + ", ".join("?" * len(values)) + ")"
+
+
+def classify_mapping_sql(conn, columns, progress=None, start=0.0, end=1.0):
+    """
+    Versi SQL dari classify_mapping: agregasi dijalankan di SQLite.
+
+    columns memetakan nama logis (kode_icd, kelamin, usia_tahun, usia_bulan,
+    usia_hari, alasan_pulang) ke nama kolom di tabel mapping (None jika tidak
+    ada). SQLite hanya mengembalikan sel kode ICD x kelompok usia x kelamin,
+    bukan seluruh baris mapping. Query dijalankan per rentang CHUNK_ROWS id
+    (sel yang sama dari rentang berbeda dijumlahkan aggregate_counts);
+    progress (opsional) dipanggil per rentang.
+
+    Normalisasi teks (strip/upper) dan parsing usia tetap dilakukan di Python
+    atas nilai unik saja, karena TRIM/UPPER/CAST SQLite tidak identik dengan
+    str.strip/str.upper/float Python.
+    """
+    col_kode = columns['kode_icd']
+
+    # Kelamin & alasan pulang: nilai mentah mana yang berarti L / P / mati
+    def raw_values(key, match):
+        col = columns.get(key)
+        if not col:
+            return []
+        values = _distinct_values(conn, col)
+        mask = match(pd.Series(values, dtype=object)).to_numpy()
+        return [v for v, ok in zip(values, mask) if ok]
+
+    kelamin_l = raw_values('kelamin', lambda s: normalize_kelamin(s) == 'L')
+    kelamin_p = raw_values('kelamin', lambda s: normalize_kelamin(s) == 'P')
+    alasan_mati = raw_values('alasan_pulang', is_mati)
+
+    # Usia: tabel temp nilai mentah -> integer
+    joins = []
+    usia_expr = {}
+    for key in ('usia_tahun', 'usia_bulan', 'usia_hari'):
+        col = columns.get(key)
+        if not col:
+            usia_expr[key] = "0"
+            continue
+        table = f"temp.sirs_{key}"
+        _load_usia_lookup(conn, table, col)
+        alias = key.split('_')[1]
+        joins.append(
+            f'LEFT JOIN {table} AS {alias} '
+            f'ON {alias}.raw = m."{col}" AND {alias}.tipe = typeof(m."{col}")'
+        )
+        usia_expr[key] = f"COALESCE({alias}.nilai, 0)"
+    conn.commit()
+
+    bucket = _sql_kelompok_usia(usia_expr['usia_tahun'], usia_expr['usia_bulan'], usia_expr['usia_hari'])
+    col_kelamin = columns['kelamin']
+    col_alasan = columns.get('alasan_pulang')
+    mati_expr = (
+        f'CASE WHEN m."{col_alasan}" IN {_sql_in(alasan_mati)} THEN 1 ELSE 0 END'
+        if col_alasan else "0"
+    )
+
+    query = f"""
+    SELECT m."{col_kode}" AS kode,
+           CASE WHEN m."{col_kelamin}" IN {_sql_in(kelamin_l)} THEN 'L'
+                WHEN m."{col_kelamin}" IN {_sql_in(kelamin_p)} THEN 'P' END AS gender,
+           {bucket} AS kelompok,
+           COUNT(*) AS jumlah,
+           SUM({mati_expr}) AS jumlah_mati
+    FROM mapping AS m
+    {' '.join(joins)}
+    WHERE m."{col_kode}" IS NOT NULL AND m."{col_kode}" != '' AND gender IS NOT NULL
+      AND m.id >= ? AND m.id < ?
+    GROUP BY kode, gender, kelompok
+    """
+    params = kelamin_l + kelamin_p + (alasan_mati if col_alasan else [])
+
+    # Rentang id (bukan OFFSET) agar setiap potongan memakai rowid langsung
+    first_id, last_id = conn.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM mapping").fetchone()
+    chunks = [(lo, min(lo + CHUNK_ROWS, last_id + 1)) for lo in range(first_id, last_id + 1, CHUNK_ROWS)]
+    parts = []
+    for done, (lo, hi) in enumerate(chunks):
+        if progress and len(chunks) > 1:
+            progress(start + (end - start) * done / len(chunks), f"Menghitung agregat di SQLite (id {lo}-{hi - 1})...")
+        parts.append(pd.read_sql_query(query, conn, params=params + [lo, hi]))
+    # Potongan kosong dibuang agar tipe kolom hasil tidak berubah
+    df = pd.concat([part for part in parts if len(part)] or parts[:1], ignore_index=True)
+
+    perempuan = (df['gender'] == 'P').to_numpy()
+    kelompok = df['kelompok'].to_numpy(dtype='float64', na_value=np.nan)
+    codes = np.where(np.isnan(kelompok), -1, np.nan_to_num(kelompok) * 2 + perempuan).astype('int64')
+
+    return pd.DataFrame({
+        'kode': normalize_kode_icd(df['kode']).to_numpy(),
+        'gender': df['gender'].to_numpy(),
+        'kolom_usia': pd.Categorical.from_codes(codes, categories=SIRS_COLUMNS),
+        'jumlah': df['jumlah'].to_numpy(dtype='int64'),
+        'jumlah_mati': df['jumlah_mati'].to_numpy(dtype='int64'),
+    })
+
+
+def hitung_sirs_sql(df_template, conn, icd_col, columns, progress=None):
+    """
+    Hitung tabel SIRS dengan agregasi di SQLite (lihat classify_mapping_sql).
+
+    Hasilnya identik dengan hitung_sirs, tetapi data yang dibaca ke Python
+    hanya sel agregat sehingga memori tetap kecil untuk database besar.
+    """
+    if progress:
+        progress(0.3, "Menghitung agregat di SQLite...")
+    df_classified = classify_mapping_sql(conn, columns, progress=progress, start=0.3, end=0.6)
+
+    if progress:
+        progress(0.6, "Menghitung matriks SIRS...")
+    counts = aggregate_counts(df_classified, progress=progress, start=0.6, end=0.9)
+
+    if progress:
+        progress(0.9, f"Menggabungkan {len(df_template)} kode ICD...")
+    return merge_to_template(df_template, icd_col, counts, progress=progress, start=0.9, end=1.0)
+
+
+# ================== KOLOM MAPPING & TEMPLATE ==================
+
+# Nama kolom tabel mapping yang dikenali untuk setiap peran (dibandingkan
+# tanpa spasi / garis bawah dan tanpa membedakan huruf besar-kecil)
+MAPPING_COLUMN_NAMES = {
+    'kode_icd': ["kode_icd", "KODE ICD", "kode icd", "KODE_ICD"],
+    'kelamin': ["kelamin", "KELAMIN", "jenis_kelamin", "JENIS KELAMIN"],
+    'usia_tahun': ["usia_tahun", "USIA TAHUN", "usia_thn", "USIA_TAHUN"],
+    'usia_bulan': ["usia_bulan", "USIA BULAN", "usia_bln", "USIA_BULAN"],
+    'usia_hari': ["usia_hari", "USIA HARI", "usia_hr", "USIA_HARI"],
+    'alasan_pulang': ["alasan_pulang", "ALASAN PULANG", "alasan pulang", "ALASAN_PULANG", "status_pulang", "STATUS PULANG"],
+}
+
+# Peran kolom yang wajib ada beserta label untuk pesan error
+REQUIRED_MAPPING_COLUMNS = {
+    'kode_icd': "KODE ICD",
+    'kelamin': "KELAMIN",
+    'usia_tahun': "USIA TAHUN",
+}
+
+# Nama kolom hasil sirs_mapping_query
+MAPPING_QUERY_COLUMNS = list(MAPPING_COLUMN_NAMES) + ['jumlah']
+
+
+def _column_key(name):
+    return name.lower().replace(" ", "").replace("_", "")
+
+
+def find_mapping_columns(column_names):
+    """Peran -> nama kolom tabel mapping (None jika tidak ditemukan)"""
+    columns = {}
+    for role, possible_names in MAPPING_COLUMN_NAMES.items():
+        columns[role] = None
+        for possible in possible_names:
+            found = [col for col in column_names if _column_key(col) == _column_key(possible)]
+            if found:
+                columns[role] = found[0]
+                break
+    return columns
+
+
+def missing_mapping_columns(columns):
+    """Label kolom wajib yang tidak ditemukan oleh find_mapping_columns"""
+    return [label for role, label in REQUIRED_MAPPING_COLUMNS.items() if not columns[role]]
+
+
+def sirs_mapping_query(columns, table="mapping", where=None):
+    """
+    Query mapping yang dipre-agregasi per kombinasi (kode, kelamin, usia,
+    alasan pulang) memakai index idx_mapping_sirs; kolom hasil sesuai
+    MAPPING_QUERY_COLUMNS. where (opsional) adalah syarat tambahan.
+    """
+    extra = f"AND {where}" if where else ""
+    return f"""
+    SELECT "{columns['kode_icd']}", "{columns['kelamin']}", "{columns['usia_tahun']}", 
+           "{columns['usia_bulan']}", "{columns['usia_hari']}", "{columns['alasan_pulang']}",
+           COUNT(*)
+    FROM {table}
+    WHERE "{columns['kode_icd']}" IS NOT NULL AND "{columns['kode_icd']}" != '' {extra}
+    GROUP BY 1, 2, 3, 4, 5, 6
+    """
+
+
+def find_icd_column(df_template):
+    """Kolom 'Kode ICD' pada template SIRS (None jika tidak ada)"""
+    for col in df_template.columns:
+        if col.lower().strip() == 'kode icd':
+            return col
+    return None
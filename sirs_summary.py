@@ -0,0 +1,239 @@
+"""
+Ringkasan SIRS yang disimpan di database dan diperbarui secara inkremental.
+
+Matriks hitungan SIRS (kode ICD x kolom SIRS/jumlah) disimpan di tabel
+sirs_summary bersama watermark id mapping terakhir yang sudah dihitung.
+Perhitungan berikutnya hanya membaca baris mapping dengan id di atas
+watermark (hasil upload baru) dan perubahan sejak itu. Baris yang dihapus
+atau di-UPDATE (misal oleh upsert upload ulang) dicatat oleh trigger ke
+sirs_summary_log: nilai lama bertanda -1, nilai baru bertanda +1.
+
+Ringkasan dibangun ulang penuh jika belum ada, jika kolom mapping berubah,
+atau jika tabel mapping dibuat ulang (trigger ikut hilang).
+"""
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from sirs_engine import (
+    JUMLAH_COLUMNS, MAPPING_QUERY_COLUMNS, SIRS_COLUMNS, TOTAL_PREFIXES,
+    add_totals, aggregate_counts, classify_mapping, merge_to_template, sirs_mapping_query,
+)
+
+SUMMARY_TABLE = "sirs_summary"
+LOG_TABLE = "sirs_summary_log"
+META_TABLE = "sirs_summary_meta"
+DELETE_TRIGGER = "mapping_sirs_ad"
+UPDATE_TRIGGER = "mapping_sirs_au"
+
+# Kolom yang disimpan (kolom _TOTAL dihitung ulang saat dibaca)
+STORED_COLUMNS = [
+    col for col in SIRS_COLUMNS + JUMLAH_COLUMNS
+    if not any(col == prefix + "TOTAL" for prefix in TOTAL_PREFIXES)
+]
+
+# Peran kolom mapping yang dicatat saat baris dihapus / diubah
+LOG_COLUMNS = MAPPING_QUERY_COLUMNS[:-1]
+
+
+def _create_tables(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            kode TEXT NOT NULL,
+            kolom TEXT NOT NULL,
+            jumlah INTEGER NOT NULL,
+            PRIMARY KEY (kode, kolom)
+        ) WITHOUT ROWID
+    """)
+    # Tanpa tipe kolom agar nilai lama tersalin apa adanya (tanpa afinitas)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {LOG_TABLE} (tanda INTEGER, {', '.join(LOG_COLUMNS)})")
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value)")
+
+
+def _create_triggers(cursor, columns):
+    """
+    Trigger hapus / ubah mencatat baris yang sudah masuk ringkasan
+    (id <= watermark). Trigger ubah hanya aktif jika kolom SIRS berubah.
+    """
+    def values(prefix):
+        return ", ".join(
+            f'{prefix}."{columns[role]}"' if columns[role] else "NULL" for role in LOG_COLUMNS
+        )
+
+    names = ", ".join(LOG_COLUMNS)
+    counted = f"old.id <= (SELECT value FROM {META_TABLE} WHERE key = 'watermark')"
+    sirs_columns = ", ".join(f'"{columns[role]}"' for role in LOG_COLUMNS if columns[role])
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {DELETE_TRIGGER} AFTER DELETE ON mapping
+        WHEN {counted}
+        BEGIN
+            INSERT INTO {LOG_TABLE} (tanda, {names}) VALUES (-1, {values('old')});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {UPDATE_TRIGGER} AFTER UPDATE OF {sirs_columns} ON mapping
+        WHEN {counted}
+        BEGIN
+            INSERT INTO {LOG_TABLE} (tanda, {names}) VALUES (-1, {values('old')});
+            INSERT INTO {LOG_TABLE} (tanda, {names}) VALUES (1, {values('new')});
+        END
+    """)
+
+
+def reset_summary(conn):
+    """
+    Buang ringkasan dan trigger-nya (tidak commit). Panggil sebelum
+    menghapus seluruh isi mapping agar trigger tidak mencatat setiap baris.
+    """
+    cursor = conn.cursor()
+    for trigger in (DELETE_TRIGGER, UPDATE_TRIGGER):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for table in (SUMMARY_TABLE, LOG_TABLE, META_TABLE):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _meta(cursor):
+    try:
+        cursor.execute(f"SELECT key, value FROM {META_TABLE}")
+    except sqlite3.OperationalError:
+        # Tabel meta belum ada
+        return {}
+    return dict(cursor.fetchall())
+
+
+def _trigger_exists(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='trigger' AND name=?", (DELETE_TRIGGER,))
+    return cursor.fetchone() is not None
+
+
+def _counts_from(conn, query, params=()):
+    """Matriks hitungan (kolom STORED_COLUMNS) dari query pre-agregasi"""
+    df = pd.read_sql_query(query, conn, params=params)
+    df.columns = MAPPING_QUERY_COLUMNS
+    return aggregate_counts(classify_mapping(df))[STORED_COLUMNS]
+
+
+def _write_delta(cursor, delta):
+    """Tambahkan matriks delta ke tabel ringkasan (upsert per sel)"""
+    matrix = delta.to_numpy(dtype='int64')
+    rows, cols = np.nonzero(matrix)
+    kode = delta.index.to_numpy(dtype=object)
+    kolom = np.array(delta.columns, dtype=object)
+
+    cursor.executemany(
+        f"""
+        INSERT INTO {SUMMARY_TABLE} (kode, kolom, jumlah) VALUES (?, ?, ?)
+        ON CONFLICT (kode, kolom) DO UPDATE SET jumlah = jumlah + excluded.jumlah
+        """,
+        zip(kode[rows].tolist(), kolom[cols].tolist(), matrix[rows, cols].tolist()),
+    )
+    cursor.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE jumlah = 0")
+
+
+def refresh_summary(conn, columns, progress=None):
+    """
+    Perbarui ringkasan SIRS sampai isi tabel mapping saat ini.
+
+    columns adalah hasil sirs_engine.find_mapping_columns. Mengembalikan
+    dict statistik: mode ('full' / 'delta'), inserted & deleted (jumlah baris
+    mapping yang diterapkan; baris yang diubah dihitung di keduanya),
+    watermark.
+    """
+    cursor = conn.cursor()
+    signature = json.dumps(columns, sort_keys=True)
+
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        meta = _meta(cursor)
+        full = (
+            meta.get('columns') != signature
+            or meta.get('watermark') is None
+            or not _trigger_exists(cursor)
+        )
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM mapping")
+        watermark = cursor.fetchone()[0]
+
+        if full:
+            if progress:
+                progress(0.3, "Membangun ulang ringkasan SIRS...")
+            reset_summary(conn)
+            _create_tables(cursor)
+            _create_triggers(cursor, columns)
+
+            delta = _counts_from(conn, sirs_mapping_query(columns, where="id <= ?"), (watermark,))
+            cursor.execute("SELECT COUNT(*) FROM mapping WHERE id <= ?", (watermark,))
+            inserted = cursor.fetchone()[0]
+            deleted = 0
+        else:
+            if progress:
+                progress(0.3, "Menerapkan perubahan data mapping...")
+            old_watermark = meta['watermark']
+            where = "id > ? AND id <= ?"
+            delta = _counts_from(conn, sirs_mapping_query(columns, where=where), (old_watermark, watermark))
+
+            cursor.execute(f"SELECT COUNT(*) FROM mapping WHERE {where}", (old_watermark, watermark))
+            inserted = cursor.fetchone()[0]
+            cursor.execute(f"SELECT COUNT(*) FROM {LOG_TABLE} WHERE tanda < 0")
+            deleted = cursor.fetchone()[0]
+            cursor.execute(f"SELECT COUNT(*) FROM {LOG_TABLE} WHERE tanda > 0")
+            inserted += cursor.fetchone()[0]
+
+            if deleted:
+                log_columns = {role: role for role in LOG_COLUMNS}
+                removed = _counts_from(conn, sirs_mapping_query(log_columns, table=LOG_TABLE, where="tanda < 0"))
+                added = _counts_from(conn, sirs_mapping_query(log_columns, table=LOG_TABLE, where="tanda > 0"))
+                delta = delta.add(added, fill_value=0).sub(removed, fill_value=0)
+                cursor.execute(f"DELETE FROM {LOG_TABLE}")
+
+        _write_delta(cursor, delta)
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES (?, ?)",
+            [('watermark', watermark), ('columns', signature)],
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        'mode': 'full' if full else 'delta',
+        'inserted': inserted,
+        'deleted': deleted,
+        'watermark': watermark,
+    }
+
+
+def load_summary(conn):
+    """Matriks hitungan SIRS dari tabel ringkasan (format aggregate_counts)"""
+    df = pd.read_sql_query(f"SELECT kode, kolom, jumlah FROM {SUMMARY_TABLE}", conn)
+
+    kode_idx, kode_uniques = pd.factorize(df['kode'])
+    kolom_idx = pd.Index(STORED_COLUMNS).get_indexer(df['kolom'])
+
+    matrix = np.zeros((len(kode_uniques), len(STORED_COLUMNS)), dtype='int64')
+    matrix[kode_idx, kolom_idx] = df['jumlah'].to_numpy(dtype='int64')
+
+    counts = pd.DataFrame(matrix, index=pd.Index(kode_uniques), columns=STORED_COLUMNS)
+    return add_totals(counts)[SIRS_COLUMNS + JUMLAH_COLUMNS]
+
+
+def hitung_sirs_incremental(df_template, conn, icd_col, columns, progress=None):
+    """
+    Hitung tabel SIRS dari ringkasan yang diperbarui inkremental.
+
+    Hasilnya identik dengan hitung_sirs; hanya baris mapping baru / terhapus
+    sejak perhitungan sebelumnya yang diklasifikasi ulang.
+    """
+    stats = refresh_summary(conn, columns, progress=progress)
+
+    if progress:
+        progress(0.6, f"Membaca ringkasan SIRS (+{stats['inserted']} / -{stats['deleted']} baris)...")
+    counts = load_summary(conn)
+
+    if progress:
+        progress(0.9, f"Menggabungkan {len(df_template)} kode ICD...")
+    return merge_to_template(df_template, icd_col, counts, progress=progress, start=0.9, end=1.0)
@@ -0,0 +1,30 @@
+import os
+
+import pandas as pd
+
+import excel_cache
+
+
+def test_cache_lives_in_user_folder(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "local"))
+    share = tmp_path / "share"
+    share.mkdir()
+    workbook = share / "template.xlsx"
+    workbook.write_bytes(b"isi workbook")
+
+    calls = []
+
+    def reader(filepath):
+        calls.append(filepath)
+        return pd.DataFrame({"KODE": ["A00.0"]})
+
+    first = excel_cache.read_cached(str(workbook), reader, "sirs")
+    second = excel_cache.read_cached(str(workbook), reader, "sirs")
+
+    assert len(calls) == 1
+    assert second.equals(first)
+    assert os.listdir(share) == ["template.xlsx"]
+    assert os.listdir(excel_cache.cache_dir())
+
+    excel_cache.clear_cache()
+    assert not os.path.exists(excel_cache.cache_dir())
@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+import pytest
+
+from excel_export import write_excel
+
+
+class Stop(Exception):
+    pass
+
+
+def test_cancelled_write_keeps_existing_file(tmp_path):
+    filepath = tmp_path / "SIRS.xlsx"
+    filepath.write_bytes(b"laporan lama")
+
+    def progress(value, text):
+        raise Stop()
+
+    with pytest.raises(Stop):
+        write_excel(pd.DataFrame({"A": range(10)}), str(filepath), "S", progress=progress)
+
+    assert filepath.read_bytes() == b"laporan lama"
+    assert os.listdir(tmp_path) == ["SIRS.xlsx"]
+
+
+def test_write_replaces_existing_file(tmp_path):
+    filepath = tmp_path / "SIRS.xlsx"
+    filepath.write_bytes(b"laporan lama")
+
+    write_excel(pd.DataFrame({"A": [1, 2]}), str(filepath), "S")
+
+    assert pd.read_excel(filepath)["A"].tolist() == [1, 2]
+    assert os.listdir(tmp_path) == ["SIRS.xlsx"]
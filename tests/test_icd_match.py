@@ -0,0 +1,58 @@
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from icd_expand import expand_icd_code, expand_icd_column
+from icd_match import IcdMatcher, compile_spec
+
+SPECS = [
+    "A 00",
+    "A 06.0-.3,.5-.9",
+    "A 15.1-16.2",
+    "A 16.3-.9",
+    "A 18.1.3-.8",
+    "A 02, 04-05, A 07-08",
+    "N 02.0 -.7,.9, 03,N 05-08",
+    "B 20, B20.1, B20.1",
+    "X",
+    "",
+]
+
+
+def matches(matcher, specs):
+    spec_pos, kode_ids = matcher.match_specs(specs)
+    return Counter(zip(spec_pos.tolist(), kode_ids.tolist()))
+
+
+@pytest.fixture
+def matcher_and_uniques():
+    uniques = sorted({code for spec in SPECS for code in expand_icd_code(spec)} | {"A17.0", "Z99.9"})
+    return IcdMatcher(uniques), uniques
+
+
+def test_raw_spec_matches_expanded_codes(matcher_and_uniques):
+    matcher, uniques = matcher_and_uniques
+    position = {code: pos for pos, code in enumerate(uniques)}
+
+    expected = Counter()
+    for spec_pos, spec in enumerate(SPECS):
+        for code in expand_icd_code(spec):
+            if code in position:
+                expected[(spec_pos, position[code])] += 1
+
+    assert matches(matcher, SPECS) == expected
+
+
+def test_raw_and_expanded_cells_agree(matcher_and_uniques):
+    matcher, _ = matcher_and_uniques
+    expanded, _ = expand_icd_column(pd.Series(SPECS, dtype=object))
+
+    assert matches(matcher, SPECS) == matches(matcher, list(expanded))
+
+
+def test_range_compiles_to_intervals():
+    intervals, extras = compile_spec("A 15.1-16.2")
+
+    assert len(intervals) == 2
+    assert extras == ()
@@ -0,0 +1,120 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sirs_engine
+from sirs_engine import classify_sirs, get_sirs_column
+
+# Batas kelompok usia tahun (versi if/else sebelum classify_sirs)
+YEAR_BANDS = [
+    (85, "<85 thn"), (80, "80-84 thn"), (75, "75-79 thn"), (70, "70-74 thn"),
+    (65, "65-69 thn"), (60, "60-64 thn"), (55, "55-59 thn"), (50, "50-54 thn"),
+    (45, "45-49 thn"), (40, "40-44 thn"), (35, "35-39 thn"), (30, "30-34 thn"),
+    (25, "25-29 thn"), (20, "20-24 thn"), (15, "15-19 thn"), (10, "10-14 thn"),
+    (5, "5-9 thn"), (1, "1-4 thn"),
+]
+
+# Usia tahun 0 / kosong / tidak valid: bulan dan hari ikut menentukan
+TAHUN_BAYI = [None, np.nan, "", " ", "abc", "inf", -1, -0.5, 0, "0", 0.9]
+BULAN = [None, np.nan, "", "x", -1, 0, 1, 2.9, 3, 5, 6, 12]
+HARI = [np.nan, "", -3, 0, 0.5, 1, 7, 8, 28, 29]
+# Usia tahun >= 1: setiap batas kelompok, bulan / hari tidak berpengaruh
+TAHUN = [1, "1.9", 4, 5, 9, 10, 14, 15, 19, 20, 24, 25, 29, 30, 34, 35, 39, 40, 44, 45,
+         49, 50, 54, 55, 59, 60, 64, 65, 69, 70, 74, 75, 79, 80, 84, 85, "85", 120, "1_000"]
+KELAMIN = [" l ", "P"]
+
+
+def _usia(value):
+    try:
+        return int(float(value)) if pd.notna(value) and str(value).strip() != "" else 0
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def reference_sirs_column(usia_tahun, usia_bulan, usia_hari, gender):
+    """Kolom SIRS menurut logika skalar asli (if/else per pasien)"""
+    gender = str(gender).upper().strip()
+    tahun, bulan, hari = _usia(usia_tahun), _usia(usia_bulan), _usia(usia_hari)
+
+    for edge, band in YEAR_BANDS:
+        if tahun >= edge:
+            return f"{band}_{gender}"
+    if tahun != 0:
+        return None
+
+    if bulan >= 6:
+        band = "6-11 bln"
+    elif bulan >= 3:
+        band = "3- <6 bln"
+    elif bulan >= 1 or hari >= 29:
+        band = "29 hr- <30 bln"
+    elif hari >= 8:
+        band = "8-28 hr"
+    elif hari >= 1:
+        band = "1-7 hr"
+    elif hari == 0:
+        band = "<1 Jam"
+    else:
+        return None
+    return f"{band}_{gender}"
+
+
+@pytest.fixture(scope="module")
+def grid():
+    rows = list(itertools.product(TAHUN_BAYI, BULAN, HARI, KELAMIN))
+    rows += itertools.product(TAHUN, [None, 0, 6, 12], [np.nan, 0, 29], KELAMIN)
+    return pd.DataFrame(
+        rows,
+        columns=["tahun", "bulan", "hari", "kelamin"],
+        dtype=object,
+    )
+
+
+def test_scalar_and_vectorized_agree(grid):
+    vectorized = classify_sirs(grid["tahun"], grid["bulan"], grid["hari"], grid["kelamin"])
+
+    for pos, row in enumerate(grid.itertuples(index=False)):
+        expected = reference_sirs_column(row.tahun, row.bulan, row.hari, row.kelamin)
+        scalar = get_sirs_column(row.tahun, row.bulan, row.hari, row.kelamin)
+        column = vectorized[pos]
+
+        assert scalar == expected, row
+        assert (None if pd.isna(column) else column) == expected, row
+
+
+def test_unknown_gender_is_unclassified():
+    result = classify_sirs([30, 0], [0, 6], [0, 0], ["X", ""])
+    assert result.isna().all()
+
+
+class Stop(Exception):
+    pass
+
+
+def test_progress_reported_per_chunk(monkeypatch):
+    monkeypatch.setattr(sirs_engine, "CHUNK_ROWS", 10)
+    df_mapping = pd.DataFrame({
+        "kode_icd": ["A00.0"] * 35,
+        "kelamin": ["L", "P"] * 17 + ["L"],
+        "usia_tahun": range(35),
+        "usia_bulan": 0,
+        "usia_hari": 0,
+        "alasan_pulang": "",
+    })
+    template = pd.DataFrame({"KODE ICD": ["A00.0"]})
+    calls = []
+
+    def progress(value, text):
+        calls.append(text)
+        # Pembatalan di potongan kedua klasifikasi
+        if len(calls) == 3:
+            raise Stop()
+
+    with pytest.raises(Stop):
+        sirs_engine.hitung_sirs(template, df_mapping, "KODE ICD", progress=progress)
+    assert calls[1:] == [
+        "Mengklasifikasi data mapping (baris 1-10)...",
+        "Mengklasifikasi data mapping (baris 11-20)...",
+    ]
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+import db
+from conftest import ROOT
+from logic import save_mapping_to_db
+
+DATA_MENTAH = os.path.join(ROOT, "excel", "DataMentah.xlsx")
+# Jumlah baris data DataMentah.xlsx (termasuk baris kosong pertama)
+DATA_MENTAH_ROWS = 2947
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Folder kerja dengan database/ kosong (DB_PATH relatif ke cwd)"""
+    (tmp_path / "database").mkdir()
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    db.close_connections()
+
+
+def mapping_count():
+    return db.get_connection().execute("SELECT COUNT(*) FROM mapping").fetchone()[0]
+
+
+def test_upload_keeps_every_row(workdir):
+    result = save_mapping_to_db(DATA_MENTAH)
+
+    assert result["total"] == DATA_MENTAH_ROWS
+    assert result["inserted"] == DATA_MENTAH_ROWS
+    assert mapping_count() == DATA_MENTAH_ROWS
+
+
+def test_reupload_is_noop(workdir):
+    save_mapping_to_db(DATA_MENTAH)
+    before = db.get_connection().execute("SELECT * FROM mapping ORDER BY id").fetchall()
+
+    result = save_mapping_to_db(DATA_MENTAH)
+
+    assert result == {"total": DATA_MENTAH_ROWS, "inserted": 0, "updated": 0, "unchanged": DATA_MENTAH_ROWS}
+    assert db.get_connection().execute("SELECT * FROM mapping ORDER BY id").fetchall() == before
+
+
+def test_same_natural_key_different_content_kept(workdir):
+    path = workdir / "mapping.csv"
+    path.write_text(
+        "NO RM,TANGGAL MASUK,TANGGAL KELUAR,RUANG PERAWATAN,KODE ICD,KELAMIN\n"
+        "100,2025-09-03 10:05:08,2025-09-27,4 PD,C50.9,P\n"
+        "100,2025-09-03 10:05:08,2025-09-27,4 PD,C50.9,L\n"
+        "100,2025-09-03 10:05:08,2025-09-27,4 PD,C50.9,L\n",
+        encoding="utf-8",
+    )
+
+    assert save_mapping_to_db(str(path))["inserted"] == 3
+    assert save_mapping_to_db(str(path))["unchanged"] == 3
+    assert mapping_count() == 3
+
+
+def test_old_keys_recomputed(workdir):
+    save_mapping_to_db(DATA_MENTAH)
+    conn = db.get_connection()
+    # Database dari versi kunci sebelumnya
+    conn.execute(f"UPDATE mapping SET {db.KEY_COLUMN} = NULL")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    db.close_connections()
+
+    result = save_mapping_to_db(DATA_MENTAH)
+
+    assert result["inserted"] == 0
+    assert mapping_count() == DATA_MENTAH_ROWS
+
+
+def test_schema_dates_text_without_obsolete_index(workdir):
+    save_mapping_to_db(DATA_MENTAH)
+    conn = db.get_connection()
+
+    types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(mapping)")}
+    assert all(types[col] == "TEXT" for col in types if col.startswith("tanggal_"))
+    assert conn.execute("SELECT typeof(tanggal_masuk) FROM mapping LIMIT 1").fetchone() == ("text",)
+
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert not indexes & set(db.OBSOLETE_INDEXES)